@@ -0,0 +1,57 @@
+import pytest
+from littlefs import LittleFS, UserContext, UserContextFile
+
+BLOCK_SIZE = 4096
+BLOCK_COUNT = 256
+
+
+@pytest.fixture(params=["memory", "file"])
+def context_factory(request, tmp_path):
+    """Factory for empty contexts of all benchmarked context types"""
+    contexts = []
+
+    def factory():
+        if request.param == "memory":
+            ctx = UserContext(BLOCK_SIZE * BLOCK_COUNT)
+        else:
+            ctx = UserContextFile(str(tmp_path / f"image{len(contexts)}.bin"), create=True)
+        contexts.append(ctx)
+        return ctx
+
+    yield factory
+    for ctx in contexts:
+        if isinstance(ctx, UserContextFile):
+            ctx.close()
+
+
+@pytest.fixture
+def fs_factory(context_factory):
+    """Factory for filesystems on a new context"""
+
+    def factory(mount=True):
+        return LittleFS(context=context_factory(), block_size=BLOCK_SIZE, block_count=BLOCK_COUNT, mount=mount)
+
+    return factory
+
+
+@pytest.fixture
+def fs(fs_factory):
+    """Formatted and mounted filesystem"""
+    return fs_factory()
+
+
+def _make_tree(fs, width, depth, file_size=16, prefix=""):
+    for i in range(width):
+        with fs.open(f"{prefix}/file{i}", "wb") as fh:
+            fh.write(b"x" * file_size)
+    if depth > 1:
+        for i in range(width):
+            path = f"{prefix}/dir{i}"
+            fs.mkdir(path)
+            _make_tree(fs, width, depth - 1, file_size, path)
+
+
+@pytest.fixture
+def make_tree():
+    """Create ``width`` files and (if ``depth`` > 1) ``width`` sub directories per level"""
+    return _make_tree
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from littlefs.__main__ import main
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    """Synthetic host directory tree: 4 directories with 25 files each"""
+    source = tmp_path / "source"
+    for d in range(4):
+        directory = source / f"dir{d}"
+        directory.mkdir(parents=True)
+        for f in range(25):
+            (directory / f"file{f}.bin").write_bytes(bytes([f]) * (f * 97))
+    return source
+
+
+def test_create(benchmark, tmp_path, source_tree):
+    image = tmp_path / "image.bin"
+    argv = ["littlefs", "create", str(source_tree), str(image), "--block-size", "4096", "--fs-size", "1MB"]
+    assert benchmark(main, argv) == 0
+
+
+def test_extract(benchmark, tmp_path, source_tree):
+    image = tmp_path / "image.bin"
+    assert main(["littlefs", "create", str(source_tree), str(image), "--block-size", "4096", "--fs-size", "1MB"]) == 0
+
+    argv = ["littlefs", "extract", str(image), str(tmp_path / "extracted"), "--block-size", "4096"]
+    assert benchmark(main, argv) == 0
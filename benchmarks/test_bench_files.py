@@ -0,0 +1,121 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+SMALL = b"s" * 64
+LARGE = b"0123456789abcdef" * 16 * 1024  # 256 KiB
+
+MODES = {
+    "binary": ("wb", "rb", {}),
+    "text": ("w", "r", {}),
+    "unbuffered": ("wb", "rb", {"buffering": 0}),
+}
+
+
+def _payload(data, mode):
+    return data.decode() if mode == "text" else data
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("data", [SMALL, LARGE], ids=["small", "large"])
+def test_write(benchmark, fs, mode, data):
+    write_mode, _, kwargs = MODES[mode]
+    payload = _payload(data, mode)
+
+    def write():
+        with fs.open("/file", write_mode, **kwargs) as fh:
+            fh.write(payload)
+
+    benchmark(write)
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("data", [SMALL, LARGE], ids=["small", "large"])
+def test_read(benchmark, fs, mode, data):
+    _, read_mode, kwargs = MODES[mode]
+    with fs.open("/file", "wb") as fh:
+        fh.write(data)
+
+    def read():
+        with fs.open("/file", read_mode, **kwargs) as fh:
+            return fh.read()
+
+    assert len(benchmark(read)) == len(data)
+
+
+@pytest.mark.parametrize("data", [SMALL, LARGE], ids=["small", "large"])
+def test_write_bytes(benchmark, fs, data):
+    benchmark(fs.write_bytes, "/file", data)
+
+
+@pytest.mark.parametrize("data", [SMALL, LARGE], ids=["small", "large"])
+def test_read_bytes(benchmark, fs, data):
+    fs.write_bytes("/file", data)
+    assert len(benchmark(fs.read_bytes, "/file")) == len(data)
+
+
+def test_write_many_small(benchmark, fs):
+    def write():
+        for i in range(50):
+            with fs.open(f"/file{i}", "wb") as fh:
+                fh.write(SMALL)
+
+    benchmark(write)
+
+
+@pytest.mark.parametrize("data", [SMALL, LARGE], ids=["small", "large"])
+@pytest.mark.parametrize("attr_types", [None, ["a"], ()], ids=["all-attrs", "one-attr", "no-attrs"])
+def test_copy(benchmark, fs, data, attr_types):
+    fs.write_bytes("/file", data)
+    benchmark(fs.copy, "/file", "/copy", attr_types)
+
+
+@pytest.mark.parametrize("data", [SMALL, LARGE], ids=["small", "large"])
+def test_copy_round_trip(benchmark, fs, data):
+    # Baseline for test_copy: the same copy through file objects
+    fs.write_bytes("/file", data)
+
+    def copy():
+        with fs.open("/file", "rb") as src, fs.open("/copy", "wb") as dst:
+            dst.write(src.read())
+
+    benchmark(copy)
+
+
+def test_copytree(benchmark, fs, make_tree):
+    fs.mkdir("/tree")
+    make_tree(fs, 4, 2, prefix="/tree")
+
+    def setup():
+        if fs.exists("/copy"):
+            fs.remove("/copy", recursive=True)
+
+    benchmark.pedantic(fs.copytree, args=("/tree", "/copy", ()), setup=setup, rounds=10)
+
+
+def _remove_log(fs):
+    def setup():
+        if fs.exists("/log"):
+            fs.remove("/log")
+
+    return setup
+
+
+def test_append_flush_per_record(benchmark, fs):
+    def append():
+        with fs.open("/log", "wb", buffering=0) as fh:
+            for i in range(100):
+                fh.write(SMALL)
+                fh.flush()
+
+    benchmark.pedantic(append, setup=_remove_log(fs), rounds=20)
+
+
+@pytest.mark.parametrize("max_records", [10, 100])
+def test_append_log(benchmark, fs, max_records):
+    def append():
+        with fs.append_log("/log", max_records=max_records) as log:
+            for i in range(100):
+                log.append(SMALL)
+
+    benchmark.pedantic(append, setup=_remove_log(fs), rounds=20)
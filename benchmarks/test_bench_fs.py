@@ -0,0 +1,79 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from littlefs.cache import MetadataCache
+
+
+def test_format(benchmark, fs_factory):
+    fs = fs_factory(mount=False)
+    benchmark(fs.format)
+
+
+def test_mount(benchmark, fs, make_tree):
+    make_tree(fs, 8, 2)
+    fs.unmount()
+
+    def mount():
+        fs.mount()
+        fs.unmount()
+
+    benchmark(mount)
+
+
+@pytest.mark.parametrize("width, depth", [(200, 1), (3, 5)], ids=["wide", "deep"])
+def test_scandir(benchmark, fs, make_tree, width, depth):
+    make_tree(fs, width, depth)
+    benchmark(lambda: list(fs.scandir("/")))
+
+
+@pytest.mark.parametrize("width, depth", [(200, 1), (3, 5)], ids=["wide", "deep"])
+def test_walk(benchmark, fs, make_tree, width, depth):
+    make_tree(fs, width, depth)
+    benchmark(lambda: list(fs.walk("/")))
+
+
+def test_du(benchmark, fs, make_tree):
+    make_tree(fs, 3, 4)
+    benchmark(lambda: list(fs.du("/")))
+
+
+@pytest.mark.parametrize("pattern", ["/dir0/dir1/*", "/**/file0", "/dir*/dir1/file*"])
+def test_glob(benchmark, fs, make_tree, pattern):
+    make_tree(fs, 3, 5)
+    benchmark(lambda: fs.glob(pattern))
+
+
+def test_remove_recursive(benchmark, fs, make_tree):
+    def setup():
+        fs.mkdir("/tree")
+        make_tree(fs, 4, 3, prefix="/tree")
+
+    benchmark.pedantic(fs.remove, args=("/tree",), kwargs={"recursive": True}, setup=setup, rounds=10)
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["uncached", "cached"])
+def test_stat(benchmark, fs, make_tree, cached):
+    make_tree(fs, 20, 1)
+    if cached:
+        fs.metadata_cache = MetadataCache(64)
+    benchmark(fs.stat, "/file10")
+
+
+def test_walk_cached(benchmark, fs, make_tree):
+    make_tree(fs, 3, 5)
+    fs.metadata_cache = MetadataCache(1024)
+    benchmark(lambda: list(fs.walk("/")))
+
+
+def test_attrs(benchmark, fs):
+    with fs.open("/file", "wb") as fh:
+        fh.write(b"data")
+
+    def attrs():
+        for typ in range(8):
+            fs.setattr("/file", typ, b"value")
+        for typ in range(8):
+            fs.getattr("/file", typ)
+
+    benchmark(attrs)
@@ -1,6 +1,32 @@
+import fnmatch
+import functools
 import io
+import locale
+import os
+import posixpath
+import re
+import shutil
+import tarfile
 import warnings
-from typing import TYPE_CHECKING, List, Tuple, Iterator, IO, Union, Optional
+import zipfile
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    NoReturn,
+    Set,
+    Tuple,
+    Iterator,
+    IO,
+    Union,
+    Optional,
+    overload,
+)
 
 try:
     from importlib_metadata import version, PackageNotFoundError
@@ -16,25 +42,33 @@ from .lfs import (
     LFSFilesystem,
     LFSFile,
     LFSDirectory,
+    LFSDirEntry,
     LFSFileFlag,
+    LFSPath,
     LFSStat,
     LFSFSStat,
 )
 from .errors import LittleFSError
 
 __all__ = [
+    "DiskUsage",
     "FileHandle",
     "LFSConfig",
+    "LFSDirEntry",
     "LFSDirectory",
     "LFSFSStat",
     "LFSFile",
     "LFSFileFlag",
     "LFSFilesystem",
+    "LFSPath",
     "LFSStat",
     "LittleFS",
     "LittleFSError",
+    "Snapshot",
     "UserContext",
+    "UserContextCompressed",
     "UserContextFile",
+    "UserContextOverlay",
     "UserContextWinDisk",
     "__LFS_DISK_VERSION__",
     "__LFS_VERSION__",
@@ -49,11 +83,19 @@ except PackageNotFoundError:
     # Package not installed
     pass
 
-from .context import UserContext, UserContextFile, UserContextWinDisk
+from .context import UserContext, UserContextCompressed, UserContextFile, UserContextOverlay, UserContextWinDisk
+from .cache import MISSING, MetadataCache
+from .profiling import Profiler
+from .appendlog import AppendLog
 
 if TYPE_CHECKING:
     from .lfs import LFSStat
 
+PathType = Union[str, bytes, LFSPath]
+
+_GLOB_RECURSIVE = object()
+_GLOB_MAGIC = re.compile("[*?[]")
+
 
 class LittleFS:
     """Littlefs file system"""
@@ -63,6 +105,7 @@ class LittleFS:
         context: Optional["UserContext"] = None,
         mount=True,
         filename_encoding: Optional[str] = None,
+        metadata_cache: int = 0,
         **kwargs,
     ) -> None:
         """
@@ -79,10 +122,18 @@ class LittleFS:
             bytes*, not characters. With a multi-byte encoding such as UTF-8, a
             single non-ASCII character consumes 2-4 bytes, so a name can exceed
             ``name_max`` (default 255) well before it looks long.
+        metadata_cache : int
+            Maximum number of stat results, directory listings and attributes
+            kept in a :class:`~littlefs.cache.MetadataCache`. Disabled by
+            default. See :mod:`littlefs.cache` for when the cache is
+            invalidated.
         """
         self.filename_encoding = filename_encoding or lfs.FILENAME_ENCODING
+        self.metadata_cache = MetadataCache(metadata_cache) if metadata_cache else None
         self.cfg = lfs.LFSConfig(context=context, **kwargs)
         self.fs = lfs.LFSFilesystem()
+        # Snapshot the dirty block tracking of ``cfg`` is relative to
+        self._snapshot_base: Optional[Snapshot] = None
 
         if mount:
             try:
@@ -99,6 +150,186 @@ class LittleFS:
     def used_block_count(self) -> int:
         return lfs.fs_size(self.fs)
 
+    def block_map(self) -> bytes:
+        """Get a bitmap of the blocks in use
+
+        Block ``n`` is in use if bit ``n % 8`` of byte ``n // 8`` is set. The
+        bitmap is built in a single traversal of the filesystem. littlefs does
+        not report whether a block holds metadata or file data, so the bitmap
+        does not distinguish them.
+        """
+        return lfs.fs_block_map(self.fs)
+
+    def trim(self) -> int:
+        """Erase all blocks which are not in use
+
+        Blocks freed by littlefs keep their old content until they are
+        reused. Erasing them removes stale data from the image, which makes
+        exported images compress much better. All unused blocks are erased
+        through the context in a single pass over :meth:`block_map`,
+        followed by one :meth:`UserContext.sync`.
+
+        Returns the number of erased blocks.
+        """
+        block_map = self.block_map()
+        erase = self.context.erase
+        mark_dirty = self.cfg.mark_dirty
+        erased = 0
+        for index, bits in enumerate(block_map):
+            if bits == 0xFF:
+                continue
+            first = index * 8
+            for block in range(first, min(first + 8, self.block_count)):
+                if not bits & (1 << (block - first)):
+                    # Erased behind littlefs' back, :meth:`restore` has to know
+                    mark_dirty(block)
+                    _raise_on_context_error(erase(self.cfg, block))
+                    erased += 1
+        _raise_on_context_error(self.context.sync(self.cfg))
+        return erased
+
+    def snapshot(self) -> "Snapshot":
+        """Capture the state of the block device
+
+        The filesystem must be mounted. From now on the blocks modified by
+        littlefs are tracked, so that :meth:`restore` only has to write
+        back the blocks which changed since the snapshot was taken.
+        """
+        block_size = self.cfg.block_size
+        block_count = self.block_count
+        if type(self.context) is UserContext:
+            data = bytes(self.context.buffer[: block_size * block_count])
+        else:
+            data = b"".join(bytes(self.context.read(self.cfg, block, 0, block_size)) for block in range(block_count))
+        snapshot = Snapshot(block_size, block_count, data)
+        self.cfg.reset_dirty_blocks(block_count)
+        self._snapshot_base = snapshot
+        return snapshot
+
+    def restore(self, snapshot: "Snapshot") -> int:
+        """Restore the block device to the state captured by :meth:`snapshot`
+
+        Only blocks modified since the most recent :meth:`snapshot` or
+        :meth:`restore` (and blocks which differ between that state and
+        ``snapshot``) are written back. The filesystem is remounted
+        afterwards, all open files become invalid.
+
+        Returns the number of restored blocks.
+        """
+        block_size = self.cfg.block_size
+        if (snapshot.block_size, snapshot.block_count) != (block_size, self.block_count):
+            raise ValueError("Snapshot does not match the filesystem geometry")
+
+        dirty = self.cfg.dirty_blocks()
+        base = self._snapshot_base
+        if dirty is None or base is None:
+            blocks = list(range(snapshot.block_count))
+        else:
+            blocks = [n for n in range(snapshot.block_count) if dirty[n // 8] & (1 << (n % 8))]
+            if base is not snapshot:
+                old, new = memoryview(base.data), memoryview(snapshot.data)
+                changed = set(blocks)
+                for n in range(snapshot.block_count):
+                    start = n * block_size
+                    if n not in changed and old[start : start + block_size] != new[start : start + block_size]:
+                        blocks.append(n)
+
+        self.unmount()
+        data = memoryview(snapshot.data)
+        if type(self.context) is UserContext:
+            buffer = self.context.buffer
+            for n in blocks:
+                start = n * block_size
+                buffer[start : start + block_size] = data[start : start + block_size]
+        else:
+            for n in blocks:
+                start = n * block_size
+                _raise_on_context_error(self.context.erase(self.cfg, n))
+                _raise_on_context_error(self.context.prog(self.cfg, n, 0, bytes(data[start : start + block_size])))
+            _raise_on_context_error(self.context.sync(self.cfg))
+        self.mount()
+
+        self.cfg.reset_dirty_blocks(snapshot.block_count)
+        self._snapshot_base = snapshot
+        return len(blocks)
+
+    def encode_path(self, path: PathType) -> LFSPath:
+        """Encode a path once for repeated use
+
+        Returns a :class:`~littlefs.lfs.LFSPath` holding ``path`` encoded with
+        the filename encoding of the filesystem. It is accepted by all methods
+        instead of a ``str`` path and skips the encoding on every call::
+
+            path = fs.encode_path("data/log.bin")
+            for _ in range(1000):
+                size = fs.stat(path).size
+        """
+        return LFSPath(path, self.filename_encoding)
+
+    def _cache_path(self, path: PathType) -> bytes:
+        """Normalized, encoded absolute path used by the metadata cache"""
+        if isinstance(path, LFSPath):
+            encoded = path.encoded
+        elif isinstance(path, bytes):
+            encoded = path
+        else:
+            encoded = path.encode(self.filename_encoding)
+        return posixpath.normpath(b"/" + encoded.lstrip(b"/"))
+
+    def _cache_discard_attrs(self, path: PathType, types: Iterable[int]) -> None:
+        if self.metadata_cache is not None:
+            cache_path = self._cache_path(path)
+            for typ in types:
+                self.metadata_cache.discard(("attr", cache_path, typ))
+
+    def _path_str(self, path: PathType) -> str:
+        """``path`` as ``str`` for messages"""
+        if isinstance(path, bytes):
+            return path.decode(self.filename_encoding, "backslashreplace")
+        return str(path)
+
+    def append_log(
+        self,
+        path: PathType,
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_delay: Optional[float] = None,
+    ) -> AppendLog:
+        """Open a log which appends records to a file with group commits
+
+        Returns an :class:`~littlefs.appendlog.AppendLog` which keeps the
+        appended records in memory and writes and syncs them together when
+        ``max_records`` records or ``max_bytes`` bytes are pending, or the
+        oldest pending record is ``max_delay`` seconds old::
+
+            with fs.append_log("events.bin", max_records=32, max_delay=0.5) as log:
+                log.append(b"record")
+
+        See :mod:`littlefs.appendlog` for details.
+        """
+        try:
+            log = AppendLog(self, path, max_records, max_bytes, max_delay)
+        except LittleFSError as e:
+            _raise_open_error(e)
+        if self.metadata_cache is not None:
+            self.metadata_cache.changed(self._cache_path(path))
+        return log
+
+    def profile(self) -> Profiler:
+        """Profile the operations on the filesystem
+
+        Returns a :class:`~littlefs.profiling.Profiler` to be used as context
+        manager. While active, the wall time and call count of the filesystem
+        and file operations, the block device callbacks and the context
+        methods are recorded::
+
+            with fs.profile() as profiler:
+                fs.makedirs("a/b/c")
+
+            print(profiler.summary())
+        """
+        return Profiler(self)
+
     @property
     def context(self) -> "UserContext":
         """User context of the file system"""
@@ -106,6 +337,8 @@ class LittleFS:
 
     def format(self) -> int:
         """Format the underlying buffer"""
+        if self.metadata_cache is not None:
+            self.metadata_cache.clear()
         if self.cfg.block_count == 0:
             # ``lfs.format`` looks at cfg's block_count.
             # Cannot autodetect size when formatting.
@@ -114,10 +347,14 @@ class LittleFS:
 
     def mount(self) -> int:
         """Mount the underlying buffer"""
+        if self.metadata_cache is not None:
+            self.metadata_cache.clear()
         return lfs.mount(self.fs, self.cfg)
 
     def unmount(self) -> int:
         """Unmount the underlying buffer"""
+        if self.metadata_cache is not None:
+            self.metadata_cache.clear()
         return lfs.unmount(self.fs)
 
     def fs_mkconsistent(self) -> int:
@@ -144,7 +381,15 @@ class LittleFS:
         return lfs.fs_gc(self.fs)
 
     def open(
-        self, fname: str, mode="r", buffering: int = -1, encoding: str = None, errors: str = None, newline: str = None
+        self,
+        fname: PathType,
+        mode="r",
+        buffering: int = -1,
+        encoding: str = None,
+        errors: str = None,
+        newline: str = None,
+        attrs: Optional[Mapping[Union[str, bytes, int], Union[bytes, bytearray]]] = None,
+        buffer: Optional[bytearray] = None,
     ) -> IO:
         """Open a file.
 
@@ -156,7 +401,7 @@ class LittleFS:
 
         Parameters
         ----------
-        fname : str
+        fname : str, bytes or LFSPath
             The path to the file to open.
         mode : str
             Specifies the mode in which the file is opened.
@@ -169,6 +414,17 @@ class LittleFS:
             Specifies how encoding and decoding errors are to be handled. (text mode only)
         newline : str
             Controls how universal newlines mode works. (text mode only)
+        attrs : Mapping
+            Custom attributes bound to the file, mapping attribute types to
+            buffers. When writing, the attributes are committed atomically
+            together with the file data when the file is closed, instead of
+            requiring an additional commit per :meth:`setattr`. When reading,
+            the stored attributes are read into the given ``bytearray``
+            buffers. See :func:`littlefs.lfs.file_open_cfg`.
+        buffer : bytearray
+            File cache buffer of at least ``cache_size`` bytes, reused
+            instead of allocating a new cache on every open. The buffer must
+            not be used by another open file at the same time.
         """
 
         # Parse mode
@@ -226,19 +482,19 @@ class LittleFS:
                 buffering = -1
 
         try:
-            fh = lfs.file_open(self.fs, fname, mode, self.filename_encoding)
-        except LittleFSError as e:
-            # Try to map to standard Python exceptions
-            if e.code == LittleFSError.Error.LFS_ERR_NOENT:
-                raise FileNotFoundError from e
-            elif e.code == LittleFSError.Error.LFS_ERR_ISDIR:
-                raise IsADirectoryError from e
-            elif e.code == LittleFSError.Error.LFS_ERR_EXIST:
-                raise FileExistsError from e
+            if attrs is None and buffer is None:
+                fh = lfs.file_open(self.fs, fname, mode, self.filename_encoding)
             else:
-                raise e
+                values = None if attrs is None else {_typ_to_uint8(typ): data for typ, data in attrs.items()}
+                fh = lfs.file_open_cfg(self.fs, fname, mode, values, buffer, self.filename_encoding)
+        except LittleFSError as e:
+            _raise_open_error(e)
 
         raw = FileHandle(self.fs, fh)
+        if self.metadata_cache is not None and (creating or writing or appending or updating):
+            cache_path = self._cache_path(fname)
+            self.metadata_cache.changed(cache_path)
+            raw._on_change = functools.partial(self.metadata_cache.changed, cache_path)
 
         line_buffering = False
 
@@ -271,55 +527,259 @@ class LittleFS:
 
         return wrapped
 
+    def read_bytes(self, path: PathType) -> bytes:
+        """Read the content of a file
+
+        The file is opened, read and closed in a single call into the binding,
+        without the file objects created by :meth:`open`.
+        """
+        try:
+            return lfs.file_read_all(self.fs, path, self.filename_encoding)
+        except LittleFSError as e:
+            _raise_open_error(e)
+
+    def write_bytes(self, path: PathType, data: Union[bytes, bytearray, memoryview], append: bool = False) -> int:
+        """Write ``data`` to a file
+
+        The file is created or, unless ``append`` is set, truncated. It is
+        opened, written and closed in a single call into the binding. Returns
+        the number of bytes written.
+        """
+        try:
+            return lfs.file_write_all(self.fs, path, data, append, self.filename_encoding)
+        except LittleFSError as e:
+            _raise_open_error(e)
+        finally:
+            if self.metadata_cache is not None:
+                self.metadata_cache.changed(self._cache_path(path))
+
+    def read_text(self, path: PathType, encoding: Optional[str] = None, errors: Optional[str] = None) -> str:
+        """Read the content of a file as text
+
+        Works like :meth:`read_bytes`. The content is decoded and newlines are
+        translated as done by :meth:`open` in text mode.
+        """
+        text = self.read_bytes(path).decode(encoding or locale.getpreferredencoding(False), errors or "strict")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def write_text(
+        self,
+        path: PathType,
+        data: str,
+        encoding: Optional[str] = None,
+        errors: Optional[str] = None,
+        newline: Optional[str] = None,
+        append: bool = False,
+    ) -> int:
+        """Write ``data`` to a file as text
+
+        Works like :meth:`write_bytes`. Newlines are translated and the text is
+        encoded as done by :meth:`open` in text mode. Returns the number of
+        bytes written.
+        """
+        if newline is None:
+            newline = os.linesep
+        if newline not in ("", "\n"):
+            data = data.replace("\n", newline)
+        return self.write_bytes(
+            path, data.encode(encoding or locale.getpreferredencoding(False), errors or "strict"), append
+        )
+
+    def copy(self, src: PathType, dst: PathType, attr_types: Optional[Iterable[Union[str, bytes, int]]] = None) -> int:
+        """Copy a file within the filesystem
+
+        The data is copied in ``block_size`` chunks through a single buffer
+        inside the binding, without reading the whole file or creating file
+        objects. ``dst`` is created or truncated.
+
+        Custom attributes are copied as well and written together with the
+        data. littlefs cannot enumerate the attributes of a file, so all 256
+        types are looked up inside the binding by default; pass the types in
+        use as ``attr_types`` to save the lookups, or an empty iterable to
+        skip the attributes. Attributes of an existing ``dst`` which are not
+        set on ``src`` are kept.
+
+        Returns the number of bytes copied.
+        """
+        return self._copy(src, dst, _attr_types(attr_types), bytearray(self.cfg.block_size))
+
+    def copytree(
+        self,
+        src: PathType,
+        dst: PathType,
+        attr_types: Optional[Iterable[Union[str, bytes, int]]] = None,
+        dirs_exist_ok: bool = False,
+    ) -> int:
+        """Recursively copy a directory tree within the filesystem
+
+        Works like :meth:`copy` for every file below ``src``, all files are
+        copied through the same buffer. The custom attributes of the
+        directories are copied too. ``dst`` must not exist unless
+        ``dirs_exist_ok`` is set.
+
+        Returns the number of copied files.
+        """
+        src = _path_value(src)
+        dst = _path_value(dst)
+        src_key = self._cache_path(src)
+        dst_key = self._cache_path(dst)
+        if dst_key == src_key or dst_key.startswith(src_key.rstrip(b"/") + b"/"):
+            raise ValueError(f"Cannot copy '{self._path_str(src)}' into itself")
+        types = _attr_types(attr_types)
+        buffer = bytearray(self.cfg.block_size)
+        try:
+            return self._copytree(src, dst, types, buffer, dirs_exist_ok)
+        finally:
+            if self.metadata_cache is not None:
+                self.metadata_cache.changed(dst_key, subtree=True)
+
+    def _copy(self, src: PathType, dst: PathType, types: Optional[List[int]], buffer: bytearray) -> int:
+        if self._cache_path(src) == self._cache_path(dst):
+            raise shutil.SameFileError(f"'{self._path_str(src)}' and '{self._path_str(dst)}' are the same file")
+        try:
+            return lfs.file_copy(self.fs, src, dst, buffer, types, self.filename_encoding)
+        except LittleFSError as e:
+            _raise_open_error(e)
+        finally:
+            if self.metadata_cache is not None:
+                self.metadata_cache.changed(self._cache_path(dst))
+
+    def _copytree(
+        self,
+        src: Union[str, bytes],
+        dst: Union[str, bytes],
+        types: Optional[List[int]],
+        buffer: bytearray,
+        exist_ok: bool,
+    ) -> int:
+        entries = list(self.scandir(src))
+        try:
+            self.mkdir(dst)
+        except FileExistsError:
+            if not exist_ok or not self.isdir(dst):
+                raise
+        values = lfs.getattrs(self.fs, src, types, self.filename_encoding)
+        if values:
+            lfs.setattrs(self.fs, dst, values, self.filename_encoding)
+
+        count = 0
+        for elem in entries:
+            if elem.is_dir():
+                count += self._copytree(_join(src, elem.name), _join(dst, elem.name), types, buffer, exist_ok)
+            else:
+                self._copy(_join(src, elem.name), _join(dst, elem.name), types, buffer)
+                count += 1
+        return count
+
     def getattr(self, path: str, typ: Union[str, bytes, int]) -> bytes:
         typ = _typ_to_uint8(typ)
-        return lfs.getattr(self.fs, path, typ, self.filename_encoding)
+        if self.metadata_cache is None:
+            return lfs.getattr(self.fs, path, typ, self.filename_encoding)
+        key = ("attr", self._cache_path(path), typ)
+        value = self.metadata_cache.get(key)
+        if value is MISSING:
+            value = lfs.getattr(self.fs, path, typ, self.filename_encoding)
+            self.metadata_cache.put(key, value)
+        return value
 
     def setattr(self, path: str, typ: Union[str, bytes, int], data: bytes) -> None:
         typ = _typ_to_uint8(typ)
+        self._cache_discard_attrs(path, [typ])
         lfs.setattr(self.fs, path, typ, data, self.filename_encoding)
 
+    def getattrs(self, path: str, types: Iterable[Union[str, bytes, int]]) -> Dict[Union[str, bytes, int], bytes]:
+        """Get several custom attributes at once
+
+        Returns a dict mapping each of the requested ``types`` to its value.
+        Attributes which are not set are left out.
+        """
+        keys = {_typ_to_uint8(typ): typ for typ in types}
+        values = lfs.getattrs(self.fs, path, keys, self.filename_encoding)
+        return {keys[typ]: value for typ, value in values.items()}
+
+    def setattrs(self, path: str, attrs: Mapping[Union[str, bytes, int], bytes]) -> None:
+        """Set several custom attributes at once
+
+        ``attrs`` maps attribute types to their values.
+        """
+        values = {_typ_to_uint8(typ): data for typ, data in attrs.items()}
+        self._cache_discard_attrs(path, values)
+        lfs.setattrs(self.fs, path, values, self.filename_encoding)
+
     def removeattr(self, path: str, typ: Union[str, bytes, int]) -> None:
         typ = _typ_to_uint8(typ)
+        self._cache_discard_attrs(path, [typ])
         lfs.removeattr(self.fs, path, typ, self.filename_encoding)
 
     def listdir(self, path=".") -> List[str]:
         """List directory content
 
-        List the content of a directory. This function uses :meth:`scandir`
-        internally. Using :meth:`scandir` might be better if you are
-        searching for a specific file or need access to the :class:`littlefs.lfs.LFSStat`
+        List the content of a directory. Using :meth:`scandir` might be
+        better if you are searching for a specific file or need access to the :class:`littlefs.lfs.LFSDirEntry`
         of the files.
         """
-        return [st.name for st in self.scandir(path)]
+        if self.metadata_cache is not None:
+            return [entry.name for entry in self.scandir(path)]
+        dh = lfs.dir_open(self.fs, path, self.filename_encoding)
+        try:
+            return [entry.name for entry in dh]
+        finally:
+            lfs.dir_close(self.fs, dh)
 
-    def mkdir(self, path: str) -> int:
+    def mkdir(self, path: PathType) -> int:
         """Create a new directory"""
         try:
-            return lfs.mkdir(self.fs, path, self.filename_encoding)
+            ret = lfs.mkdir(self.fs, path, self.filename_encoding)
+            if self.metadata_cache is not None:
+                self.metadata_cache.changed(self._cache_path(path))
+            return ret
         except errors.LittleFSError as e:
             if e.code == LittleFSError.Error.LFS_ERR_EXIST:
                 msg = "[LittleFSError {:d}] Cannot create a file when that file already exists: '{:s}'.".format(
-                    e.code, path
+                    e.code, self._path_str(path)
                 )
                 raise FileExistsError(msg) from e
             raise
 
-    def makedirs(self, name: str, exist_ok=False):
+    def makedirs(self, name: PathType, exist_ok=False):
         """Recursive directory creation function."""
-        parts = [p for p in name.split("/") if p]
-        current_name = ""
-        for nr, part in enumerate(parts):
-            current_name += "/%s" % part
-            try:
-                self.mkdir(current_name)
-            except FileExistsError as e:
-                is_last = nr == len(parts) - 1
-                if (not is_last) or (is_last and exist_ok):
-                    continue
-                raise e
+        self.makedirs_many([name], exist_ok)
+
+    def makedirs_many(self, paths: Iterable[PathType], exist_ok=True) -> int:
+        """Create several directories including their missing parents
 
-    def remove(self, path: str, recursive: bool = False) -> None:
+        The directories known to exist are remembered across ``paths``, so
+        common parents are only created or looked up once. Every missing
+        directory takes a single littlefs call. Pass parents before their
+        children to benefit from this.
+
+        Returns the number of created directories.
+        """
+        known: Set[bytes] = set()
+        return sum(self._makedirs(path, known, exist_ok) for path in paths)
+
+    def _makedirs(self, path: PathType, known: Set[bytes], exist_ok: bool) -> int:
+        """Create a directory and its parents, skipping the ``known`` prefixes"""
+        try:
+            created = lfs.makedirs(self.fs, path, known, exist_ok, self.filename_encoding)
+        except errors.LittleFSError as e:
+            if e.code == LittleFSError.Error.LFS_ERR_EXIST:
+                msg = "[LittleFSError {:d}] Cannot create a file when that file already exists: '{:s}'.".format(
+                    e.code, self._path_str(path)
+                )
+                raise FileExistsError(msg) from e
+            if e.code == LittleFSError.Error.LFS_ERR_NOTDIR:
+                msg = "[LittleFSError {:d}] Not a directory: '{:s}'.".format(e.code, self._path_str(path))
+                raise NotADirectoryError(msg) from e
+            raise
+        if self.metadata_cache is not None:
+            for created_path in created:
+                self.metadata_cache.changed(self._cache_path(created_path))
+        return len(created)
+
+    def remove(self, path: PathType, recursive: bool = False) -> None:
         """Remove a file or directory
 
         If the path to remove is a directory, the directory must be empty.
@@ -332,22 +792,31 @@ class LittleFS:
             If ``true`` and ``path`` is a directory, recursively remove all children files/folders.
         """
         try:
-            lfs.remove(self.fs, path, self.filename_encoding)
-            return
-        except errors.LittleFSError as e:
-            if e.code == LittleFSError.Error.LFS_ERR_NOENT:
-                msg = "[LittleFSError {:d}] No such file or directory: '{:s}'.".format(e.code, path)
-                raise FileNotFoundError(msg) from e
-            elif e.code == LittleFSError.Error.LFS_ERR_NOTEMPTY and recursive:
-                # We want to recursively delete the ``path`` directory.
-                # Handled below to reduce amount of logic in ``except`` handler.
-                pass
-            else:
+            if recursive:
+                st = self.try_stat(path)
+                if st is not None and st.type == LFSStat.TYPE_DIR:
+                    self._remove_tree(_path_value(path))
+                    return
+
+            try:
+                lfs.remove(self.fs, path, self.filename_encoding)
+            except errors.LittleFSError as e:
+                if e.code == LittleFSError.Error.LFS_ERR_NOENT:
+                    msg = "[LittleFSError {:d}] No such file or directory: '{:s}'.".format(e.code, self._path_str(path))
+                    raise FileNotFoundError(msg) from e
                 raise e
+        finally:
+            if self.metadata_cache is not None:
+                self.metadata_cache.changed(self._cache_path(path), subtree=True)
 
-        # Recursively delete the ``path`` directory
+    def _remove_tree(self, path: Union[str, bytes]) -> None:
+        """Remove the directory ``path`` and all its content"""
         for elem in self.scandir(path):
-            self.remove(path + "/" + elem.name, recursive=True)
+            child = _join(path, elem.name)
+            if elem.is_dir():
+                self._remove_tree(child)
+            else:
+                lfs.remove(self.fs, child, self.filename_encoding)
         lfs.remove(self.fs, path, self.filename_encoding)
 
     def removedirs(self, name):
@@ -358,54 +827,120 @@ class LittleFS:
         function tries to recursively remove all parent directories
         which are also empty.
         """
-        parts = name.split("/")
+        name = _path_value(name)
+        sep = _sep(name)
+        parts = name.split(sep)
         while parts:
             try:
-                name = "/".join(parts)
+                name = sep.join(parts)
                 if not name:
                     break
-                self.remove("/".join(parts))
+                self.remove(name)
             except errors.LittleFSError as e:
                 if e.code == LittleFSError.Error.LFS_ERR_NOTEMPTY:
                     break
                 raise e
             parts.pop()
 
-    def rename(self, src: str, dst: str) -> int:
+    def rename(self, src: PathType, dst: PathType) -> int:
         """Rename a file or directory"""
-        return lfs.rename(self.fs, src, dst, self.filename_encoding)
+        try:
+            return lfs.rename(self.fs, src, dst, self.filename_encoding)
+        finally:
+            if self.metadata_cache is not None:
+                self.metadata_cache.changed(self._cache_path(src), subtree=True)
+                self.metadata_cache.changed(self._cache_path(dst), subtree=True)
 
-    def rmdir(self, path: str) -> int:
+    def rmdir(self, path: PathType) -> int:
         """Remove a directory
 
         This function is an alias for :func:`remove`
         """
         return self.remove(path)
 
-    def scandir(self, path=".") -> Iterator["LFSStat"]:
-        """List directory content"""
+    def scandir(self, path: PathType = ".") -> Iterator["LFSDirEntry"]:
+        """List directory content
+
+        Yields a :class:`~littlefs.lfs.LFSDirEntry` per entry. The names are
+        ``bytes`` if ``path`` is ``bytes``.
+        """
+        if self.metadata_cache is not None:
+            key = ("dir", self._cache_path(path), isinstance(_path_value(path), bytes))
+            entries = self.metadata_cache.get(key)
+            if entries is MISSING:
+                dh = lfs.dir_open(self.fs, path, self.filename_encoding)
+                try:
+                    entries = tuple(dh)
+                finally:
+                    lfs.dir_close(self.fs, dh)
+                self.metadata_cache.put(key, entries)
+            yield from entries
+            return
+
         dh = lfs.dir_open(self.fs, path, self.filename_encoding)
         try:
-            info = lfs.dir_read(self.fs, dh, self.filename_encoding)
-            while info:
-                if info.name not in [".", ".."]:
-                    yield info
-                info = lfs.dir_read(self.fs, dh, self.filename_encoding)
+            yield from dh
         finally:
             lfs.dir_close(self.fs, dh)
 
-    def stat(self, path: str) -> "LFSStat":
+    def stat(self, path: PathType) -> "LFSStat":
         """Get the status of a file or directory"""
+        if self.metadata_cache is not None:
+            st = self.try_stat(path)
+            if st is not None:
+                return st
+        # Raises the error of the failed lookup
         return lfs.stat(self.fs, path, self.filename_encoding)
 
-    def unlink(self, path: str) -> int:
+    def try_stat(self, path: PathType) -> Optional["LFSStat"]:
+        """Get the status of a file or directory, ``None`` if it does not exist
+
+        Unlike :meth:`stat`, no exception is raised if the path does not exist
+        or one of its parents is not a directory.
+        """
+        if self.metadata_cache is None:
+            return lfs.try_stat(self.fs, path, self.filename_encoding)
+        key = ("stat", self._cache_path(path), isinstance(_path_value(path), bytes))
+        st = self.metadata_cache.get(key)
+        if st is MISSING:
+            st = lfs.try_stat(self.fs, path, self.filename_encoding)
+            self.metadata_cache.put(key, st)
+        return st
+
+    def exists(self, path: PathType) -> bool:
+        """Return ``True`` if ``path`` refers to an existing file or directory"""
+        return self.try_stat(path) is not None
+
+    def isfile(self, path: PathType) -> bool:
+        """Return ``True`` if ``path`` is an existing regular file"""
+        st = self.try_stat(path)
+        return st is not None and st.type == LFSStat.TYPE_REG
+
+    def isdir(self, path: PathType) -> bool:
+        """Return ``True`` if ``path`` is an existing directory"""
+        st = self.try_stat(path)
+        return st is not None and st.type == LFSStat.TYPE_DIR
+
+    def unlink(self, path: PathType) -> int:
         """Remove a file or directory
 
         This function is an alias for :func:`remove`.
         """
         return self.remove(path)
 
+    @overload
     def walk(self, top: str) -> Iterator[Tuple[str, List[str], List[str]]]:
+        ...
+
+    @overload
+    def walk(self, top: bytes) -> Iterator[Tuple[bytes, List[bytes], List[bytes]]]:
+        ...
+
+    @overload
+    def walk(self, top: PathType) -> Iterator[Tuple[Union[str, bytes], List[Any], List[Any]]]:
+        ...
+
+    def walk(self, top: PathType) -> Iterator[Tuple[Union[str, bytes], List[Any], List[Any]]]:
         """Generate the file names in a directory tree
 
         Generate the file and directory names in a directory tree by
@@ -417,18 +952,365 @@ class LittleFS:
         - The root of the currently processed element
         - A list of directories located in the root
         - A list of filenames located in the root
+
+        The names are ``bytes`` if ``top`` is ``bytes``.
         """
+        top = _path_value(top)
         files, dirs = [], []
         for elem in self.scandir(top):
-            if elem.type == 1:
+            if elem.is_file():
                 files.append(elem.name)
-            elif elem.type == 2:
+            elif elem.is_dir():
                 dirs.append(elem.name)
 
         yield top, dirs, files
         for dirname in dirs:
-            newtop = "/".join((top, dirname)).replace("//", "/")
-            yield from self.walk(newtop)
+            yield from self.walk(_join(top, dirname))
+
+    def walkattrs(
+        self, top: str, types: Iterable[Union[str, bytes, int]]
+    ) -> Iterator[Tuple[str, List[str], List[str], Dict[str, Dict[Union[str, bytes, int], bytes]]]]:
+        """Generate the file names in a directory tree together with their attributes
+
+        Works like :meth:`walk`, but each tuple has a fourth element mapping
+        the names of the directories and files in the root to the custom
+        attributes of the requested ``types`` (see :meth:`getattrs`).
+        """
+        keys = {_typ_to_uint8(typ): typ for typ in types}
+        for root, dirs, files in self.walk(top):
+            attrs = {}
+            for name in dirs + files:
+                values = lfs.getattrs(self.fs, _join(root, name), keys, self.filename_encoding)
+                attrs[name] = {keys[typ]: value for typ, value in values.items()}
+            yield root, dirs, files, attrs
+
+    def du(self, top: PathType = "/") -> Iterator["DiskUsage"]:
+        """Generate the disk usage of a directory tree
+
+        Walks the tree in a single pass, reading every directory once, and
+        yields a :class:`DiskUsage` per directory bottom-up: the directories
+        below a directory are yielded before it and the last record covers
+        ``top`` itself. Only the names of the subdirectories of the
+        directories being walked are kept in memory, so the records can be
+        aggregated in a streaming fashion, e.g. the ten largest directories::
+
+            heapq.nlargest(10, fs.du(), key=operator.attrgetter("blocks"))
+
+        The block usage is an estimate: files up to ``inline_max`` bytes are
+        stored in the metadata of their directory and use no blocks, larger
+        files use the blocks of their CTZ skip-list and every directory uses
+        one metadata pair. If ``top`` is a file, a single record for the file
+        is yielded.
+        """
+        top = _path_value(top)
+        block_size, inline_max = self.cfg.block_size, self.fs.inline_max
+        st = self.stat(top)
+        if st.type != LFSStat.TYPE_DIR:
+            yield DiskUsage(top, st.size, _file_blocks(st.size, block_size, inline_max), 1, 0)
+            return
+        yield from self._du(top, block_size, inline_max)
+
+    def _du(self, top: Union[str, bytes], block_size: int, inline_max: int) -> Iterator["DiskUsage"]:
+        size = blocks = files = dirs = 0
+        subdirs = []
+        for elem in self.scandir(top):
+            if elem.is_dir():
+                subdirs.append(elem.name)
+            else:
+                size += elem.size
+                blocks += _file_blocks(elem.size, block_size, inline_max)
+                files += 1
+
+        for name in subdirs:
+            for usage in self._du(_join(top, name), block_size, inline_max):
+                yield usage
+            # The last record of a subtree is its total
+            size += usage.size
+            blocks += usage.blocks
+            files += usage.files
+            dirs += usage.dirs + 1
+
+        yield DiskUsage(top, size, blocks + 2, files, dirs)
+
+    def glob(self, pattern: PathType) -> List[Union[str, bytes]]:
+        """Return the paths matching a pattern
+
+        See :meth:`iglob` for the supported patterns.
+        """
+        return list(self.iglob(pattern))
+
+    def iglob(self, pattern: PathType) -> Iterator[Union[str, bytes]]:
+        """Generate the paths matching a pattern
+
+        Every component of ``pattern`` is either a name, an :mod:`fnmatch`
+        pattern (``*``, ``?``, ``[seq]``) or ``**``, which matches any number
+        of nested directories. A trailing ``**`` matches all files and
+        directories below its parent. Matching is case sensitive and names
+        starting with a dot are not treated specially.
+
+        The pattern is compiled once and only the directories which can
+        contain matches are listed: names are looked up without listing
+        their directory and subtrees are only entered if they match the
+        pattern. The paths are relative if ``pattern`` is relative and
+        ``bytes`` if ``pattern`` is ``bytes``.
+        """
+        for path, _ in self._iglob(pattern):
+            yield path
+
+    def find(
+        self,
+        pattern: PathType = "**",
+        type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ) -> Iterator[Union[str, bytes]]:
+        """Generate the paths matching a pattern and predicates
+
+        Works like :meth:`iglob`, the predicates are evaluated on the
+        directory entries read while matching, without additional lookups.
+
+        Parameters
+        ----------
+        pattern : str
+            Pattern as accepted by :meth:`iglob`.
+        type : str
+            ``"f"`` to only match files, ``"d"`` to only match directories.
+        min_size, max_size : int
+            Inclusive bounds of the size in bytes. Directories have size 0.
+        """
+        if type not in (None, "f", "d"):
+            raise ValueError(f"Invalid type '{type}', expected 'f' or 'd'")
+        for path, st in self._iglob(pattern):
+            is_dir = st.type == LFSStat.TYPE_DIR
+            if type is not None and is_dir != (type == "d"):
+                continue
+            size = 0 if is_dir else st.size
+            if min_size is not None and size < min_size:
+                continue
+            if max_size is not None and size > max_size:
+                continue
+            yield path
+
+    def _iglob(self, pattern: PathType) -> Iterator[Tuple[Union[str, bytes], Union["LFSStat", "LFSDirEntry"]]]:
+        """Yield ``(path, entry)`` for every path matching ``pattern``"""
+        pattern = _path_value(pattern)
+        parts = _compile_glob(pattern)
+        if not parts:
+            return
+        top = pattern[:1] if pattern[:1] in ("/", b"/") else pattern[:0]
+        matches = self._glob(top, parts, None)
+        if parts.count(_GLOB_RECURSIVE) < 2:
+            yield from matches
+            return
+        # Several ``**`` can match the same path in different ways
+        seen = set()
+        for path, entry in matches:
+            if path not in seen:
+                seen.add(path)
+                yield path, entry
+
+    def _glob(
+        self, top: Union[str, bytes], parts: List[Any], entries: Optional[List["LFSDirEntry"]]
+    ) -> Iterator[Tuple[Union[str, bytes], Union["LFSStat", "LFSDirEntry"]]]:
+        part, rest = parts[0], parts[1:]
+        if isinstance(part, (str, bytes)):
+            path = _glob_join(top, part)
+            if entries is not None:
+                # ``top`` was listed already, e.g. for ``**/name``
+                for elem in entries:
+                    if elem.name == part:
+                        if not rest:
+                            yield path, elem
+                        elif elem.is_dir():
+                            yield from self._glob(path, rest, None)
+                        break
+            elif rest:
+                # Plain names are looked up directly instead of listing ``top``
+                yield from self._glob(path, rest, None)
+            else:
+                st = self.try_stat(path)
+                if st is not None:
+                    yield path, st
+            return
+
+        if entries is None:
+            entries = self._glob_scandir(top)
+        if part is _GLOB_RECURSIVE:
+            if rest:
+                yield from self._glob(top, rest, entries)
+            for elem in entries:
+                path = _glob_join(top, elem.name)
+                if not rest:
+                    yield path, elem
+                if elem.is_dir():
+                    yield from self._glob(path, parts, None)
+            return
+
+        for elem in entries:
+            if (rest and not elem.is_dir()) or not part.match(elem.name):
+                continue
+            path = _glob_join(top, elem.name)
+            if rest:
+                yield from self._glob(path, rest, None)
+            else:
+                yield path, elem
+
+    def _glob_scandir(self, top: Union[str, bytes]) -> List["LFSDirEntry"]:
+        """The entries of ``top``, empty if it is not an existing directory"""
+        try:
+            return list(self.scandir(top or _sep(top)))
+        except LittleFSError as e:
+            if e.code in (LittleFSError.Error.LFS_ERR_NOENT, LittleFSError.Error.LFS_ERR_NOTDIR):
+                return []
+            raise
+
+    def _iter_tree(self, top: str) -> Iterator[Tuple[str, "LFSDirEntry"]]:
+        """Yield ``(path, entry)`` for every entry below ``top``, top-down."""
+        for elem in self.scandir(top):
+            path = _join(top, elem.name)
+            yield path, elem
+            if elem.is_dir():
+                yield from self._iter_tree(path)
+
+    def _import_archive_member(
+        self, name: str, is_dir: bool, src: Optional[IO[bytes]], buffer: bytearray, known: Set[bytes]
+    ) -> None:
+        parts = [p for p in name.split("/") if p and p != "."]
+        if ".." in parts:
+            raise ValueError(f"Archive member escapes the filesystem root: '{name}'")
+        if not parts:
+            return
+        path = "/" + "/".join(parts)
+        # The directories created or seen for previous members are shared
+        # through ``known``, so each parent is only looked up once
+        if is_dir:
+            self._makedirs(path, known, True)
+            return
+        parent = posixpath.dirname(path)
+        if parent != "/":
+            self._makedirs(parent, known, True)
+        with self.open(path, "wb", buffering=0) as dst:
+            if src is not None:
+                _copy_fileobj(src, dst, buffer)
+
+    @classmethod
+    def from_tar(cls, fileobj: IO[bytes], **kwargs) -> "LittleFS":
+        """Create a new filesystem from the contents of a tar archive.
+
+        The archive is read as a stream (``fileobj`` does not need to be
+        seekable) and the members are copied into the filesystem through a
+        single ``block_size`` chunk buffer. Compressed archives are detected
+        automatically. Members other than regular files and directories
+        (links, devices, ...) are skipped.
+
+        Parameters
+        ----------
+        fileobj : IO[bytes]
+            Binary stream containing the tar archive.
+        **kwargs
+            Passed on to :class:`LittleFS`.
+        """
+        fs = cls(**kwargs)
+        buffer = bytearray(fs.cfg.block_size)
+        known: Set[bytes] = set()
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+            for member in tar:
+                if member.isdir():
+                    fs._import_archive_member(member.name, True, None, buffer, known)
+                elif member.isfile():
+                    fs._import_archive_member(member.name, False, tar.extractfile(member), buffer, known)
+        return fs
+
+    @classmethod
+    def from_zip(cls, fileobj: IO[bytes], **kwargs) -> "LittleFS":
+        """Create a new filesystem from the contents of a zip archive.
+
+        Works like :meth:`from_tar`, but ``fileobj`` must be seekable as
+        required by the zip format.
+        """
+        fs = cls(**kwargs)
+        buffer = bytearray(fs.cfg.block_size)
+        known: Set[bytes] = set()
+        with zipfile.ZipFile(fileobj) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    fs._import_archive_member(info.filename, True, None, buffer, known)
+                else:
+                    with zf.open(info) as src:
+                        fs._import_archive_member(info.filename, False, src, buffer, known)
+        return fs
+
+    def to_tar(self, fileobj: IO[bytes], top: str = "/", compression: str = "") -> None:
+        """Write the contents of the filesystem to a tar archive.
+
+        The archive is written as a stream, ``fileobj`` does not need to be
+        seekable. File data is read through unbuffered file handles.
+
+        Parameters
+        ----------
+        fileobj : IO[bytes]
+            Binary stream the archive is written to.
+        top : str
+            Directory to export. Archive member names are relative to it.
+        compression : str
+            One of ``""``, ``"gz"``, ``"bz2"`` or ``"xz"``.
+        """
+        # typeshed only accepts literal modes
+        mode: Any = f"w|{compression}"
+        with tarfile.open(fileobj=fileobj, mode=mode) as tar:
+            for path, st in self._iter_tree(top):
+                info = tarfile.TarInfo(posixpath.relpath(path, top))
+                if st.type == LFSStat.TYPE_DIR:
+                    info.type = tarfile.DIRTYPE
+                    info.mode = 0o755
+                    tar.addfile(info)
+                else:
+                    info.size = st.size
+                    info.mode = 0o644
+                    with self.open(path, "rb", buffering=0) as src:
+                        tar.addfile(info, src)
+
+    def to_zip(self, fileobj: IO[bytes], top: str = "/", compression: int = zipfile.ZIP_DEFLATED) -> None:
+        """Write the contents of the filesystem to a zip archive.
+
+        Works like :meth:`to_tar`. ``compression`` is one of the
+        :mod:`zipfile` compression constants.
+        """
+        buffer = bytearray(self.cfg.block_size)
+        with zipfile.ZipFile(fileobj, "w", compression=compression) as zf:
+            for path, st in self._iter_tree(top):
+                name = posixpath.relpath(path, top)
+                if st.type == LFSStat.TYPE_DIR:
+                    zf.writestr(name + "/", b"")
+                else:
+                    info = zipfile.ZipInfo(name)
+                    info.compress_type = compression
+                    info.file_size = st.size
+                    with self.open(path, "rb", buffering=0) as src, zf.open(info, "w") as dst:
+                        _copy_fileobj(src, dst, buffer)
+
+
+class DiskUsage(NamedTuple):
+    """Disk usage of a directory tree reported by :meth:`LittleFS.du`"""
+
+    #: Path of the directory, or of the file if :meth:`LittleFS.du` was called on one
+    path: Union[str, bytes]
+    #: Logical size of the files in the tree in bytes
+    size: int
+    #: Estimated number of blocks used by the tree, including metadata
+    blocks: int
+    #: Number of files in the tree, 1 for a file
+    files: int
+    #: Number of directories below the directory
+    dirs: int
+
+
+class Snapshot(NamedTuple):
+    """Block device state captured by :meth:`LittleFS.snapshot`"""
+
+    block_size: int
+    block_count: int
+    data: bytes
 
 
 class FileHandle(io.RawIOBase):
@@ -437,13 +1319,19 @@ class FileHandle(io.RawIOBase):
 
         self.fs = fs
         self.fh = fh
+        # Called when the file is committed, to invalidate cached metadata
+        self._on_change: Optional[Callable[[], None]] = None
 
     def close(self):
         # Base implementation is not used to avoid extra call to flush().
         # LittleFS already flushes the file on close.
 
         if not self.closed:
-            lfs.file_close(self.fs, self.fh)
+            try:
+                lfs.file_close(self.fs, self.fh)
+            finally:
+                if self._on_change is not None:
+                    self._on_change()
             setattr(self, "__IOBase_closed", True)
 
     def readable(self):
@@ -471,6 +1359,8 @@ class FileHandle(io.RawIOBase):
 
         pos = self.tell()
         ret = lfs.file_truncate(self.fs, self.fh, pos)
+        if self._on_change is not None:
+            self._on_change()
 
         return ret
 
@@ -505,9 +1395,117 @@ class FileHandle(io.RawIOBase):
     def flush(self):
         super().flush()
         lfs.file_sync(self.fs, self.fh)
+        if self._on_change is not None:
+            self._on_change()
+
+
+def _copy_fileobj(src, dst, buffer: bytearray) -> int:
+    """Copy ``src`` to ``dst`` reusing ``buffer`` for every chunk."""
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        size = src.readinto(view)
+        if not size:
+            return total
+        dst.write(view[:size])
+        total += size
+
+
+def _file_blocks(size: int, block_size: int, inline_max: int) -> int:
+    """Number of blocks of a file of ``size`` bytes outside of its metadata
+
+    littlefs stores files in a CTZ skip-list where block ``n`` starts with
+    ``ctz(n) + 1`` pointers to previous blocks, see ``lfs_ctz_index``.
+    """
+    if size <= inline_max:
+        return 0
+    payload = block_size - 8
+    last = size - 1
+    index = last // payload
+    if index:
+        index = (last - 4 * (bin(index - 1).count("1") + 2)) // payload
+    return index + 1
+
+
+def _raise_on_context_error(code: int) -> None:
+    if code:
+        raise LittleFSError(code)
+
+
+def _raise_open_error(e: LittleFSError) -> NoReturn:
+    """Map errors of opening a file to standard Python exceptions"""
+    if e.code == LittleFSError.Error.LFS_ERR_NOENT:
+        raise FileNotFoundError from e
+    elif e.code == LittleFSError.Error.LFS_ERR_ISDIR:
+        raise IsADirectoryError from e
+    elif e.code == LittleFSError.Error.LFS_ERR_EXIST:
+        raise FileExistsError from e
+    raise e
+
+
+def _path_value(path: PathType) -> Union[str, bytes]:
+    """The ``str`` or ``bytes`` path, as needed to join paths"""
+    return path.path if isinstance(path, LFSPath) else path
+
+
+def _sep(path: Union[str, bytes]) -> Union[str, bytes]:
+    return b"/" if isinstance(path, bytes) else "/"
+
+
+@overload
+def _join(top: str, name: str) -> str:
+    ...
+
+
+@overload
+def _join(top: bytes, name: bytes) -> bytes:
+    ...
+
+
+@overload
+def _join(top: Union[str, bytes], name: Union[str, bytes]) -> Union[str, bytes]:
+    ...
+
+
+def _join(top: Union[str, bytes], name: Union[str, bytes]) -> Union[str, bytes]:
+    if isinstance(top, str) and isinstance(name, str):
+        return (top + "/" + name).replace("//", "/")
+    if isinstance(top, bytes) and isinstance(name, bytes):
+        return (top + b"/" + name).replace(b"//", b"/")
+    raise TypeError("Can't mix str and bytes in paths")
+
+
+def _compile_glob(pattern: Union[str, bytes]) -> List[Any]:
+    """Split a glob pattern into names, compiled :mod:`fnmatch` patterns and ``**``"""
+    is_bytes = isinstance(pattern, bytes)
+    # latin-1 maps every byte to one character and back
+    text = pattern.decode("latin-1") if isinstance(pattern, bytes) else pattern
+    parts: List[Any] = []
+    for part in text.split("/"):
+        if not part or part == ".":
+            continue
+        if part == "**":
+            if not parts or parts[-1] is not _GLOB_RECURSIVE:
+                parts.append(_GLOB_RECURSIVE)
+        elif _GLOB_MAGIC.search(part):
+            regex = fnmatch.translate(part)
+            parts.append(re.compile(regex.encode("latin-1") if is_bytes else regex))
+        else:
+            parts.append(part.encode("latin-1") if is_bytes else part)
+    return parts
+
+
+def _glob_join(top: Union[str, bytes], name: Union[str, bytes]) -> Union[str, bytes]:
+    """Join like :func:`_join`, keeping paths relative to an empty ``top``"""
+    return _join(top, name) if top else name
+
+
+def _attr_types(types: Optional[Iterable[Union[str, bytes, int]]]) -> Optional[List[int]]:
+    """The attribute types to copy, ``None`` to look up all types"""
+    return None if types is None else [_typ_to_uint8(typ) for typ in types]
 
 
-def _typ_to_uint8(typ):
+def _typ_to_uint8(typ) -> int:
     try:
         out = ord(typ)
     except TypeError:
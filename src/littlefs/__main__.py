@@ -1,14 +1,26 @@
 import argparse
 from contextlib import suppress
+import heapq
+import json
+from operator import attrgetter
 import os
 from pathlib import Path
 import sys
 import textwrap
+from typing import Iterable, List
+import zipfile
 
-from littlefs import LittleFS, __version__
+from littlefs import DiskUsage, LittleFS, __version__
 from littlefs.errors import LittleFSError
+from littlefs.cache import MetadataCache
 from littlefs.repl import LittleFSRepl
-from littlefs.context import UserContextFile, UserContext
+from littlefs.context import (
+    UserContextFile,
+    UserContext,
+    UserContextCompressed,
+    is_compressed_image,
+    write_compressed_image,
+)
 
 # Dictionary mapping suffixes to their size in bytes
 _suffix_map = {
@@ -70,9 +82,8 @@ def _walk_all(root):
             yield dirpath / filename
 
 
-def create(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
-    """Create LittleFS image from file/directory contents."""
-    # fs_size OR block_count may be populated; make them consistent.
+def _resolve_block_count(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """fs_size OR block_count may be populated; make them consistent."""
     if args.block_count is None:
         block_count = args.fs_size // args.block_size
         if block_count * args.block_size != args.fs_size:
@@ -81,6 +92,29 @@ def create(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     else:
         args.fs_size = args.block_size * args.block_count
 
+
+def _add_sources(fs: LittleFS, sources: List[Path], root: Path, verbose: bool = False) -> None:
+    """Add the directories (in a single batch) and then the files of ``sources`` to ``fs``."""
+    directories = [path.relative_to(root) for path in sources if path.is_dir()]
+    if verbose:
+        for rel_path in directories:
+            print("Adding Directory:", rel_path)
+    fs.makedirs_many(rel_path.as_posix() for rel_path in directories)
+
+    for path in sources:
+        if path.is_dir():
+            continue
+        rel_path = path.relative_to(root)
+        if verbose:
+            print("Adding File:     ", rel_path)
+        with fs.open(rel_path.as_posix(), "wb") as dest:
+            dest.write(path.read_bytes())
+
+
+def create(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Create LittleFS image from file/directory contents."""
+    _resolve_block_count(parser, args)
+
     if args.verbose:
         print("LittleFS Configuration:")
         print(f"  Block Size:  {args.block_size:9d}  /  0x{args.block_size:X}")
@@ -104,41 +138,42 @@ def create(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
         root = source.parent
 
     fs = _fs_from_args(args)
-    for path in sources:
-        rel_path = path.relative_to(root)
-        if path.is_dir():
-            if args.verbose:
-                print("Adding Directory:", rel_path)
-            fs.mkdir(rel_path.as_posix())
-        else:
-            if args.verbose:
-                print("Adding File:     ", rel_path)
-            with fs.open(rel_path.as_posix(), "wb") as dest:
-                dest.write(path.read_bytes())
+    _add_sources(fs, sources, root, args.verbose)
 
     if args.compact:
         if args.verbose:
             print(f"Compacting... {fs.used_block_count} / {args.block_count}")
         compact_fs = _fs_from_args(args, block_count=fs.used_block_count)
-        for path in sources:
-            rel_path = path.relative_to(root)
-            if path.is_dir():
-                compact_fs.mkdir(rel_path.as_posix())
-            else:
-                with compact_fs.open(rel_path.as_posix(), "wb") as dest:
-                    dest.write(path.read_bytes())
+        _add_sources(compact_fs, sources, root)
+        if args.trim:
+            compact_fs.trim()
         compact_fs.fs_grow(args.block_count)
         data = compact_fs.context.buffer
         if not args.no_pad:
             data = data.ljust(args.fs_size, b"\xff")
     else:
+        if args.trim:
+            erased = fs.trim()
+            if args.verbose:
+                print(f"Trimmed {erased} unused blocks")
         data = fs.context.buffer
 
     args.destination.parent.mkdir(exist_ok=True, parents=True)
-    args.destination.write_bytes(data)
+    if args.compress:
+        with open(args.destination, "wb") as fh:
+            write_compressed_image(fh, data, codec=args.compress)
+    else:
+        args.destination.write_bytes(data)
     return 0
 
 
+def _image_context(source: Path) -> UserContext:
+    """Context for reading an image, decompressing only what is read for compressed containers."""
+    if is_compressed_image(str(source)):
+        return UserContextCompressed(str(source))
+    return UserContext(buffer=bytearray(source.read_bytes()))
+
+
 def _mount_from_context(parser: argparse.ArgumentParser, args: argparse.Namespace, context: UserContext) -> LittleFS:
     # Block count is 0 because we don't know the size of the real image yet, the source file may be compacted (with the create --compact option).
     fs = _fs_from_args(args, block_count=0, mount=False, context=context)
@@ -172,7 +207,7 @@ def _list(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     source: Path = args.source
     if not source.is_file():
         parser.error(f"Source image '{source}' does not exist.")
-    context = UserContext(buffer=bytearray(source.read_bytes()))
+    context = _image_context(source)
 
     fs = _mount_from_context(parser, args, context)
 
@@ -186,12 +221,37 @@ def _list(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     return 0
 
 
+def du(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Show the disk usage of the directories in a LittleFS image."""
+    source: Path = args.source
+    if not source.is_file():
+        parser.error(f"Source image '{source}' does not exist.")
+    context = _image_context(source)
+
+    fs = _mount_from_context(parser, args, context)
+
+    try:
+        usages: Iterable[DiskUsage] = fs.du(args.path)
+        if args.top:
+            # Only keeps the top entries in memory while walking the tree
+            usages = heapq.nlargest(args.top, usages, key=attrgetter(args.sort))
+        print(f"{'blocks':>8} {'bytes':>12} {'files':>8}  path")
+        for usage in usages:
+            print(f"{usage.blocks:8d} {usage.size:12d} {usage.files:8d}  {usage.path!s}")
+    except LittleFSError as e:
+        if e.code != LittleFSError.Error.LFS_ERR_NOENT:
+            raise
+        print(f"Path '{args.path}' does not exist.")
+        return 1
+    return 0
+
+
 def extract(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     """Extract LittleFS image contents to a directory."""
     source: Path = args.source
     if not source.is_file():
         parser.error(f"Source image '{source}' does not exist.")
-    context = UserContext(buffer=bytearray(source.read_bytes()))
+    context = _image_context(source)
 
     fs = _mount_from_context(parser, args, context)
 
@@ -224,18 +284,152 @@ def extract(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     return 0
 
 
+def _archive_format(path: Path) -> str:
+    """Guess the archive format ("zip" or a tarfile compression) from a file name."""
+    suffixes = "".join(path.suffixes[-2:]).lower()
+    if suffixes.endswith(".zip"):
+        return "zip"
+    for suffix, compression in ((".gz", "gz"), (".tgz", "gz"), (".bz2", "bz2"), (".xz", "xz"), (".txz", "xz")):
+        if suffixes.endswith(suffix):
+            return compression
+    return ""
+
+
+def find(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Find files and directories in a LittleFS image."""
+    source: Path = args.source
+    if not source.is_file():
+        parser.error(f"Source image '{source}' does not exist.")
+    context = _image_context(source)
+
+    fs = _mount_from_context(parser, args, context)
+
+    pattern = args.pattern if args.pattern.startswith("/") else "/" + args.pattern
+    for path in fs.find(pattern, type=args.type, min_size=args.min_size, max_size=args.max_size):
+        print(path)
+    return 0
+
+
+def from_archive(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Create LittleFS image from a tar or zip archive."""
+    _resolve_block_count(parser, args)
+    kwargs = {
+        "block_size": args.block_size,
+        "block_count": args.block_count,
+        "name_max": args.name_max,
+        "inline_max": args.inline_max,
+        "attr_max": args.attr_max,
+        "file_max": args.file_max,
+        "filename_encoding": args.filename_encoding,
+    }
+
+    if str(args.source) == "-":
+        fs = LittleFS.from_tar(sys.stdin.buffer, **kwargs)
+    elif not args.source.is_file():
+        parser.error(f"Source archive '{args.source}' does not exist.")
+    elif zipfile.is_zipfile(args.source):
+        with open(args.source, "rb") as fh:
+            fs = LittleFS.from_zip(fh, **kwargs)
+    else:
+        with open(args.source, "rb") as fh:
+            fs = LittleFS.from_tar(fh, **kwargs)
+
+    if args.verbose:
+        print(f"Used Blocks: {fs.used_block_count} / {args.block_count}")
+
+    args.destination.parent.mkdir(exist_ok=True, parents=True)
+    args.destination.write_bytes(fs.context.buffer)
+    return 0
+
+
+def to_archive(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Export LittleFS image contents to a tar or zip archive."""
+    source: Path = args.source
+    if not source.is_file():
+        parser.error(f"Source image '{source}' does not exist.")
+    context = _image_context(source)
+
+    fs = _mount_from_context(parser, args, context)
+
+    if str(args.destination) == "-":
+        fs.to_tar(sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        return 0
+
+    archive_format = _archive_format(args.destination)
+    args.destination.parent.mkdir(exist_ok=True, parents=True)
+    with open(args.destination, "wb") as fh:
+        if archive_format == "zip":
+            fs.to_zip(fh)
+        else:
+            fs.to_tar(fh, compression=archive_format)
+    return 0
+
+
+def autotune(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Find LittleFS configurations suited to a workload and device."""
+    from littlefs import simulation
+
+    _resolve_block_count(parser, args)
+    if args.source is not None and not args.source.is_dir():
+        parser.error(f"Source directory '{args.source}' does not exist.")
+
+    script = None
+    if args.script is not None:
+        # JSON list of operations as accepted by simulation.run_script, e.g. [["write", "/log", 512]]
+        script = []
+        for op in json.loads(args.script.read_text()):
+            # Only the data of writes is bytes, JSON strings are encoded as UTF-8
+            if op[0] in ("write", "append") and len(op) == 3 and isinstance(op[2], str):
+                op = [op[0], op[1], op[2].encode()]
+            script.append(tuple(op))
+    if args.source is None and script is None:
+        parser.error("Either a source directory or --script is required.")
+
+    constraints = simulation.DeviceConstraints(
+        block_size=args.block_size,
+        block_count=args.block_count,
+        read_size=args.read_size,
+        prog_size=args.prog_size,
+        max_ram=args.max_ram,
+        open_files=args.open_files,
+    )
+    results = simulation.autotune(
+        constraints,
+        source=None if args.source is None else str(args.source),
+        script=script,
+        processes=args.processes,
+    )
+    failed = sum(1 for result in results if result.error is not None)
+    if args.verbose:
+        print(f"Evaluated {len(results)} configurations, {failed} failed.")
+    if failed == len(results):
+        print("The workload failed with all configurations.")
+        return 1
+    print(simulation.format_tune_report(simulation.best_configs(results, args.top)))
+    return 0
+
+
 def repl(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     """Inspect an existing LittleFS image through an interactive shell."""
     source: Path = args.source
     if not source.is_file():
         parser.error(f"Source image '{source}' does not exist.")
-    context = UserContextFile(str(source))  # In repl we want context to be the file itself, so commands will change it
+    context: UserContext
+    if is_compressed_image(str(source)):
+        # Changes are kept in memory and written back when the shell exits
+        context = UserContextCompressed(str(source))
+    else:
+        # In repl we want context to be the file itself, so commands will change it
+        context = UserContextFile(str(source))
 
     try:
         try:
             fs = _mount_from_context(parser, args, context)
         except LittleFSError as exc:
             parser.error(f"Failed to mount '{source}': {exc}")
+        # All changes are made through ``fs``, so lookups and listings can be cached
+        fs.metadata_cache = MetadataCache(1024)
 
         shell = LittleFSRepl(fs)
 
@@ -244,6 +438,8 @@ def repl(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
         if shell._mounted:
             with suppress(LittleFSError):
                 fs.unmount()
+        if isinstance(context, UserContextCompressed) and context.modified:
+            context.save()
 
     return 0
 
@@ -338,6 +534,17 @@ def get_parser():
         action="store_true",
         help="Store all data in the beginning blocks.",
     )
+    parser_create.add_argument(
+        "--trim",
+        action="store_true",
+        help="Erase (0xFF) all unused blocks so no stale data is left in the image.",
+    )
+    parser_create.add_argument(
+        "--compress",
+        choices=["zlib", "zstd"],
+        help="Write the image as a block-indexed compressed container. Such images can be "
+        "used with the list, extract, to-archive and repl commands without decompressing them first.",
+    )
     parser_create.add_argument(
         "--no-pad",
         action="store_true",
@@ -388,6 +595,184 @@ def get_parser():
         help="LittleFS block size.",
     )
 
+    parser_du = add_command(du)
+    parser_du.add_argument(
+        "source",
+        type=Path,
+        help="Source LittleFS filesystem binary.",
+    )
+    parser_du.add_argument(
+        "--block-size",
+        type=size_parser,
+        required=True,
+        help="LittleFS block size.",
+    )
+    parser_du.add_argument(
+        "--path",
+        default="/",
+        help="Directory to summarize.",
+    )
+    parser_du.add_argument(
+        "--top",
+        type=int,
+        default=0,
+        help="Only show the N largest directories.",
+    )
+    parser_du.add_argument(
+        "--sort",
+        choices=["blocks", "size"],
+        default="blocks",
+        help="Sort key of --top, the estimated block usage or the logical size.",
+    )
+
+    parser_find = add_command(find)
+    parser_find.add_argument(
+        "source",
+        type=Path,
+        help="Source LittleFS filesystem binary.",
+    )
+    parser_find.add_argument(
+        "pattern",
+        nargs="?",
+        default="**",
+        help="Glob pattern of the paths to find, '**' matches any number of directories. Default: all paths.",
+    )
+    parser_find.add_argument(
+        "--block-size",
+        type=size_parser,
+        required=True,
+        help="LittleFS block size.",
+    )
+    parser_find.add_argument(
+        "--type",
+        choices=["f", "d"],
+        help="Only find files (f) or directories (d).",
+    )
+    parser_find.add_argument(
+        "--min-size",
+        type=size_parser,
+        help="Only find entries of at least this size.",
+    )
+    parser_find.add_argument(
+        "--max-size",
+        type=size_parser,
+        help="Only find entries of at most this size.",
+    )
+
+    parser_from_archive = add_command(from_archive, "from-archive")
+    parser_from_archive.add_argument(
+        "source",
+        type=Path,
+        help="Source tar (optionally compressed) or zip archive. Use '-' to read a tar archive from stdin.",
+    )
+    parser_from_archive.add_argument(
+        "destination",
+        type=Path,
+        nargs="?",
+        default=Path("lfs.bin"),
+        help="Output LittleFS filesystem binary image.",
+    )
+    parser_from_archive.add_argument(
+        "--block-size",
+        type=size_parser,
+        required=True,
+        help="LittleFS block size.",
+    )
+    block_count_group = parser_from_archive.add_mutually_exclusive_group(required=True)
+    block_count_group.add_argument(
+        "--block-count",
+        type=int,
+        help="LittleFS block count",
+    )
+    block_count_group.add_argument(
+        "--fs-size",
+        type=size_parser,
+        help="LittleFS filesystem size. Accepts byte units; e.g. 1MB and 1048576 are equivalent.",
+    )
+
+    parser_to_archive = add_command(to_archive, "to-archive")
+    parser_to_archive.add_argument(
+        "source",
+        type=Path,
+        help="Source LittleFS filesystem binary.",
+    )
+    parser_to_archive.add_argument(
+        "destination",
+        type=Path,
+        help="Destination archive. The format is chosen by the file extension "
+        "(.zip, .tar, .tar.gz, .tar.bz2, .tar.xz). Use '-' to write a tar archive to stdout.",
+    )
+    parser_to_archive.add_argument(
+        "--block-size",
+        type=size_parser,
+        required=True,
+        help="LittleFS block size.",
+    )
+
+    parser_autotune = add_command(autotune)
+    parser_autotune.add_argument(
+        "source",
+        type=Path,
+        nargs="?",
+        help="Host directory whose contents are written to the filesystem.",
+    )
+    parser_autotune.add_argument(
+        "--script",
+        type=Path,
+        help='JSON file with read/write operations run after the ingest, e.g. [["write", "/log.bin", 4096]].',
+    )
+    parser_autotune.add_argument(
+        "--block-size",
+        type=size_parser,
+        required=True,
+        help="Erase size of the device.",
+    )
+    block_count_group = parser_autotune.add_mutually_exclusive_group(required=True)
+    block_count_group.add_argument(
+        "--block-count",
+        type=int,
+        help="LittleFS block count",
+    )
+    block_count_group.add_argument(
+        "--fs-size",
+        type=size_parser,
+        help="LittleFS filesystem size. Accepts byte units; e.g. 1MB and 1048576 are equivalent.",
+    )
+    parser_autotune.add_argument(
+        "--read-size",
+        type=size_parser,
+        default=1,
+        help="Minimal read size of the device.",
+    )
+    parser_autotune.add_argument(
+        "--prog-size",
+        type=size_parser,
+        default=1,
+        help="Minimal program size of the device.",
+    )
+    parser_autotune.add_argument(
+        "--max-ram",
+        type=size_parser,
+        help="Maximal RAM for littlefs caches and lookahead buffer.",
+    )
+    parser_autotune.add_argument(
+        "--open-files",
+        type=int,
+        default=1,
+        help="Number of files open at the same time. Defaults to 1.",
+    )
+    parser_autotune.add_argument(
+        "--processes",
+        type=int,
+        help="Number of worker processes. Defaults to the number of CPUs.",
+    )
+    parser_autotune.add_argument(
+        "--top",
+        type=int,
+        default=3,
+        help="Number of configurations reported per criterion. Defaults to 3.",
+    )
+
     parser_repl = add_command(repl)
     parser_repl.add_argument(
         "source",
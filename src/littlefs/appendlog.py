@@ -0,0 +1,233 @@
+"""Append-only record logs with group commit
+
+Every :meth:`~littlefs.FileHandle.flush` of a file commits its metadata,
+which costs at least one metadata block write. Syncing after every record
+of a log is therefore slow, while never syncing loses all records on a
+power loss. An :class:`AppendLog` keeps the appended records in memory and
+writes and syncs them in a single commit once a configurable policy
+triggers:
+
+- ``max_records``: the number of pending records reaches the limit
+- ``max_bytes``: the size of the pending records reaches the limit
+- ``max_delay``: the oldest pending record is older than the delay in
+  seconds, checked by a background thread
+
+Records which are not committed yet are lost if the device loses power,
+the policy bounds how many records that can be::
+
+    with fs.append_log("telemetry.bin", max_records=64, max_delay=1.0) as log:
+        for record in records:
+            log.append(record)
+
+    print(log.stats())
+
+littlefs is not thread safe. With ``max_delay``, commits happen on a
+background thread while holding :attr:`AppendLog.lock`, hold the lock as
+well while using the filesystem from other threads.
+"""
+
+import threading
+import time
+import typing
+from typing import List, NamedTuple, Optional, Union
+
+from . import lfs
+from .lfs import LFSFileFlag
+
+if typing.TYPE_CHECKING:
+    from . import LittleFS, PathType
+
+
+class AppendLogStats(NamedTuple):
+    """Metrics of an :class:`AppendLog`"""
+
+    #: Number of committed records
+    records: int
+    #: Number of committed bytes
+    bytes: int
+    #: Number of commits, i.e. file syncs
+    commits: int
+    #: Number of syncs saved compared to a sync per record
+    commits_avoided: int
+    #: Total time spent writing and syncing in nanoseconds
+    commit_ns: int
+    #: Longest write and sync in nanoseconds
+    max_commit_ns: int
+    #: Longest time between appending a record and its commit in nanoseconds
+    max_latency_ns: int
+
+
+class AppendLog:
+    """Append records to a file, syncing them in groups
+
+    Use :meth:`littlefs.LittleFS.append_log` to create a log. The file is
+    created if needed and opened for appending. Commits happen when the
+    policy of ``max_records``, ``max_bytes`` and ``max_delay`` triggers,
+    on :meth:`commit` and on :meth:`close`. Without any limit, records are
+    only committed explicitly.
+    """
+
+    def __init__(
+        self,
+        fs: "LittleFS",
+        path: "PathType",
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_delay: Optional[float] = None,
+    ) -> None:
+        for name, value in (("max_records", max_records), ("max_bytes", max_bytes), ("max_delay", max_delay)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+        self.fs = fs
+        self.path = path
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        #: Serializes the appends, commits and the background thread
+        self.lock = threading.RLock()
+
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        # Records written to the file but not synced yet
+        self._unsynced_records = 0
+        self._unsynced_bytes = 0
+        self._first_ns = 0
+        self._records = 0
+        self._bytes = 0
+        self._commits = 0
+        self._commit_ns = 0
+        self._max_commit_ns = 0
+        self._max_latency_ns = 0
+        self._error: Optional[BaseException] = None
+
+        flags = LFSFileFlag.wronly | LFSFileFlag.creat | LFSFileFlag.append
+        self._fh: Optional[lfs.LFSFile] = lfs.file_open(fs.fs, path, flags, fs.filename_encoding)
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if max_delay is not None:
+            self._thread = threading.Thread(target=self._run, name="littlefs-append-log", daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> "AppendLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._fh is None
+
+    @property
+    def pending(self) -> int:
+        """Number of records waiting for a commit"""
+        return len(self._pending) + self._unsynced_records
+
+    def append(self, record: Union[bytes, bytearray, memoryview]) -> None:
+        """Append a record, committing the pending records if the policy triggers"""
+        with self.lock:
+            self._check()
+            if not self._pending and not self._unsynced_records:
+                self._first_ns = time.perf_counter_ns()
+            data = bytes(record)
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+            if (self.max_records is not None and len(self._pending) >= self.max_records) or (
+                self.max_bytes is not None and self._pending_bytes >= self.max_bytes
+            ):
+                self._commit()
+
+    def commit(self) -> None:
+        """Write and sync the pending records"""
+        with self.lock:
+            self._check()
+            self._commit()
+
+    def close(self) -> None:
+        """Commit the pending records and close the file
+
+        Errors of commits on the background thread are raised here if they
+        were not raised by an earlier call.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        with self.lock:
+            if self._fh is None:
+                return
+            try:
+                self._check()
+                self._commit()
+            finally:
+                fh, self._fh = self._fh, None
+                lfs.file_close(self.fs.fs, fh)
+
+    def stats(self) -> AppendLogStats:
+        """The metrics of the committed records"""
+        with self.lock:
+            return AppendLogStats(
+                self._records,
+                self._bytes,
+                self._commits,
+                self._records - self._commits,
+                self._commit_ns,
+                self._max_commit_ns,
+                self._max_latency_ns,
+            )
+
+    def _check(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if self._fh is None:
+            raise ValueError("I/O operation on closed log.")
+
+    def _commit(self) -> None:
+        fh = self._fh
+        assert fh is not None
+        if not self._pending and not self._unsynced_records:
+            return
+        start = time.perf_counter_ns()
+        if self._pending:
+            lfs.file_write(self.fs.fs, fh, b"".join(self._pending))
+            # The records are in the file cache now, a failed sync is retried
+            # by the next commit without writing them twice
+            self._unsynced_records += len(self._pending)
+            self._unsynced_bytes += self._pending_bytes
+            self._pending.clear()
+            self._pending_bytes = 0
+        lfs.file_sync(self.fs.fs, fh)
+        end = time.perf_counter_ns()
+        if self.fs.metadata_cache is not None:
+            self.fs.metadata_cache.changed(self.fs._cache_path(self.path))
+
+        # Only synced records are counted
+        self._records += self._unsynced_records
+        self._bytes += self._unsynced_bytes
+        self._unsynced_records = self._unsynced_bytes = 0
+        self._commits += 1
+        self._commit_ns += end - start
+        self._max_commit_ns = max(self._max_commit_ns, end - start)
+        self._max_latency_ns = max(self._max_latency_ns, end - self._first_ns)
+
+    def _run(self) -> None:
+        assert self.max_delay is not None
+        delay_ns = int(self.max_delay * 1e9)
+        timeout = self.max_delay
+        while not self._stop.wait(timeout):
+            with self.lock:
+                timeout = self.max_delay
+                if not self.pending or self._fh is None:
+                    continue
+                age_ns = time.perf_counter_ns() - self._first_ns
+                if age_ns < delay_ns:
+                    timeout = (delay_ns - age_ns) / 1e9
+                    continue
+                try:
+                    self._commit()
+                except BaseException as e:
+                    # Raised by the next call on the log
+                    self._error = e
+                    return
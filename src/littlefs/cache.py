@@ -0,0 +1,149 @@
+"""Metadata cache of :class:`~littlefs.LittleFS`
+
+Looking up a path or listing a directory reads metadata blocks through the
+block device callbacks on every call. When enabled with the
+``metadata_cache`` argument of :class:`~littlefs.LittleFS`, the results of
+:meth:`~littlefs.LittleFS.stat` (and the methods based on it, like
+:meth:`~littlefs.LittleFS.exists`), directory listings and
+:meth:`~littlefs.LittleFS.getattr` are kept in a :class:`MetadataCache`.
+
+The cache is invalidated by the methods of :class:`~littlefs.LittleFS`
+which modify the filesystem, files opened for writing invalidate their
+entries when they are opened, flushed, truncated and closed. Changes made
+through the low-level :mod:`littlefs.lfs` functions or to the block device
+bypass the cache, call :meth:`MetadataCache.clear` after such changes.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Set, Tuple
+
+#: Returned by :meth:`MetadataCache.get` for keys which are not cached
+MISSING = object()
+
+_Key = Tuple[str, bytes, Hashable]
+
+
+def _parent(path: bytes) -> bytes:
+    return path.rsplit(b"/", 1)[0] or b"/"
+
+
+class MetadataCache:
+    """LRU cache of filesystem metadata
+
+    Entries are keyed by ``(kind, path, extra)`` tuples. ``path`` is the
+    normalized, encoded absolute path the entry belongs to, which allows to
+    invalidate all entries of a path. The keys are indexed by path and the
+    paths by their parent directory, so invalidating a path only visits the
+    entries of the path, its parent and, for a subtree, the paths below it.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cached entries. The least recently used entry is
+        evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[_Key, Any]" = OrderedDict()
+        # Keys per path and the paths with cached entries below each
+        # directory, including the directories in between
+        self._keys: Dict[bytes, Set[_Key]] = {}
+        self._children: Dict[bytes, Set[bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: _Key) -> Any:
+        """Get a cached value, :data:`MISSING` if ``key`` is not cached"""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: _Key, value: Any) -> None:
+        """Cache a value, evicting the least recently used entry if needed"""
+        if key not in self._entries:
+            self._index(key)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self._unindex(evicted)
+
+    def discard(self, key: _Key) -> None:
+        """Drop a single entry"""
+        if key in self._entries:
+            self._drop(key)
+
+    def changed(self, path: bytes, subtree: bool = False) -> None:
+        """Invalidate the entries affected by a change of ``path``
+
+        This drops all entries of ``path`` and the listing of its parent
+        directory. With ``subtree``, the entries of all paths below ``path``
+        are dropped as well.
+        """
+        if path == b"/" and subtree:
+            self.clear()
+            return
+        for key in list(self._keys.get(path, ())):
+            self._drop(key)
+        for key in [key for key in self._keys.get(_parent(path), ()) if key[0] == "dir"]:
+            self._drop(key)
+        if subtree:
+            stack = list(self._children.get(path, ()))
+            while stack:
+                child = stack.pop()
+                stack.extend(self._children.get(child, ()))
+                for key in list(self._keys.get(child, ())):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._entries.clear()
+        self._keys.clear()
+        self._children.clear()
+
+    def _drop(self, key: _Key) -> None:
+        del self._entries[key]
+        self._unindex(key)
+
+    def _index(self, key: _Key) -> None:
+        path = key[1]
+        keys = self._keys.get(path)
+        if keys is None:
+            keys = self._keys[path] = set()
+            # Link the path and its ancestors up to the first known one
+            while path != b"/":
+                parent = _parent(path)
+                children = self._children.setdefault(parent, set())
+                if path in children:
+                    break
+                children.add(path)
+                path = parent
+        keys.add(key)
+
+    def _unindex(self, key: _Key) -> None:
+        path = key[1]
+        keys = self._keys[path]
+        keys.discard(key)
+        if keys:
+            return
+        del self._keys[path]
+        # Unlink the path and its ancestors which have no entries below them
+        while path != b"/" and path not in self._keys and not self._children.get(path):
+            self._children.pop(path, None)
+            parent = _parent(path)
+            children = self._children[parent]
+            children.discard(path)
+            if not children:
+                del self._children[parent]
+            path = parent
@@ -1,7 +1,15 @@
 import logging
+import mmap
 import typing
 import ctypes
 import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+
+from .errors import LittleFSError
 
 if typing.TYPE_CHECKING:
     from .lfs import LFSConfig
@@ -10,7 +18,7 @@ if typing.TYPE_CHECKING:
 class UserContext:
     """Basic User Context Implementation"""
 
-    def __init__(self, buffsize: int = None, buffer: bytearray = None) -> None:
+    def __init__(self, buffsize: typing.Optional[int] = None, buffer: typing.Optional[bytearray] = None) -> None:
         if buffer is not None:
             self.buffer = buffer
         elif buffsize is not None:
@@ -140,6 +148,410 @@ class UserContextFile(UserContext):
             pass
 
 
+class UserContextOverlay(UserContext):
+    """Copy-on-write context on top of an immutable base image
+
+    Reads are served from the base image (a buffer such as ``bytes`` or
+    ``mmap``, or a file path which is memory mapped read-only) unless the
+    block was modified. Modified blocks are stored in a dict, so the memory
+    used is proportional to the number of changed blocks only.
+
+    :meth:`fork` and :meth:`snapshot` are cheap: the modified blocks are
+    shared and only copied when one of the sharing contexts writes to them.
+    """
+
+    def __init__(
+        self, base: typing.Union[str, bytes, bytearray, memoryview, mmap.mmap], size: typing.Optional[int] = None
+    ) -> None:
+        self._file = None
+        if isinstance(base, str):
+            self._file = open(base, "rb")
+            file_size = os.fstat(self._file.fileno()).st_size
+            base = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if file_size else b""
+        self._base = memoryview(base).cast("B")
+        self.in_size = len(self._base) if size is None else size
+        self._block_size: typing.Optional[int] = None
+        self._blocks: typing.Dict[int, bytearray] = {}
+        # Blocks whose bytearray is shared with a fork or snapshot
+        self._shared: typing.Set[int] = set()
+
+    def _base_block(self, block: int, block_size: int) -> bytearray:
+        start = block * block_size
+        data = bytearray(self._base[start : start + block_size])
+        if len(data) < block_size:
+            data += b"\xff" * (block_size - len(data))
+        return data
+
+    def _writable_block(self, block: int, block_size: int) -> bytearray:
+        self._block_size = block_size
+        data = self._blocks.get(block)
+        if data is None:
+            data = self._blocks[block] = self._base_block(block, block_size)
+        elif block in self._shared:
+            data = self._blocks[block] = bytearray(data)
+            self._shared.discard(block)
+        return data
+
+    def read(self, cfg: "LFSConfig", block: int, off: int, size: int) -> bytearray:
+        logging.getLogger(__name__).debug("LFS Read : Block: %d, Offset: %d, Size=%d" % (block, off, size))
+        data = self._blocks.get(block)
+        if data is not None:
+            return data[off : off + size]
+        start = block * cfg.block_size + off
+        data = bytearray(self._base[start : start + size])
+        if len(data) < size:
+            data += b"\xff" * (size - len(data))
+        return data
+
+    def prog(self, cfg: "LFSConfig", block: int, off: int, data: bytes) -> int:
+        logging.getLogger(__name__).debug("LFS Prog : Block: %d, Offset: %d, Data=%r" % (block, off, data))
+        self._writable_block(block, cfg.block_size)[off : off + len(data)] = data
+        return 0
+
+    def erase(self, cfg: "LFSConfig", block: int) -> int:
+        logging.getLogger(__name__).debug("LFS Erase: Block: %d" % block)
+        self._block_size = cfg.block_size
+        self._blocks[block] = bytearray(b"\xff" * cfg.block_size)
+        self._shared.discard(block)
+        return 0
+
+    @property
+    def modified_blocks(self) -> typing.List[int]:
+        """Sorted list of the blocks which differ from the base image"""
+        return sorted(self._blocks)
+
+    def snapshot(self) -> typing.Dict[int, bytearray]:
+        """Capture the current state
+
+        The returned value is opaque and must only be passed to
+        :meth:`restore`. No block data is copied.
+        """
+        self._shared = set(self._blocks)
+        return dict(self._blocks)
+
+    def restore(self, snapshot: typing.Dict[int, bytearray]) -> None:
+        """Return to a state captured by :meth:`snapshot`
+
+        A mounted filesystem must be remounted afterwards, as littlefs
+        caches blocks internally.
+        """
+        self._blocks = dict(snapshot)
+        self._shared = set(self._blocks)
+
+    def fork(self) -> "UserContextOverlay":
+        """Create an independent context starting from the current state"""
+        other = self.__class__.__new__(self.__class__)
+        other._file = None
+        other._base = self._base
+        other.in_size = self.in_size
+        other._block_size = self._block_size
+        other.restore(self.snapshot())
+        return other
+
+    @property
+    def buffer(self) -> bytearray:
+        """Full image content, the base image with all modifications applied"""
+        data = bytearray(self._base)
+        if len(data) < self.in_size:
+            data += b"\xff" * (self.in_size - len(data))
+        # The block size is known once a block was modified
+        block_size = self._block_size or 0
+        for block, block_data in self._blocks.items():
+            start = block * block_size
+            data[start : start + len(block_data)] = block_data
+        return data
+
+    @buffer.setter
+    def buffer(self, value: bytearray) -> None:
+        # Replaces the base image and drops all modifications
+        self._base = memoryview(value).cast("B")
+        self.in_size = len(self._base)
+        self._blocks = {}
+        self._shared = set()
+
+    def close(self) -> None:
+        """Release the base image file. Forks keep using the memory map."""
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:
+    zstandard = None
+
+COMPRESSED_MAGIC = b"LFSZ"
+"""Magic bytes at the start of a compressed image container."""
+
+_COMPRESSED_HEADER = struct.Struct("<4sBBxxIQI")
+_COMPRESSED_VERSION = 1
+_CODECS = {"zlib": 0, "zstd": 1}
+
+
+def _compressor(codec: str, level: typing.Optional[int]) -> typing.Callable[[typing.Union[bytes, memoryview]], bytes]:
+    if codec == "zlib":
+        return lambda data: zlib.compress(data, 9 if level is None else level)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("The 'zstd' codec requires the 'zstandard' package: 'pip install zstandard'.")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress
+    raise ValueError(f"Unknown codec '{codec}', expected one of {sorted(_CODECS)}")
+
+
+def _decompressor(codec_id: int) -> typing.Callable[[bytes], bytes]:
+    if codec_id == _CODECS["zlib"]:
+        return zlib.decompress
+    if codec_id == _CODECS["zstd"]:
+        if zstandard is None:
+            raise ImportError(
+                "Image is zstd compressed, this requires the 'zstandard' package: 'pip install zstandard'."
+            )
+        return zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Unknown codec id {codec_id} in compressed image")
+
+
+def _write_container(
+    fh: typing.BinaryIO, codec: str, group_size: int, image_size: int, groups: typing.Iterable[bytes]
+) -> None:
+    """Write a compressed container from already compressed ``groups``."""
+    group_count = -(-image_size // group_size)
+    header_pos = fh.tell()
+    index_size = (group_count + 1) * 8
+    fh.write(b"\0" * (_COMPRESSED_HEADER.size + index_size))
+    offsets = array("Q", [0])
+    for group in groups:
+        fh.write(group)
+        offsets.append(offsets[-1] + len(group))
+    if len(offsets) != group_count + 1:
+        raise ValueError("Number of groups does not match the image size")
+    end = fh.tell()
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    fh.seek(header_pos)
+    fh.write(
+        _COMPRESSED_HEADER.pack(
+            COMPRESSED_MAGIC, _COMPRESSED_VERSION, _CODECS[codec], group_size, image_size, group_count
+        )
+    )
+    fh.write(offsets.tobytes())
+    fh.seek(end)
+
+
+def write_compressed_image(
+    fh: typing.BinaryIO,
+    data: typing.Union[bytes, bytearray, memoryview],
+    *,
+    group_size: int = 64 * 1024,
+    codec: str = "zlib",
+    level: typing.Optional[int] = None,
+) -> None:
+    """Write an image into a block-indexed compressed container
+
+    The image is split into groups of ``group_size`` bytes which are
+    compressed independently, followed by an offset index. This allows
+    :class:`UserContextCompressed` to decompress only the groups which are
+    actually read. ``fh`` must be seekable.
+
+    Parameters
+    ----------
+    fh : BinaryIO
+        File object the container is written to.
+    data : bytes
+        Raw image data.
+    group_size : int
+        Size of the independently compressed groups in bytes. Smaller groups
+        allow finer random access at the cost of compression ratio.
+    codec : str
+        ``"zlib"`` or ``"zstd"`` (requires the ``zstandard`` package).
+    level : Optional[int]
+        Compression level, defaults to the codec's default.
+    """
+    if group_size <= 0:
+        raise ValueError("group_size must be positive")
+    compress = _compressor(codec, level)
+    view = memoryview(data)
+    groups = (compress(view[start : start + group_size]) for start in range(0, len(view), group_size))
+    _write_container(fh, codec, group_size, len(view), groups)
+
+
+def is_compressed_image(file_path: str) -> bool:
+    """Check if a file is a compressed image container"""
+    with open(file_path, "rb") as fh:
+        return fh.read(len(COMPRESSED_MAGIC)) == COMPRESSED_MAGIC
+
+
+class UserContextCompressed(UserContext):
+    """Context backed by a block-indexed compressed image
+
+    Only the groups of the container which littlefs actually reads are
+    decompressed, the most recently used ones are kept in a small cache.
+    Modified groups are kept in memory until :meth:`save` is called. See
+    :func:`write_compressed_image` for creating such an image.
+    """
+
+    def __init__(self, file_path: str, *, cache_groups: int = 8) -> None:
+        self._path = file_path
+        self._cache_groups = cache_groups
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._dirty: typing.Dict[int, bytearray] = {}
+        self._fh = open(file_path, "rb")
+        self._load_index()
+
+    def _load_index(self) -> None:
+        header = self._fh.read(_COMPRESSED_HEADER.size)
+        if len(header) != _COMPRESSED_HEADER.size:
+            raise ValueError(f"'{self._path}' is not a compressed image")
+        magic, version, codec_id, group_size, image_size, group_count = _COMPRESSED_HEADER.unpack(header)
+        if magic != COMPRESSED_MAGIC:
+            raise ValueError(f"'{self._path}' is not a compressed image")
+        if version != _COMPRESSED_VERSION:
+            raise ValueError(f"Unsupported compressed image version {version}")
+        self._codec = next(name for name, value in _CODECS.items() if value == codec_id)
+        self._decompress = _decompressor(codec_id)
+        self.group_size = group_size
+        self.in_size = image_size
+        self._offsets = array("Q")
+        self._offsets.frombytes(self._fh.read((group_count + 1) * 8))
+        if sys.byteorder != "little":
+            self._offsets.byteswap()
+        self._data_start = self._fh.tell()
+
+    def _read_compressed(self, group: int) -> bytes:
+        self._fh.seek(self._data_start + self._offsets[group])
+        return self._fh.read(self._offsets[group + 1] - self._offsets[group])
+
+    def _group(self, group: int) -> typing.Union[bytes, bytearray]:
+        dirty = self._dirty.get(group)
+        if dirty is not None:
+            return dirty
+        if group >= len(self._offsets) - 1:
+            # Beyond the stored image, reads as erased
+            return b""
+        cached = self._cache.get(group)
+        if cached is not None:
+            self._cache.move_to_end(group)
+            return cached
+        data = self._decompress(self._read_compressed(group))
+        self._cache[group] = data
+        if len(self._cache) > self._cache_groups:
+            self._cache.popitem(last=False)
+        return data
+
+    def _dirty_group(self, group: int) -> bytearray:
+        data = self._dirty.get(group)
+        if data is None:
+            data = self._dirty[group] = bytearray(self._group(group))
+            self._cache.pop(group, None)
+            # The last stored group may be partial and groups beyond the
+            # stored image are empty, fill them up as erased
+            data += b"\xff" * (self.group_size - len(data))
+        return data
+
+    def read(self, cfg: "LFSConfig", block: int, off: int, size: int) -> bytearray:
+        logging.getLogger(__name__).debug("LFS Read : Block: %d, Offset: %d, Size=%d" % (block, off, size))
+        start = block * cfg.block_size + off
+        end = start + size
+        out = bytearray()
+        while start < end:
+            group, group_off = divmod(start, self.group_size)
+            size = min(end - start, self.group_size - group_off)
+            chunk = self._group(group)[group_off : group_off + size]
+            out += chunk
+            if len(chunk) < size:
+                # Data beyond the stored image reads as erased
+                out += b"\xff" * (size - len(chunk))
+            start += size
+        return out
+
+    def _write(self, cfg: "LFSConfig", start: int, data: bytes) -> int:
+        """Write ``data`` at ``start``, growing the image if needed
+
+        Images created with ``--no-pad`` are shorter than the filesystem, the
+        image is extended up to ``block_count`` blocks when littlefs writes
+        beyond its end. Errors are reported as ``LFS_ERR_IO``, as exceptions
+        cannot propagate through the block device callbacks.
+        """
+        end = start + len(data)
+        if cfg.block_count and end > cfg.block_count * cfg.block_size:
+            logging.getLogger(__name__).error("Write beyond the end of the filesystem at offset %d" % start)
+            return LittleFSError.Error.LFS_ERR_IO
+        try:
+            if end > self.in_size:
+                # Grow by whole blocks and fill the partial last group and any
+                # gap as erased, so every group of the image is stored or dirty
+                size = -(-end // cfg.block_size) * cfg.block_size
+                for group in range(self.in_size // self.group_size, (size - 1) // self.group_size + 1):
+                    self._dirty_group(group)
+                self.in_size = size
+            view = memoryview(data)
+            while view:
+                group, group_off = divmod(start, self.group_size)
+                group_data = self._dirty_group(group)
+                chunk = view[: self.group_size - group_off]
+                group_data[group_off : group_off + len(chunk)] = chunk
+                view = view[len(chunk) :]
+                start += len(chunk)
+        except Exception:
+            logging.getLogger(__name__).exception("Write to the compressed image failed")
+            return LittleFSError.Error.LFS_ERR_IO
+        return 0
+
+    def prog(self, cfg: "LFSConfig", block: int, off: int, data: bytes) -> int:
+        logging.getLogger(__name__).debug("LFS Prog : Block: %d, Offset: %d, Data=%r" % (block, off, data))
+        return self._write(cfg, block * cfg.block_size + off, data)
+
+    def erase(self, cfg: "LFSConfig", block: int) -> int:
+        logging.getLogger(__name__).debug("LFS Erase: Block: %d" % block)
+        return self._write(cfg, block * cfg.block_size, b"\xff" * cfg.block_size)
+
+    @property
+    def modified(self) -> bool:
+        """``True`` if the image was modified since it was opened or saved"""
+        return bool(self._dirty)
+
+    def save(self, file_path: typing.Optional[str] = None, *, level: typing.Optional[int] = None) -> None:
+        """Write the image, including all modifications, to a compressed container
+
+        Unmodified groups are copied without recompressing them. By default
+        the file the context was opened from is replaced.
+        """
+        target = file_path or self._path
+        compress = _compressor(self._codec, level)
+        group_count = -(-self.in_size // self.group_size)
+        # Dirty groups are padded to the full group size, cut the last one
+        # at the end of the image
+        groups = (
+            (
+                compress(bytes(self._dirty[group][: self.in_size - group * self.group_size]))
+                if group in self._dirty
+                else self._read_compressed(group)
+            )
+            for group in range(group_count)
+        )
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            _write_container(fh, self._codec, self.group_size, self.in_size, groups)
+        if file_path is None or os.path.abspath(file_path) == os.path.abspath(self._path):
+            self._fh.close()
+            os.replace(tmp_path, target)
+            self._fh = open(target, "rb")
+            self._load_index()
+            self._dirty.clear()
+            self._cache.clear()
+        else:
+            os.replace(tmp_path, target)
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
 try:
     import win32file
 except ImportError:
@@ -184,7 +596,7 @@ class UserContextWinDisk(UserContext):
         buffer = ctypes.create_string_buffer(size)
         win32file.ReadFile(self.device, buffer)
         # store the data in the buffer and close the buffer
-        data = buffer.raw
+        data = bytearray(buffer.raw)
         return data
 
     def prog(self, cfg: "LFSConfig", block: int, off: int, data: bytes) -> int:
@@ -8,8 +8,8 @@ the littlefs implementation
 """
 
 from libc.stdint cimport uint8_t, int32_t, uint32_t
-from libc.stdlib cimport malloc, free
-from libc.string cimport memcpy
+from libc.stdlib cimport malloc, calloc, free
+from libc.string cimport memcpy, memset
 
 cdef extern from "limits.h":
     pass
@@ -41,6 +41,23 @@ cdef extern from "lfs.h":
     ctypedef uint32_t lfs_block_t
 
     # Enumerations
+    cdef enum lfs_error:
+        LFS_ERR_OK          = 0    # No error
+        LFS_ERR_IO          = -5   # Error during device operation
+        LFS_ERR_CORRUPT     = -84  # Corrupted
+        LFS_ERR_NOENT       = -2   # No directory entry
+        LFS_ERR_EXIST       = -17  # Entry already exists
+        LFS_ERR_NOTDIR      = -20  # Entry is not a dir
+        LFS_ERR_ISDIR       = -21  # Entry is a dir
+        LFS_ERR_NOTEMPTY    = -39  # Dir is not empty
+        LFS_ERR_BADF        = -9   # Bad file number
+        LFS_ERR_FBIG        = -27  # File too large
+        LFS_ERR_INVAL       = -22  # Invalid parameter
+        LFS_ERR_NOSPC       = -28  # No space left on device
+        LFS_ERR_NOMEM       = -12  # No more memory available
+        LFS_ERR_NOATTR      = -61  # No data/attr available
+        LFS_ERR_NAMETOOLONG = -36  # File name too long
+
     cdef enum lfs_open_flags:
         LFS_O_RDONLY = 1         # Open a file as read only
         LFS_O_WRONLY = 2         # Open a file as write only
@@ -63,8 +80,12 @@ cdef extern from "lfs.h":
         LFS_TYPE_REG = 0x001
         LFS_TYPE_DIR = 0x002
 
+    cdef struct lfs_config
+
     cdef struct lfs:
+        const lfs_config *cfg
         lfs_size_t block_count
+        lfs_size_t inline_max
 
     ctypedef lfs lfs_t
 
@@ -91,8 +112,15 @@ cdef extern from "lfs.h":
 
     ctypedef lfs_file lfs_file_t
 
+    cdef struct lfs_attr:
+        uint8_t type
+        void *buffer
+        lfs_size_t size
+
     cdef struct lfs_file_config:
-        pass
+        void *buffer
+        lfs_attr *attrs
+        lfs_size_t attr_count
 
     cdef struct lfs_config:
         void * context
@@ -169,7 +197,7 @@ cdef extern from "lfs.h":
     int lfs_dir_rewind(lfs_t *lfs, lfs_dir *dir)
     int lfs_fs_stat(lfs_t *lfs, lfs_fsinfo* info)
     lfs_ssize_t lfs_fs_size(lfs_t *lfs)
-    int lfs_fs_traverse(lfs_t *lfs, int (*cb)(void*, lfs_block_t), void *data)
+    int lfs_fs_traverse(lfs_t *lfs, int (*cb)(void*, lfs_block_t) noexcept nogil, void *data)
     int lfs_fs_mkconsistent(lfs_t *lfs)
     int lfs_fs_grow(lfs_t *lfs, lfs_size_t block_count);
     int lfs_fs_gc(lfs_t *lfs)
@@ -1,5 +1,5 @@
 import enum
-from typing import Tuple, NamedTuple, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Set, Tuple, NamedTuple, Optional, Union
 from littlefs.context import UserContext
 
 FILENAME_ENCODING: str = ...
@@ -9,7 +9,7 @@ __LFS_DISK_VERSION__: Tuple[int, int] = ...
 class LFSStat(NamedTuple):
     type: int
     size: int
-    name: str
+    name: str  # bytes if the path was given as bytes
 
     # Constants
     TYPE_REG: int = ...
@@ -25,7 +25,14 @@ class LFSFSStat(NamedTuple):
     block_count: int
     block_size: int
 
-class LFSFileFlag(enum.IntFlag): ...
+class LFSFileFlag(enum.IntFlag):
+    rdonly = 1
+    wronly = 2
+    rdwr = 3
+    creat = 0x0100
+    excl = 0x0200
+    trunc = 0x0400
+    append = 0x0800
 
 class LFSConfig:
     user_context: UserContext = ...
@@ -48,6 +55,11 @@ class LFSConfig:
         inline_max: int = 0,
         disk_version: int = 0,
     ) -> None: ...
+    def reset_dirty_blocks(self, block_count: int) -> None: ...
+    def dirty_blocks(self) -> Optional[bytes]: ...
+    def mark_dirty(self, block: int) -> None: ...
+    def stop_dirty_blocks(self) -> None: ...
+    def set_profile_hook(self, hook: Optional[Callable[[str, int, int, Optional[int]], None]]) -> None: ...
     @property
     def read_size(self) -> int: ...
     @property
@@ -74,34 +86,74 @@ class LFSConfig:
 class LFSFilesystem:
     @property
     def block_count(self) -> int: ...
+    @property
+    def inline_max(self) -> int: ...
 
 # The following classes are opaque wrappers around the actual handles
 class LFSFile: ...
-class LFSDirectory: ...
+
+class LFSDirectory:
+    def __iter__(self) -> Iterator["LFSDirEntry"]: ...
+    def __next__(self) -> "LFSDirEntry": ...
+
+class LFSDirEntry:
+    type: int
+    size: int
+    name: str  # bytes if the path was given as bytes
+
+    # Constants
+    TYPE_REG: int = ...
+    TYPE_DIR: int = ...
+    def is_file(self) -> bool: ...
+    def is_dir(self) -> bool: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, index: int) -> Union[int, str]: ...
+    def __iter__(self) -> Iterator[Union[int, str]]: ...
+
+class LFSPath:
+    path: Union[str, bytes]
+    encoded: bytes
+    def __init__(self, path: Union[str, bytes, "LFSPath"], filename_encoding: Optional[str] = ...) -> None: ...
+
+PathType = Union[str, bytes, LFSPath]
 
 def fs_stat(fs: LFSFilesystem) -> LFSFSStat: ...
 def fs_size(fs: LFSFilesystem) -> int: ...
+def fs_block_map(fs: LFSFilesystem) -> bytes: ...
 def fs_gc(fs: LFSFilesystem) -> int: ...
 def format(fs: LFSFilesystem, cfg: LFSConfig) -> int: ...
 def mount(fs: LFSFilesystem, cfg: LFSConfig) -> int: ...
 def unmount(fs: LFSFilesystem) -> int: ...
 def fs_mkconsistent(fs: LFSFilesystem) -> int: ...
 def fs_grow(fs: LFSFilesystem, block_count) -> int: ...
-def remove(fs: LFSFilesystem, path: str, filename_encoding: Optional[str] = ...) -> int: ...
-def rename(fs: LFSFilesystem, oldpath: str, newpath: str, filename_encoding: Optional[str] = ...) -> int: ...
-def stat(fs: LFSFilesystem, path: str, filename_encoding: Optional[str] = ...) -> LFSStat: ...
+def remove(fs: LFSFilesystem, path: PathType, filename_encoding: Optional[str] = ...) -> int: ...
+def rename(fs: LFSFilesystem, oldpath: PathType, newpath: PathType, filename_encoding: Optional[str] = ...) -> int: ...
+def stat(fs: LFSFilesystem, path: PathType, filename_encoding: Optional[str] = ...) -> LFSStat: ...
+def try_stat(fs: LFSFilesystem, path: PathType, filename_encoding: Optional[str] = ...) -> Optional[LFSStat]: ...
 
 # Attributes
-def getattr(fs: LFSFilesystem, path: str, typ, filename_encoding: Optional[str] = ...) -> bytes: ...
-def setattr(fs: LFSFilesystem, path: str, typ, data, filename_encoding: Optional[str] = ...) -> None: ...
-def removeattr(fs: LFSFilesystem, path: str, typ, filename_encoding: Optional[str] = ...) -> None: ...
+def getattr(fs: LFSFilesystem, path: PathType, typ, filename_encoding: Optional[str] = ...) -> bytes: ...
+def getattrs(
+    fs: LFSFilesystem, path: PathType, types: Optional[Iterable[int]] = ..., filename_encoding: Optional[str] = ...
+) -> Dict[int, bytes]: ...
+def setattr(fs: LFSFilesystem, path: PathType, typ, data, filename_encoding: Optional[str] = ...) -> None: ...
+def setattrs(
+    fs: LFSFilesystem, path: PathType, attrs: Mapping[int, bytes], filename_encoding: Optional[str] = ...
+) -> None: ...
+def removeattr(fs: LFSFilesystem, path: PathType, typ, filename_encoding: Optional[str] = ...) -> None: ...
 
 # File Handling
 def file_open(
-    fs: LFSFilesystem, path: str, flags: Union[str, LFSFileFlag], filename_encoding: Optional[str] = ...
+    fs: LFSFilesystem, path: PathType, flags: Union[str, LFSFileFlag], filename_encoding: Optional[str] = ...
+) -> LFSFile: ...
+def file_open_cfg(
+    fs: LFSFilesystem,
+    path: PathType,
+    flags: Union[str, LFSFileFlag],
+    attrs: Optional[Mapping[int, Union[bytes, bytearray]]] = ...,
+    buffer: Optional[bytearray] = ...,
+    filename_encoding: Optional[str] = ...,
 ) -> LFSFile: ...
-
-# def file_open_cfg(self, path, flags, config): ...
 def file_close(fs: LFSFilesystem, fh: LFSFile) -> int: ...
 def file_sync(fs: LFSFilesystem, fh: LFSFile) -> int: ...
 def file_read(fs: LFSFilesystem, fh: LFSFile, size) -> bytes: ...
@@ -111,10 +163,29 @@ def file_truncate(fs: LFSFilesystem, fh: LFSFile, size) -> int: ...
 def file_tell(fs: LFSFilesystem, fh: LFSFile) -> int: ...
 def file_rewind(fs: LFSFilesystem, fh: LFSFile) -> int: ...
 def file_size(fs: LFSFilesystem, fh: LFSFile) -> int: ...
+def file_read_all(fs: LFSFilesystem, path: PathType, filename_encoding: Optional[str] = ...) -> bytes: ...
+def file_write_all(
+    fs: LFSFilesystem, path: PathType, data, append: bool = ..., filename_encoding: Optional[str] = ...
+) -> int: ...
+def file_copy(
+    fs: LFSFilesystem,
+    src: PathType,
+    dst: PathType,
+    buffer,
+    attr_types: Optional[Iterable[int]] = ...,
+    filename_encoding: Optional[str] = ...,
+) -> int: ...
 
 # Directory Handling
-def mkdir(fs: LFSFilesystem, path: str, filename_encoding: Optional[str] = ...) -> int: ...
-def dir_open(fs: LFSFilesystem, path: str, filename_encoding: Optional[str] = ...) -> LFSDirectory: ...
+def mkdir(fs: LFSFilesystem, path: PathType, filename_encoding: Optional[str] = ...) -> int: ...
+def makedirs(
+    fs: LFSFilesystem,
+    path: PathType,
+    known: Optional[Set[bytes]] = ...,
+    exist_ok: bool = ...,
+    filename_encoding: Optional[str] = ...,
+) -> List[bytes]: ...
+def dir_open(fs: LFSFilesystem, path: PathType, filename_encoding: Optional[str] = ...) -> LFSDirectory: ...
 def dir_close(fs: LFSFilesystem, dh: LFSDirectory) -> int: ...
 def dir_read(fs: LFSFilesystem, dh: LFSDirectory, filename_encoding: Optional[str] = ...) -> Optional[LFSStat]: ...
 def dir_tell(fs: LFSFilesystem, dh: LFSDirectory) -> int: ...
@@ -1,6 +1,8 @@
 import logging
 import enum
+from time import perf_counter_ns
 from typing import NamedTuple
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_FromStringAndSize
 # Import all definitions
 # from littlefs._lfs cimport *
 
@@ -54,26 +56,47 @@ __LFS_DISK_VERSION__ = (LFS_DISK_VERSION_MAJOR, LFS_DISK_VERSION_MINOR)
 
 
 cdef int _lfs_read(const lfs_config *c, lfs_block_t block, lfs_off_t off, void * buffer, lfs_size_t size) noexcept:
-    ctx = <object>c.context
-    data = ctx.user_context.read(ctx, block, off, size)
+    cdef LFSConfig cfg = <LFSConfig>c.context
+    if cfg._profile_hook is not None:
+        start = perf_counter_ns()
+    data = cfg.user_context.read(cfg, block, off, size)
     memcpy(buffer, <char *>data, size)
+    if cfg._profile_hook is not None:
+        cfg._profile_hook("read", start, perf_counter_ns(), block)
     return 0
 
 
 cdef int _lfs_prog(const lfs_config *c, lfs_block_t block, lfs_off_t off, const void * buffer, lfs_size_t size) noexcept:
-    ctx = <object>c.context
+    cdef LFSConfig cfg = <LFSConfig>c.context
+    if cfg._profile_hook is not None:
+        start = perf_counter_ns()
+    _mark_dirty(cfg, block)
     data = (<char*>buffer)[:size]
-    return ctx.user_context.prog(ctx, block, off, data)
+    ret = cfg.user_context.prog(cfg, block, off, data)
+    if cfg._profile_hook is not None:
+        cfg._profile_hook("prog", start, perf_counter_ns(), block)
+    return ret
 
 
 cdef int _lfs_erase(const lfs_config *c, lfs_block_t block) noexcept:
-    ctx = <object>c.context
-    return ctx.user_context.erase(ctx, block)
+    cdef LFSConfig cfg = <LFSConfig>c.context
+    if cfg._profile_hook is not None:
+        start = perf_counter_ns()
+    _mark_dirty(cfg, block)
+    ret = cfg.user_context.erase(cfg, block)
+    if cfg._profile_hook is not None:
+        cfg._profile_hook("erase", start, perf_counter_ns(), block)
+    return ret
 
 
 cdef int _lfs_sync(const lfs_config *c) noexcept:
-    ctx = <object>c.context
-    return ctx.user_context.sync(ctx)
+    cdef LFSConfig cfg = <LFSConfig>c.context
+    if cfg._profile_hook is not None:
+        start = perf_counter_ns()
+    ret = cfg.user_context.sync(cfg)
+    if cfg._profile_hook is not None:
+        cfg._profile_hook("sync", start, perf_counter_ns(), None)
+    return ret
 
 
 cdef int _raise_on_error(int code) except -1:
@@ -87,6 +110,11 @@ cdef class LFSConfig:
 
     cdef lfs_config _impl
     cdef dict __dict__
+    # Bitmap of the blocks programmed or erased since reset_dirty_blocks()
+    cdef unsigned char *_dirty_map
+    cdef lfs_block_t _dirty_map_blocks
+    # Called as hook(name, start_ns, end_ns, block) after each block device callback
+    cdef object _profile_hook
 
     def __cinit__(self):
         self._impl.read = &_lfs_read
@@ -94,6 +122,8 @@ cdef class LFSConfig:
         self._impl.erase = &_lfs_erase
         self._impl.sync = &_lfs_sync
 
+    def __dealloc__(self):
+        free(self._dirty_map)
 
     def __init__(self,
                  context=None,
@@ -206,6 +236,56 @@ cdef class LFSConfig:
         )
         return f"{self.__class__.__name__}({', '.join(args)})"
 
+    def reset_dirty_blocks(self, block_count):
+        """Start (or restart) tracking which blocks are modified
+
+        After this call, every block programmed or erased by littlefs is
+        recorded in a bitmap which can be fetched with :meth:`dirty_blocks`.
+        Tracking is cheap, it is done in C before calling the context.
+        """
+        cdef unsigned char *dirty_map = <unsigned char *>calloc((block_count + 7) // 8 or 1, 1)
+        if dirty_map == NULL:
+            raise MemoryError()
+        free(self._dirty_map)
+        self._dirty_map = dirty_map
+        self._dirty_map_blocks = block_count
+
+    def dirty_blocks(self):
+        """Bitmap of the blocks modified since :meth:`reset_dirty_blocks`
+
+        Block ``n`` was modified if bit ``n % 8`` of byte ``n // 8`` is set.
+        Returns ``None`` if tracking was not started.
+        """
+        if self._dirty_map == NULL:
+            return None
+        return self._dirty_map[:(self._dirty_map_blocks + 7) // 8]
+
+    def mark_dirty(self, block):
+        """Record ``block`` as modified outside of littlefs
+
+        Used for blocks written directly through the context, e.g. by
+        :meth:`littlefs.LittleFS.trim`. Does nothing if tracking was not
+        started.
+        """
+        _mark_dirty(self, block)
+
+    def stop_dirty_blocks(self):
+        """Stop tracking modified blocks"""
+        free(self._dirty_map)
+        self._dirty_map = NULL
+        self._dirty_map_blocks = 0
+
+    def set_profile_hook(self, hook):
+        """Set a function called after each block device callback
+
+        The hook is called as ``hook(name, start_ns, end_ns, block)`` where
+        ``name`` is one of ``"read"``, ``"prog"``, ``"erase"`` or ``"sync"``,
+        the times are :func:`time.perf_counter_ns` values spanning the whole
+        callback, including the conversion of the buffers, and ``block`` is
+        ``None`` for ``"sync"``. Pass ``None`` to remove the hook.
+        """
+        self._profile_hook = hook
+
     @property
     def read_size(self):
         return self._impl.read_size
@@ -255,6 +335,11 @@ cdef class LFSConfig:
         return self._impl.disk_version
 
 
+cdef inline void _mark_dirty(LFSConfig cfg, lfs_block_t block) noexcept:
+    if cfg._dirty_map != NULL and block < cfg._dirty_map_blocks:
+        cfg._dirty_map[block >> 3] |= 1 << (block & 7)
+
+
 cdef class LFSFilesystem:
     cdef lfs_t _impl
 
@@ -262,9 +347,24 @@ cdef class LFSFilesystem:
     def block_count(self) -> lfs_size_t:
         return self._impl.block_count
 
+    @property
+    def inline_max(self) -> lfs_size_t:
+        """Maximum size of files inlined in the metadata of their directory
+
+        Only valid while the filesystem is mounted. 0 if inlining is disabled.
+        """
+        return self._impl.inline_max
+
 
 cdef class LFSFile:
     cdef lfs_file_t _impl
+    # Configuration used by lfs_file_opencfg. littlefs keeps a pointer to it
+    # (and to the buffers it references) until the file is closed.
+    cdef lfs_file_config _cfg
+    cdef list _buffers
+
+    def __dealloc__(self):
+        free(self._cfg.attrs)
 
     @property
     def flags(self) -> LFSFileFlag:
@@ -272,8 +372,156 @@ cdef class LFSFile:
         return LFSFileFlag(self._impl.flags)
 
 
+cdef class LFSDirEntry:
+    """Directory entry yielded when iterating over a :class:`LFSDirectory`
+
+    A compact alternative to :class:`LFSStat`, the name is only decoded when
+    accessed. For compatibility, entries also behave like the
+    ``(type, size, name)`` tuple of an :class:`LFSStat` and compare equal to it.
+    """
+    cdef readonly int type
+    cdef readonly lfs_size_t size
+    cdef bytes _raw_name
+    cdef object _name
+    # Encoding of the name, None to return it as bytes
+    cdef object _encoding
+
+    TYPE_REG = LFS_TYPE_REG
+    TYPE_DIR = LFS_TYPE_DIR
+
+    @property
+    def name(self):
+        if self._name is None:
+            self._name = self._raw_name if self._encoding is None else self._raw_name.decode(self._encoding)
+        return self._name
+
+    def is_file(self):
+        return self.type == LFS_TYPE_REG
+
+    def is_dir(self):
+        return self.type == LFS_TYPE_DIR
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.type, self.size, self.name)[index]
+
+    def __iter__(self):
+        return iter((self.type, self.size, self.name))
+
+    def __eq__(self, other):
+        if isinstance(other, (LFSDirEntry, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"LFSDirEntry(type={self.type}, size={self.size}, name={self.name!r})"
+
+
+cdef LFSDirEntry _dir_entry(lfs_info *info, encoding):
+    cdef LFSDirEntry entry = LFSDirEntry.__new__(LFSDirEntry)
+    entry.type = info.type
+    entry.size = info.size
+    entry._raw_name = info.name
+    entry._encoding = encoding
+    return entry
+
+
 cdef class LFSDirectory:
+    """Open directory
+
+    Iterating over an open directory yields a :class:`LFSDirEntry` per entry,
+    without the ``.`` and ``..`` entries, until the end of the directory is
+    reached.
+    """
     cdef lfs_dir_t _impl
+    # Return entry names as bytes (the directory was opened with a bytes path)
+    cdef bint _bytes_names
+    # Filesystem of the directory while it is open
+    cdef LFSFilesystem _fs
+    cdef object _filename_encoding
+    cdef lfs_info _info
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._fs is None:
+            raise ValueError("I/O operation on closed directory")
+        cdef const char *name = self._info.name
+        while _raise_on_error(lfs_dir_read(&self._fs._impl, &self._impl, &self._info)):
+            if name[0] == b'.' and (name[1] == 0 or (name[1] == b'.' and name[2] == 0)):
+                continue
+            return _dir_entry(&self._info, None if self._bytes_names else self._filename_encoding or FILENAME_ENCODING)
+        raise StopIteration
+
+
+cdef class LFSPath:
+    """Path encoded once for repeated use
+
+    All functions taking a path accept ``str`` (encoded with the filename
+    encoding on every call), ``bytes`` (passed to littlefs as is) or an
+    :class:`LFSPath`, which holds the encoded path and skips the encoding.
+    Names returned for an :class:`LFSPath` have the type of the original
+    path.
+
+    Parameters
+    ----------
+    path : Union[str, bytes, LFSPath]
+        The path to encode.
+    filename_encoding : Optional[str]
+        Encoding of ``str`` paths. Defaults to :data:`FILENAME_ENCODING`.
+    """
+    cdef readonly object path
+    cdef readonly bytes encoded
+
+    def __init__(self, path, filename_encoding=None):
+        if isinstance(path, LFSPath):
+            self.path = (<LFSPath>path).path
+            self.encoded = (<LFSPath>path).encoded
+        else:
+            self.path = path
+            self.encoded = _encode_path(path, filename_encoding)
+
+    def __repr__(self):
+        return f"LFSPath({self.path!r})"
+
+    def __str__(self):
+        if isinstance(self.path, str):
+            return self.path
+        return self.path.decode(FILENAME_ENCODING, "backslashreplace")
+
+    def __eq__(self, other):
+        if isinstance(other, LFSPath):
+            return self.encoded == (<LFSPath>other).encoded
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.encoded)
+
+
+cdef bytes _encode_path(path, filename_encoding):
+    if isinstance(path, LFSPath):
+        return (<LFSPath>path).encoded
+    if isinstance(path, bytes):
+        return path
+    return path.encode(filename_encoding or FILENAME_ENCODING)
+
+
+cdef bint _is_bytes_path(path):
+    if isinstance(path, LFSPath):
+        return isinstance((<LFSPath>path).path, bytes)
+    return isinstance(path, bytes)
+
+
+cdef _decode_name(const char *name, bint as_bytes, filename_encoding):
+    if as_bytes:
+        return <bytes>name
+    return name.decode(filename_encoding or FILENAME_ENCODING)
 
 
 def fs_stat(LFSFilesystem fs):
@@ -296,6 +544,36 @@ def fs_stat(LFSFilesystem fs):
 def fs_size(LFSFilesystem fs):
     return _raise_on_error(lfs_fs_size(&fs._impl))
 
+
+cdef struct _block_map_t:
+    unsigned char *bits
+    lfs_block_t block_count
+
+
+cdef int _lfs_block_map_cb(void *data, lfs_block_t block) noexcept nogil:
+    cdef _block_map_t *block_map = <_block_map_t *>data
+    if block < block_map.block_count:
+        block_map.bits[block >> 3] |= 1 << (block & 7)
+    return 0
+
+
+def fs_block_map(LFSFilesystem fs):
+    """Get a bitmap of the blocks in use
+
+    The filesystem is traversed with ``lfs_fs_traverse`` and every block
+    in use is marked in the returned bitmap, without calling back into
+    Python per block. Block ``n`` is in use if bit ``n % 8`` of byte
+    ``n // 8`` is set.
+    """
+    cdef _block_map_t block_map
+    block_map.block_count = fs._impl.block_count
+    bits = bytearray((block_map.block_count + 7) // 8)
+    cdef unsigned char[::1] bits_view = bits
+    if block_map.block_count:
+        block_map.bits = &bits_view[0]
+        _raise_on_error(lfs_fs_traverse(&fs._impl, &_lfs_block_map_cb, &block_map))
+    return bytes(bits)
+
 def fs_gc(LFSFilesystem fs):
     return _raise_on_error(lfs_fs_gc(&fs._impl))
 
@@ -339,8 +617,7 @@ def remove(LFSFilesystem fs, path, filename_encoding=None):
 
     If removing a directory, the directory must be empty.
     """
-    filename_encoding = filename_encoding or FILENAME_ENCODING
-    return _raise_on_error(lfs_remove(&fs._impl, path.encode(filename_encoding)))
+    return _raise_on_error(lfs_remove(&fs._impl, _encode_path(path, filename_encoding)))
 
 def rename(LFSFilesystem fs, oldpath, newpath, filename_encoding=None):
     """Rename or move a file or directory
@@ -348,95 +625,224 @@ def rename(LFSFilesystem fs, oldpath, newpath, filename_encoding=None):
     If the destination exists, it must match the source in type.
     If the destination is a directory, the directory must be empty.
     """
-    filename_encoding = filename_encoding or FILENAME_ENCODING
-    return _raise_on_error(lfs_rename(&fs._impl, oldpath.encode(filename_encoding),
-                                        newpath.encode(filename_encoding)))
+    return _raise_on_error(lfs_rename(&fs._impl, _encode_path(oldpath, filename_encoding),
+                                        _encode_path(newpath, filename_encoding)))
 
 
 def stat(LFSFilesystem fs, path, filename_encoding=None):
-    """Find info about a file or directory"""
-    filename_encoding = filename_encoding or FILENAME_ENCODING
-    cdef lfs_info * info = <lfs_info *>malloc(sizeof(lfs_info))
+    """Find info about a file or directory
+
+    The name is returned as ``bytes`` if ``path`` is ``bytes``.
+    """
+    cdef lfs_info * info = <lfs_info *>calloc(1, sizeof(lfs_info))
     try:
-        _raise_on_error(lfs_stat(&fs._impl, path.encode(filename_encoding), info))
-        return LFSStat(info.type, info.size, info.name.decode(filename_encoding))
+        _raise_on_error(lfs_stat(&fs._impl, _encode_path(path, filename_encoding), info))
+        return _stat_result(info, path, filename_encoding)
     finally:
         free(info)
 
 
+def try_stat(LFSFilesystem fs, path, filename_encoding=None):
+    """Find info about a file or directory, ``None`` if it does not exist
+
+    Works like :func:`stat`, but returns ``None`` instead of raising an error
+    if the path does not exist or one of its parents is not a directory.
+    """
+    cdef lfs_info info
+    memset(&info, 0, sizeof(info))
+    cdef int err = lfs_stat(&fs._impl, _encode_path(path, filename_encoding), &info)
+    if err == LFS_ERR_NOENT or err == LFS_ERR_NOTDIR:
+        return None
+    _raise_on_error(err)
+    return _stat_result(&info, path, filename_encoding)
+
+
+cdef _stat_result(lfs_info *info, path, filename_encoding):
+    # lfs_stat only sets the size of files, directories report 0 like in
+    # the entries read from their parent directory
+    cdef lfs_size_t size = 0 if info.type == LFS_TYPE_DIR else info.size
+    return LFSStat(info.type, size, _decode_name(info.name, _is_bytes_path(path), filename_encoding))
+
+
+# Attribute values are read into a scratch buffer on the stack of each call
+# and copied out into exact-size ``bytes`` objects. A buffer shared between
+# calls could be overwritten by another thread while the block device
+# callbacks run Python code.
 def getattr(LFSFilesystem fs, path, typ, filename_encoding=None):
-    filename_encoding = filename_encoding or FILENAME_ENCODING
-    buf = bytearray(LFS_ATTR_MAX)
-    cdef unsigned char[::1] buf_view = buf
-    attr_size = _raise_on_error(lfs_getattr(&fs._impl, path.encode(filename_encoding), typ, &buf_view[0], LFS_ATTR_MAX))
-    return bytes(buf[:attr_size])
+    cdef unsigned char attr_buffer[LFS_ATTR_MAX]
+    attr_size = _raise_on_error(lfs_getattr(&fs._impl, _encode_path(path, filename_encoding), typ, attr_buffer, LFS_ATTR_MAX))
+    return attr_buffer[:attr_size]
+
+
+cdef list _read_attrs(LFSFilesystem fs, const char *path, types):
+    """Read the custom attributes of ``types`` which are set as (type, value) pairs
+
+    littlefs cannot enumerate attributes, if ``types`` is None all 256 types
+    are looked up in a loop which does not touch Python objects.
+    """
+    cdef unsigned char attr_buffer[LFS_ATTR_MAX]
+    cdef lfs_ssize_t attr_size
+    cdef list type_list = None if types is None else list(types)
+    cdef Py_ssize_t count = 256 if type_list is None else len(type_list)
+    cdef Py_ssize_t i
+    cdef uint8_t typ
+    attrs = []
+    for i in range(count):
+        typ = i if type_list is None else type_list[i]
+        attr_size = lfs_getattr(&fs._impl, path, typ, attr_buffer, LFS_ATTR_MAX)
+        if attr_size == LFS_ERR_NOATTR:
+            continue
+        _raise_on_error(attr_size)
+        attrs.append((typ, attr_buffer[:attr_size]))
+    return attrs
+
+
+def getattrs(LFSFilesystem fs, path, types=None, filename_encoding=None):
+    """Get several custom attributes of a file or directory
+
+    The path is encoded only once and all values are read through the same
+    scratch buffer. Returns a dict mapping each requested type to its value,
+    attributes which are not set are left out. All 256 types are looked up
+    if ``types`` is None.
+    """
+    return dict(_read_attrs(fs, _encode_path(path, filename_encoding), types))
 
 
 def setattr(LFSFilesystem fs, path, typ, data, filename_encoding=None):
-    filename_encoding = filename_encoding or FILENAME_ENCODING
     cdef const unsigned char[::1] buf_view = data
-    _raise_on_error(lfs_setattr(&fs._impl, path.encode(filename_encoding), typ, &buf_view[0], len(data)))
+    _raise_on_error(lfs_setattr(&fs._impl, _encode_path(path, filename_encoding), typ, &buf_view[0], len(data)))
 
 
-def removeattr(LFSFilesystem fs, path, typ, filename_encoding=None):
-    filename_encoding = filename_encoding or FILENAME_ENCODING
-    _raise_on_error(lfs_removeattr(&fs._impl, path.encode(filename_encoding), typ))
+def setattrs(LFSFilesystem fs, path, attrs, filename_encoding=None):
+    """Set several custom attributes of a file or directory
+
+    ``attrs`` maps attribute types to their values. The path is encoded only
+    once. Note that littlefs commits each attribute separately, use
+    :func:`file_open_cfg` if the attributes must be written atomically.
+    """
+    cdef bytes c_path = _encode_path(path, filename_encoding)
+    cdef const unsigned char[::1] buf_view
+    for typ, data in attrs.items():
+        buf_view = data
+        _raise_on_error(lfs_setattr(&fs._impl, c_path, typ, &buf_view[0], len(data)))
 
 
-def file_open(LFSFilesystem fs, path, flags, filename_encoding=None):
-    if isinstance(flags, str):
-        creating = False
-        reading = False
-        writing = False
-        appending = False
-        updating = False
-
-        for ch in flags:
-            if ch == "x":
-                creating = True
-            elif ch == "r":
-                reading = True
-            elif ch == "w":
-                writing = True
-            elif ch == "a":
-                appending = True
-            elif ch == "+":
-                updating = True
-            elif ch in ("t", "b"):
-                # lfs_file_open() always opens files in binary mode.
-                # Text decoding is done at a higher level.
-                pass
-            else:
-                raise ValueError(f"invalid mode: '{flags}'")
+def removeattr(LFSFilesystem fs, path, typ, filename_encoding=None):
+    _raise_on_error(lfs_removeattr(&fs._impl, _encode_path(path, filename_encoding), typ))
+
+
+def _flags_from_mode(flags):
+    """Convert a mode string as used by :func:`open` to :class:`LFSFileFlag`"""
+    if not isinstance(flags, str):
+        return flags
+
+    creating = False
+    reading = False
+    writing = False
+    appending = False
+    updating = False
+
+    for ch in flags:
+        if ch == "x":
+            creating = True
+        elif ch == "r":
+            reading = True
+        elif ch == "w":
+            writing = True
+        elif ch == "a":
+            appending = True
+        elif ch == "+":
+            updating = True
+        elif ch in ("t", "b"):
+            # lfs_file_open() always opens files in binary mode.
+            # Text decoding is done at a higher level.
+            pass
+        else:
+            raise ValueError(f"invalid mode: '{flags}'")
+
+    exclusive_modes = (creating, reading, writing, appending)
+
+    if sum(int(m) for m in exclusive_modes) > 1:
+        raise ValueError(
+            "must have exactly one of create/read/write/append mode"
+        )
 
-        exclusive_modes = (creating, reading, writing, appending)
+    if creating:
+        flags = LFSFileFlag.creat | LFSFileFlag.excl | LFSFileFlag.wronly
+    elif reading:
+        flags = LFSFileFlag.rdonly
+    elif writing:
+        flags = LFSFileFlag.creat | LFSFileFlag.wronly | LFSFileFlag.trunc
+    elif appending:
+        flags = LFSFileFlag.wronly | LFSFileFlag.append
 
-        if sum(int(m) for m in exclusive_modes) > 1:
-            raise ValueError(
-                "must have exactly one of create/read/write/append mode"
-            )
+    if updating:
+        flags |= LFSFileFlag.rdwr
 
-        if creating:
-            flags = LFSFileFlag.creat | LFSFileFlag.excl | LFSFileFlag.wronly
-        elif reading:
-            flags = LFSFileFlag.rdonly
-        elif writing:
-            flags = LFSFileFlag.creat | LFSFileFlag.wronly | LFSFileFlag.trunc
-        elif appending:
-            flags = LFSFileFlag.wronly | LFSFileFlag.append
+    return flags
 
-        if updating:
-            flags |= LFSFileFlag.rdwr
 
-    flags = int(flags)
-    filename_encoding = filename_encoding or FILENAME_ENCODING
+def file_open(LFSFilesystem fs, path, flags, filename_encoding=None):
+    flags = int(_flags_from_mode(flags))
     fh = LFSFile()
-    _raise_on_error(lfs_file_open(&fs._impl, &fh._impl, path.encode(filename_encoding), flags))
+    _raise_on_error(lfs_file_open(&fs._impl, &fh._impl, _encode_path(path, filename_encoding), flags))
     return fh
 
 
-def file_open_cfg(self, path, flags, config):
-    raise NotImplementedError
+def file_open_cfg(LFSFilesystem fs, path, flags, attrs=None, buffer=None, filename_encoding=None):
+    """Open a file with additional per-file configuration
+
+    Parameters
+    ----------
+    attrs : Optional[Mapping[int, bytearray]]
+        Custom attributes bound to the file. When the file is opened for
+        reading, the attributes stored on disk are read into the buffers
+        (missing attributes leave the buffer untouched, shorter ones are
+        zero padded). When the file is opened for writing, the content of
+        the buffers is written together with the file data in the same
+        metadata commit on sync / close. Pass a ``bytearray`` to access the
+        read values or to change them while the file is open, ``bytes``
+        values are copied.
+    buffer : Optional[bytearray]
+        File cache buffer of at least ``cache_size`` bytes. By default
+        littlefs allocates the cache on every open. A buffer must not be
+        shared between files which are open at the same time.
+    """
+    flags = int(_flags_from_mode(flags))
+    cdef bytes c_path = _encode_path(path, filename_encoding)
+    fh = LFSFile()
+    fh._buffers = []
+    cdef unsigned char[::1] view
+    cdef lfs_size_t i = 0
+
+    if buffer is not None:
+        if len(buffer) < fs._impl.cfg.cache_size:
+            raise ValueError(f"buffer must be at least cache_size ({fs._impl.cfg.cache_size}) bytes")
+        # Holding the memoryview prevents a bytearray from being resized.
+        fh._buffers.append(memoryview(buffer))
+        view = buffer
+        fh._cfg.buffer = &view[0]
+
+    if attrs:
+        fh._cfg.attrs = <lfs_attr *>malloc(len(attrs) * sizeof(lfs_attr))
+        if fh._cfg.attrs == NULL:
+            raise MemoryError()
+        for typ, data in attrs.items():
+            if isinstance(data, bytes):
+                data = bytearray(data)
+            fh._buffers.append(memoryview(data))
+            fh._cfg.attrs[i].type = typ
+            fh._cfg.attrs[i].size = len(data)
+            if len(data):
+                view = data
+                fh._cfg.attrs[i].buffer = &view[0]
+            else:
+                fh._cfg.attrs[i].buffer = NULL
+            i += 1
+        fh._cfg.attr_count = i
+
+    _raise_on_error(lfs_file_opencfg(&fs._impl, &fh._impl, c_path, flags, &fh._cfg))
+    return fh
 
 
 def file_close(LFSFilesystem fs, LFSFile fh):
@@ -482,27 +888,186 @@ def file_rewind(LFSFilesystem fs, LFSFile fh):
 def file_size(LFSFilesystem fs, LFSFile fh):
     return _raise_on_error(lfs_file_size(&fs._impl, &fh._impl))
 
+
+def file_read_all(LFSFilesystem fs, path, filename_encoding=None):
+    """Read a whole file
+
+    Opens, reads and closes the file in a single call, without creating a
+    file handle. The content is read directly into a ``bytes`` object of the
+    file size.
+    """
+    cdef lfs_file_t fh
+    cdef lfs_ssize_t size
+    cdef lfs_ssize_t rsize
+    _raise_on_error(lfs_file_open(&fs._impl, &fh, _encode_path(path, filename_encoding), LFS_O_RDONLY))
+    try:
+        size = _raise_on_error(lfs_file_size(&fs._impl, &fh))
+        data = PyBytes_FromStringAndSize(NULL, size)
+        rsize = _raise_on_error(lfs_file_read(&fs._impl, &fh, PyBytes_AS_STRING(data), size))
+    except:
+        lfs_file_close(&fs._impl, &fh)
+        raise
+    _raise_on_error(lfs_file_close(&fs._impl, &fh))
+    return data if rsize == size else data[:rsize]
+
+
+def file_write_all(LFSFilesystem fs, path, data, bint append=False, filename_encoding=None):
+    """Write a whole file
+
+    Opens, writes and closes the file in a single call, without creating a
+    file handle. The file is created if needed and truncated unless
+    ``append`` is set. ``data`` is any contiguous buffer. The data is
+    committed when the file is closed, before this function returns.
+    """
+    cdef const unsigned char[::1] view = data
+    cdef lfs_file_t fh
+    cdef int flags = LFS_O_WRONLY | LFS_O_CREAT | (LFS_O_APPEND if append else LFS_O_TRUNC)
+    _raise_on_error(lfs_file_open(&fs._impl, &fh, _encode_path(path, filename_encoding), flags))
+    try:
+        if view.shape[0]:
+            _raise_on_error(lfs_file_write(&fs._impl, &fh, &view[0], view.shape[0]))
+    except:
+        lfs_file_close(&fs._impl, &fh)
+        raise
+    _raise_on_error(lfs_file_close(&fs._impl, &fh))
+    return view.shape[0]
+
+def file_copy(LFSFilesystem fs, src, dst, buffer, attr_types=None, filename_encoding=None):
+    """Copy a file within the filesystem
+
+    The data is copied in chunks through ``buffer``, any writable buffer,
+    without creating file handles, so memory use is bounded by the buffer
+    size. The custom attributes of ``attr_types`` which are set on ``src``
+    are written to ``dst`` in the same metadata commit as its data when it
+    is closed, all types are looked up if ``attr_types`` is None. ``dst`` is
+    created or truncated. Returns the number of bytes copied.
+    """
+    cdef unsigned char[::1] view = buffer
+    cdef bytes c_src = _encode_path(src, filename_encoding)
+    cdef bytes c_dst = _encode_path(dst, filename_encoding)
+    cdef lfs_file_t src_fh
+    cdef lfs_file_t dst_fh
+    cdef lfs_file_config cfg
+    cdef lfs_ssize_t rsize
+    cdef lfs_size_t i = 0
+    total = 0
+    if view.shape[0] == 0:
+        raise ValueError("buffer must not be empty")
+
+    attrs = _read_attrs(fs, c_src, attr_types)
+
+    cfg.buffer = NULL
+    cfg.attrs = NULL
+    cfg.attr_count = 0
+    if attrs:
+        cfg.attrs = <lfs_attr *>malloc(len(attrs) * sizeof(lfs_attr))
+        if cfg.attrs == NULL:
+            raise MemoryError()
+        # The file is write-only, littlefs only reads from the buffers
+        for typ, data in attrs:
+            cfg.attrs[i].type = typ
+            cfg.attrs[i].size = len(data)
+            cfg.attrs[i].buffer = PyBytes_AS_STRING(data) if len(data) else NULL
+            i += 1
+        cfg.attr_count = i
+
+    try:
+        _raise_on_error(lfs_file_open(&fs._impl, &src_fh, c_src, LFS_O_RDONLY))
+        try:
+            _raise_on_error(lfs_file_opencfg(&fs._impl, &dst_fh, c_dst, LFS_O_WRONLY | LFS_O_CREAT | LFS_O_TRUNC, &cfg))
+            try:
+                while True:
+                    rsize = _raise_on_error(lfs_file_read(&fs._impl, &src_fh, &view[0], view.shape[0]))
+                    if rsize == 0:
+                        break
+                    _raise_on_error(lfs_file_write(&fs._impl, &dst_fh, &view[0], rsize))
+                    total += rsize
+            except:
+                lfs_file_close(&fs._impl, &dst_fh)
+                raise
+            _raise_on_error(lfs_file_close(&fs._impl, &dst_fh))
+        finally:
+            lfs_file_close(&fs._impl, &src_fh)
+    finally:
+        free(cfg.attrs)
+    return total
+
+
 def mkdir(LFSFilesystem fs, path, filename_encoding=None):
-    filename_encoding = filename_encoding or FILENAME_ENCODING
-    return _raise_on_error(lfs_mkdir(&fs._impl, path.encode(filename_encoding)))
+    return _raise_on_error(lfs_mkdir(&fs._impl, _encode_path(path, filename_encoding)))
+
+def makedirs(LFSFilesystem fs, path, set known=None, bint exist_ok=False, filename_encoding=None):
+    """Create a directory and all missing parents
+
+    Every level is created with a single ``lfs_mkdir`` call, an existing
+    level is detected by its ``LFS_ERR_EXIST`` result. Only if ``path``
+    itself exists, it is looked up to check that it is a directory.
+
+    Parameters
+    ----------
+    known : Optional[set]
+        Encoded absolute paths (``b"/a/b"``) of directories known to exist.
+        These levels are skipped without any littlefs call. The set is
+        updated with all levels found or created, share it between calls
+        for paths with common prefixes.
+    exist_ok : bool
+        Do not raise ``LFS_ERR_EXIST`` if ``path`` is an existing directory.
+
+    Returns the encoded paths of the created directories.
+    """
+    cdef bytes encoded = _encode_path(path, filename_encoding)
+    cdef bytes prefix = b""
+    cdef lfs_info info
+    cdef int err
+    if known is None:
+        known = set()
+    created = []
+    parts = [part for part in encoded.split(b"/") if part]
+    last = len(parts) - 1
+    for i, part in enumerate(parts):
+        prefix += b"/" + part
+        if prefix in known:
+            if i == last and not exist_ok:
+                raise errors.LittleFSError(LFS_ERR_EXIST)
+            continue
+        err = lfs_mkdir(&fs._impl, prefix)
+        if err == LFS_ERR_EXIST:
+            if i == last:
+                _raise_on_error(lfs_stat(&fs._impl, prefix, &info))
+                if not exist_ok or info.type != LFS_TYPE_DIR:
+                    raise errors.LittleFSError(LFS_ERR_EXIST)
+        else:
+            _raise_on_error(err)
+            created.append(prefix)
+        # An existing intermediate level which is not a directory makes the
+        # mkdir of the next level fail, so only directories stay in ``known``.
+        known.add(prefix)
+    return created
 
 def dir_open(LFSFilesystem fs, path, filename_encoding=None):
-    filename_encoding = filename_encoding or FILENAME_ENCODING
+    """Open a directory
+
+    The entry names are returned as ``bytes`` by :func:`dir_read` if
+    ``path`` is ``bytes``.
+    """
     handle = LFSDirectory()
-    _raise_on_error(lfs_dir_open(&fs._impl, &handle._impl, path.encode(filename_encoding)))
+    _raise_on_error(lfs_dir_open(&fs._impl, &handle._impl, _encode_path(path, filename_encoding)))
+    handle._bytes_names = _is_bytes_path(path)
+    handle._fs = fs
+    handle._filename_encoding = filename_encoding
     return handle
 
 def dir_close(LFSFilesystem fs, LFSDirectory dh):
+    dh._fs = None
     return _raise_on_error(lfs_dir_close(&fs._impl, &dh._impl))
 
 def dir_read(LFSFilesystem fs, LFSDirectory dh, filename_encoding=None):
-    filename_encoding = filename_encoding or FILENAME_ENCODING
     cdef lfs_info * info = <lfs_info *>malloc(sizeof(lfs_info))
     try:
         retval = _raise_on_error(lfs_dir_read(&fs._impl, &dh._impl, info))
         if retval == 0:
             return None
-        return LFSStat(info.type, info.size, info.name.decode(filename_encoding))
+        return LFSStat(info.type, info.size, _decode_name(info.name, dh._bytes_names, filename_encoding))
     finally:
         free(info)
 
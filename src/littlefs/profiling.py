@@ -0,0 +1,332 @@
+"""Profiling of filesystem operations
+
+A :class:`Profiler` records the wall time of the operations on a
+:class:`~littlefs.LittleFS` instance on several levels:
+
+- ``fs``: the methods of the filesystem (``open``, ``stat``, ...)
+- ``io``: the methods of the buffered or text file objects returned by
+  :meth:`~littlefs.LittleFS.open`
+- ``file``: the methods of the raw :class:`~littlefs.FileHandle`, i.e. the
+  calls into littlefs
+- ``block``: the block device callbacks invoked by littlefs, including the
+  conversion of the buffers
+- ``context``: the methods of the user context implementing the callbacks
+
+The self time of an operation excludes the time spent in the operations it
+called. The self time of ``file`` operations is therefore the time spent in
+the littlefs C code, the self time of ``block`` callbacks is the overhead of
+calling into Python and the self time of ``io`` operations is the overhead
+of the :mod:`io` wrappers. Methods returning a generator, like ``walk``
+and ``scandir``, are recorded once for the call, and every item they
+produce is recorded separately as ``<name>.next`` (e.g. ``walk.next``).
+
+Profiling works by wrapping the methods of the profiled instances, nothing
+is recorded and no overhead is added while no profiler is active::
+
+    with fs.profile() as profiler:
+        with fs.open("data.bin", "wb") as fh:
+            fh.write(b"...")
+
+    print(profiler.summary())
+    profiler.write_chrome_trace("trace.json")
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import types
+import typing
+from typing import Any, Callable, Dict, Generator, IO, List, NamedTuple, Optional, Tuple, Union
+
+if typing.TYPE_CHECKING:
+    from . import LittleFS
+
+
+_PROFILED_FS_METHODS = (
+    "format",
+    "mount",
+    "unmount",
+    "fs_mkconsistent",
+    "fs_grow",
+    "fs_stat",
+    "fs_gc",
+    "block_map",
+    "trim",
+    "snapshot",
+    "restore",
+    "append_log",
+    "copy",
+    "copytree",
+    "du",
+    "exists",
+    "find",
+    "getattr",
+    "setattr",
+    "getattrs",
+    "glob",
+    "iglob",
+    "isdir",
+    "isfile",
+    "setattrs",
+    "removeattr",
+    "listdir",
+    "read_bytes",
+    "read_text",
+    "write_bytes",
+    "write_text",
+    "mkdir",
+    "makedirs",
+    "makedirs_many",
+    "remove",
+    "removedirs",
+    "rename",
+    "rmdir",
+    "scandir",
+    "stat",
+    "try_stat",
+    "unlink",
+    "walk",
+    "walkattrs",
+)
+_PROFILED_FILE_METHODS = ("readinto", "readall", "write", "flush", "seek", "tell", "truncate", "close")
+_PROFILED_IO_METHODS = (
+    "read",
+    "read1",
+    "readinto",
+    "readline",
+    "readlines",
+    "write",
+    "writelines",
+    "flush",
+    "seek",
+    "truncate",
+    "close",
+)
+_PROFILED_CONTEXT_METHODS = ("read", "prog", "erase", "sync")
+_MISSING = object()
+
+
+class ProfileEvent(NamedTuple):
+    """A recorded operation"""
+
+    category: str
+    name: str
+    start_ns: int
+    end_ns: int
+    thread_id: int
+
+
+class ProfileStats(NamedTuple):
+    """Aggregated timing of an operation"""
+
+    category: str
+    name: str
+    calls: int
+    total_ns: int
+    self_ns: int
+    max_ns: int
+
+
+class Profiler:
+    """Record the operations on a filesystem while active
+
+    Use :meth:`littlefs.LittleFS.profile` to create a profiler. The profiler
+    is activated as a context manager and may be activated repeatedly, the
+    events are accumulated.
+    """
+
+    def __init__(self, fs: "LittleFS") -> None:
+        self.fs = fs
+        self.events: List[ProfileEvent] = []
+        self._active = False
+        self._patched: List[Tuple[Any, str, Any]] = []
+
+    def __enter__(self) -> "Profiler":
+        if self._active:
+            raise RuntimeError("Profiler is already active")
+        self._active = True
+        for method in _PROFILED_FS_METHODS:
+            self._patch(self.fs, method, "fs")
+        self._patch(self.fs, "open", "fs", self._wrap_open)
+        for method in _PROFILED_CONTEXT_METHODS:
+            self._patch(self.fs.context, method, "context")
+        self.fs.cfg.set_profile_hook(self._record_block)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fs.cfg.set_profile_hook(None)
+        # Restore in reverse order in case a method was patched twice
+        for obj, name, original in reversed(self._patched):
+            if original is _MISSING:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+        self._patched.clear()
+        self._active = False
+
+    def _record(self, category: str, name: str, start_ns: int, end_ns: int) -> None:
+        if self._active:
+            self.events.append(ProfileEvent(category, name, start_ns, end_ns, threading.get_ident()))
+
+    def _record_block(self, name: str, start_ns: int, end_ns: int, block: Optional[int]) -> None:
+        self._record("block", name, start_ns, end_ns)
+
+    def _timed(self, category: str, name: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self._record(category, name, start, time.perf_counter_ns())
+            if isinstance(result, types.GeneratorType):
+                return self._timed_generator(category, name, result)
+            return result
+
+        return wrapper
+
+    def _timed_generator(self, category: str, name: str, gen: Generator) -> Generator:
+        # Resumptions are not calls, keep them apart from the call count
+        next_name = f"{name}.next"
+        try:
+            while True:
+                start = time.perf_counter_ns()
+                try:
+                    item = next(gen)
+                except StopIteration:
+                    return
+                finally:
+                    self._record(category, next_name, start, time.perf_counter_ns())
+                yield item
+        finally:
+            gen.close()
+
+    def _patch(self, obj: Any, name: str, category: str, wrap: Optional[Callable] = None) -> None:
+        func = getattr(obj, name)
+        wrapper = self._timed(category, name, func)
+        self._patched.append((obj, name, vars(obj).get(name, _MISSING)))
+        setattr(obj, name, wrap(wrapper) if wrap else wrapper)
+
+    def _wrap_open(self, open_func: Callable) -> Callable:
+        from . import FileHandle
+
+        @functools.wraps(open_func)
+        def wrapper(*args, **kwargs):
+            fh = open_func(*args, **kwargs)
+            raw = fh
+            while not isinstance(raw, FileHandle):
+                raw = raw.buffer if hasattr(raw, "buffer") else raw.raw
+            for method in _PROFILED_FILE_METHODS:
+                setattr(raw, method, self._timed("file", method, getattr(raw, method)))
+            return fh if fh is raw else _ProfiledIO(self, fh)
+
+        return wrapper
+
+    def stats(self) -> List[ProfileStats]:
+        """Aggregate the recorded events per category and name
+
+        The result is sorted by descending total time.
+        """
+        totals: Dict[Tuple[str, str], List[int]] = {}
+        for event, self_ns in zip(self.events, self._self_times()):
+            entry = totals.setdefault((event.category, event.name), [0, 0, 0, 0])
+            duration = event.end_ns - event.start_ns
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] += self_ns
+            entry[3] = max(entry[3], duration)
+        stats = [ProfileStats(category, name, *values) for (category, name), values in totals.items()]
+        return sorted(stats, key=lambda st: st.total_ns, reverse=True)
+
+    def _self_times(self) -> List[int]:
+        """Duration of each event minus the duration of its direct children"""
+        self_times = [event.end_ns - event.start_ns for event in self.events]
+        order = sorted(
+            range(len(self.events)),
+            key=lambda i: (self.events[i].thread_id, self.events[i].start_ns, -self.events[i].end_ns),
+        )
+        stack: List[int] = []
+        for i in order:
+            event = self.events[i]
+            while stack and (
+                self.events[stack[-1]].thread_id != event.thread_id or self.events[stack[-1]].end_ns < event.end_ns
+            ):
+                stack.pop()
+            if stack:
+                self_times[stack[-1]] -= event.end_ns - event.start_ns
+            stack.append(i)
+        return self_times
+
+    def summary(self) -> str:
+        """Format the aggregated timings as a table"""
+        lines = [
+            f"{'category':<8} {'op':<16} {'calls':>8} {'total ms':>10} {'self ms':>10} {'mean us':>10} {'max us':>10}"
+        ]
+        for st in self.stats():
+            lines.append(
+                f"{st.category:<8} {st.name:<16} {st.calls:8d} {st.total_ns / 1e6:10.3f} {st.self_ns / 1e6:10.3f} "
+                f"{st.total_ns / st.calls / 1e3:10.1f} {st.max_ns / 1e3:10.1f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The recorded events in the Chrome trace event format
+
+        The result can be loaded into ``chrome://tracing`` or Perfetto after
+        serializing it as JSON, see :meth:`write_chrome_trace`.
+        """
+        pid = os.getpid()
+        origin = min((event.start_ns for event in self.events), default=0)
+        trace_events = [
+            {
+                "name": event.name,
+                "cat": event.category,
+                "ph": "X",
+                "ts": (event.start_ns - origin) / 1e3,
+                "dur": (event.end_ns - event.start_ns) / 1e3,
+                "pid": pid,
+                "tid": event.thread_id,
+            }
+            for event in self.events
+        ]
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, file: Union[str, IO[str]]) -> None:
+        """Write the Chrome trace of the recorded events to a path or text file"""
+        if isinstance(file, str):
+            with open(file, "w") as fh:
+                json.dump(self.chrome_trace(), fh)
+        else:
+            json.dump(self.chrome_trace(), file)
+
+
+class _ProfiledIO:
+    """Proxy for buffered and text file objects timing their methods"""
+
+    def __init__(self, profiler: Profiler, fileobj: IO) -> None:
+        self._fileobj = fileobj
+        for method in _PROFILED_IO_METHODS:
+            if hasattr(fileobj, method):
+                setattr(self, method, profiler._timed("io", method, getattr(fileobj, method)))
+        self._next = profiler._timed("io", "next", fileobj.__next__)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._fileobj, name)
+
+    def __enter__(self) -> "_ProfiledIO":
+        self._fileobj.__enter__()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()  # type: ignore[attr-defined]
+
+    def __iter__(self) -> "_ProfiledIO":
+        return self
+
+    def __next__(self) -> Any:
+        return self._next()
+
+    def __repr__(self) -> str:
+        return repr(self._fileobj)
@@ -0,0 +1,561 @@
+"""Simulation of littlefs on flash devices
+
+These tools run a workload against in-memory contexts to evaluate
+configurations without hardware. A workload is either a callable taking
+the mounted :class:`~littlefs.LittleFS`, or a script: a sequence of
+operations as accepted by :func:`run_script`.
+"""
+
+import functools
+import itertools
+import os
+import time
+import typing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from . import FileHandle, LittleFS
+from .context import UserContext
+
+if typing.TYPE_CHECKING:
+    from .lfs import LFSConfig
+
+
+Script = Iterable[Tuple[Any, ...]]
+Workload = Union[Callable[[LittleFS], None], Script]
+
+
+def run_script(fs: LittleFS, script: Script) -> None:
+    """Run a scripted workload
+
+    Each operation is a tuple of the operation name and its arguments:
+
+    - ``("write", path, data)``: (over)write a file. ``data`` is ``bytes``
+      or the number of bytes to write.
+    - ``("append", path, data)``: append to an existing file.
+    - ``("read", path)``: read a file completely.
+    - ``("remove", path)``, ``("mkdir", path)``, ``("makedirs", path)``
+    - ``("rename", src, dst)``
+    """
+    for op, *args in script:
+        if op in ("write", "append"):
+            path, data = args
+            if isinstance(data, int):
+                data = b"\xa5" * data
+            with fs.open(path, "wb" if op == "write" else "ab") as fh:
+                fh.write(data)
+        elif op == "read":
+            with fs.open(args[0], "rb") as fh:
+                fh.read()
+        elif op == "makedirs":
+            fs.makedirs(args[0], exist_ok=True)
+        elif op in ("remove", "mkdir", "rename"):
+            getattr(fs, op)(*args)
+        else:
+            raise ValueError(f"Unknown operation '{op}'")
+
+
+def _run_workload(fs: LittleFS, workload: Workload) -> None:
+    if callable(workload):
+        workload(fs)
+    else:
+        run_script(fs, workload)
+
+
+class UserContextWear(UserContext):
+    """In-memory context counting the erase cycles of each block"""
+
+    def __init__(self, buffsize: Optional[int] = None, buffer: Optional[bytearray] = None) -> None:
+        super().__init__(buffsize, buffer)
+        self.erase_counts = array("L")
+
+    def erase(self, cfg: "LFSConfig", block: int) -> int:
+        if not self.erase_counts:
+            self.erase_counts = array("L", [0]) * (len(self.buffer) // cfg.block_size)
+        self.erase_counts[block] += 1
+        return super().erase(cfg, block)
+
+    def reset(self) -> None:
+        """Reset all erase counts to zero"""
+        self.erase_counts = array("L", [0]) * len(self.erase_counts)
+
+
+class WearReport(NamedTuple):
+    """Result of :func:`simulate_wear` for a single configuration"""
+
+    config: Mapping[str, Any]
+    erase_counts: Sequence[int]
+    max_erases: int
+    mean_erases: float
+    total_erases: int
+    elapsed: float
+    """Wall time of the workload in seconds"""
+    iterations_per_second: float
+
+
+def simulate_wear(workload: Workload, configs: Iterable[Mapping[str, Any]], iterations: int = 1) -> List[WearReport]:
+    """Run a workload on each configuration and report the erase counts
+
+    Parameters
+    ----------
+    workload : Workload
+        Callable or script (see :func:`run_script`), run ``iterations``
+        times on a freshly formatted filesystem.
+    configs : Iterable[Mapping[str, Any]]
+        Keyword arguments for :class:`~littlefs.LittleFS`, e.g.
+        ``{"block_size": 4096, "block_count": 256, "block_cycles": 100}``.
+        Erases caused by formatting are not counted.
+    """
+    reports = []
+    for config in configs:
+        config = dict(config)
+        context = UserContextWear(config["block_size"] * config["block_count"])
+        fs = LittleFS(context=context, **config)
+        context.reset()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            _run_workload(fs, workload)
+        elapsed = time.perf_counter() - start
+        counts = context.erase_counts.tolist() or [0] * config["block_count"]
+        total = sum(counts)
+        reports.append(
+            WearReport(
+                config,
+                counts,
+                max(counts),
+                total / len(counts),
+                total,
+                elapsed,
+                iterations / elapsed if elapsed else float("inf"),
+            )
+        )
+    return reports
+
+
+def _format_config(config: Mapping[str, Any]) -> str:
+    return " ".join(f"{key}={value}" for key, value in config.items())
+
+
+def format_wear_report(reports: Iterable[WearReport]) -> str:
+    """Format wear reports as a table"""
+    lines = [f"{'max':>8} {'mean':>10} {'total':>10} {'iter/s':>10}  config"]
+    for report in reports:
+        lines.append(
+            f"{report.max_erases:8d} {report.mean_erases:10.2f} {report.total_erases:10d} "
+            f"{report.iterations_per_second:10.1f}  {_format_config(report.config)}"
+        )
+    return "\n".join(lines)
+
+
+class FlashTimingModel(NamedTuple):
+    """Cost model of a flash device, all values in microseconds
+
+    For example, a typical SPI NOR flash with 4 KiB sectors could be modeled
+    as ``FlashTimingModel(read_op_us=1, read_byte_us=0.02, prog_op_us=10,
+    prog_byte_us=2.7, erase_us=45000)``.
+    """
+
+    read_op_us: float = 0.0
+    """Fixed cost of a read operation"""
+    read_byte_us: float = 0.0
+    """Cost per byte read"""
+    prog_op_us: float = 0.0
+    """Fixed cost of a program operation"""
+    prog_byte_us: float = 0.0
+    """Cost per byte programmed"""
+    erase_us: float = 0.0
+    """Cost of erasing a block"""
+    sync_us: float = 0.0
+    """Cost of a sync"""
+
+
+class UserContextTimed(UserContext):
+    """Context decorator accumulating virtual time according to a cost model
+
+    All operations are forwarded to ``context``. :attr:`elapsed_us` holds
+    the virtual time spent in the device so far.
+    """
+
+    def __init__(self, context: UserContext, model: FlashTimingModel) -> None:
+        self.context = context
+        self.model = model
+        self.in_size = context.in_size
+        self.elapsed_us = 0.0
+
+    @property
+    def buffer(self) -> bytearray:
+        return self.context.buffer
+
+    @buffer.setter
+    def buffer(self, value: bytearray) -> None:
+        self.context.buffer = value
+
+    def read(self, cfg: "LFSConfig", block: int, off: int, size: int) -> bytearray:
+        self.elapsed_us += self.model.read_op_us + size * self.model.read_byte_us
+        return self.context.read(cfg, block, off, size)
+
+    def prog(self, cfg: "LFSConfig", block: int, off: int, data: bytes) -> int:
+        self.elapsed_us += self.model.prog_op_us + len(data) * self.model.prog_byte_us
+        return self.context.prog(cfg, block, off, data)
+
+    def erase(self, cfg: "LFSConfig", block: int) -> int:
+        self.elapsed_us += self.model.erase_us
+        return self.context.erase(cfg, block)
+
+    def sync(self, cfg: "LFSConfig") -> int:
+        self.elapsed_us += self.model.sync_us
+        return self.context.sync(cfg)
+
+
+class LatencyStats(NamedTuple):
+    """Virtual latency of one kind of operation, in microseconds"""
+
+    samples: int
+    total: float
+    mean: float
+    p50: float
+    p99: float
+    max: float
+    histogram: Dict[float, int]
+    """Number of calls per bucket, keyed by the upper bound of the bucket (powers of two)"""
+
+
+def _latency_stats(values: Sequence[float]) -> LatencyStats:
+    ordered = sorted(values)
+    count = len(ordered)
+    histogram: Dict[float, int] = {}
+    for value in ordered:
+        bound = 1.0
+        while bound < value:
+            bound *= 2
+        histogram[bound] = histogram.get(bound, 0) + 1
+    return LatencyStats(
+        count,
+        sum(ordered),
+        sum(ordered) / count,
+        ordered[(count - 1) // 2],
+        ordered[min(count - 1, (count * 99) // 100)],
+        ordered[-1],
+        histogram,
+    )
+
+
+# LittleFS methods recorded by measure_latency(), file operations are
+# recorded on the raw FileHandle, i.e. per call into littlefs.
+_TIMED_FS_METHODS = ("open", "remove", "rename", "mkdir", "stat")
+_TIMED_FILE_METHODS = {"write": "write", "readinto": "read", "readall": "read", "flush": "sync", "close": "close"}
+
+
+def measure_latency(fs: LittleFS, workload: Workload) -> Dict[str, LatencyStats]:
+    """Run a workload and report the virtual latency per operation
+
+    ``fs`` must use a :class:`UserContextTimed` context. The latency of
+    ``open``, ``remove``, ``rename``, ``mkdir`` and ``stat`` calls as well
+    as of ``write``, ``read``, ``sync`` (flush) and ``close`` calls on the
+    raw file handles is recorded. Buffered file objects only reach littlefs
+    when their buffer is flushed, exactly these calls are recorded, which
+    corresponds to the calls firmware would make.
+    """
+    context = fs.context
+    if not isinstance(context, UserContextTimed):
+        raise TypeError("measure_latency() requires a filesystem with a UserContextTimed context")
+
+    latencies: Dict[str, List[float]] = {}
+
+    def timed(name: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = context.elapsed_us
+            try:
+                return func(*args, **kwargs)
+            finally:
+                latencies.setdefault(name, []).append(context.elapsed_us - start)
+
+        return wrapper
+
+    def timed_open(*args, **kwargs):
+        start = context.elapsed_us
+        fh = original_open(*args, **kwargs)
+        latencies.setdefault("open", []).append(context.elapsed_us - start)
+        raw: Any = fh
+        while not isinstance(raw, FileHandle):
+            raw = raw.buffer if hasattr(raw, "buffer") else raw.raw
+        for method, name in _TIMED_FILE_METHODS.items():
+            setattr(raw, method, timed(name, getattr(raw, method)))
+        return fh
+
+    original_open = fs.open
+    for method in _TIMED_FS_METHODS:
+        setattr(fs, method, timed(method, getattr(fs, method)))
+    setattr(fs, "open", timed_open)
+    try:
+        _run_workload(fs, workload)
+    finally:
+        for method in _TIMED_FS_METHODS:
+            delattr(fs, method)
+
+    return {name: _latency_stats(values) for name, values in latencies.items()}
+
+
+def format_latency_report(stats: Mapping[str, LatencyStats]) -> str:
+    """Format the result of :func:`measure_latency` as a table"""
+    lines = [f"{'op':<8} {'count':>8} {'mean us':>12} {'p50 us':>12} {'p99 us':>12} {'max us':>12}"]
+    for name, st in sorted(stats.items()):
+        lines.append(f"{name:<8} {st.samples:8d} {st.mean:12.1f} {st.p50:12.1f} {st.p99:12.1f} {st.max:12.1f}")
+    return "\n".join(lines)
+
+
+class UserContextCounting(UserContext):
+    """In-memory context counting all block device operations"""
+
+    def __init__(self, buffsize: Optional[int] = None, buffer: Optional[bytearray] = None) -> None:
+        super().__init__(buffsize, buffer)
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all counters to zero"""
+        self.reads = self.read_bytes = 0
+        self.progs = self.prog_bytes = 0
+        self.erases = 0
+
+    @property
+    def io_ops(self) -> int:
+        """Total number of read, prog and erase operations"""
+        return self.reads + self.progs + self.erases
+
+    def read(self, cfg: "LFSConfig", block: int, off: int, size: int) -> bytearray:
+        self.reads += 1
+        self.read_bytes += size
+        return super().read(cfg, block, off, size)
+
+    def prog(self, cfg: "LFSConfig", block: int, off: int, data: bytes) -> int:
+        self.progs += 1
+        self.prog_bytes += len(data)
+        return super().prog(cfg, block, off, data)
+
+    def erase(self, cfg: "LFSConfig", block: int) -> int:
+        self.erases += 1
+        return super().erase(cfg, block)
+
+
+INLINE_DISABLED = 0xFFFFFFFF
+"""``inline_max`` value which disables inlined files"""
+
+
+class DeviceConstraints(NamedTuple):
+    """Constraints of the target device for :func:`autotune`"""
+
+    block_size: int
+    """Erase size of the flash"""
+    block_count: int
+    read_size: int = 1
+    """Minimal read size supported by the device"""
+    prog_size: int = 1
+    """Minimal program size supported by the device"""
+    max_ram: Optional[int] = None
+    """Maximal RAM in bytes for the caches and the lookahead buffer, see :func:`estimate_ram`"""
+    open_files: int = 1
+    """Number of files open at the same time, each needs a cache"""
+
+
+def estimate_ram(config: Mapping[str, int], open_files: int = 1) -> int:
+    """Estimate the RAM littlefs allocates for caches and the lookahead buffer"""
+    return config["cache_size"] * (2 + open_files) + config["lookahead_size"]
+
+
+def _powers_of_two(start: int, stop: int) -> List[int]:
+    out = []
+    value = start
+    while value <= stop:
+        out.append(value)
+        value *= 2
+    return out
+
+
+def _valid_config(config: Mapping[str, int]) -> bool:
+    """Mirror the configuration asserts of lfs_init, which abort the process"""
+    block_size = config["block_size"]
+    read_size, prog_size, cache_size = config["read_size"], config["prog_size"], config["cache_size"]
+    metadata_max, inline_max = config["metadata_max"], config["inline_max"]
+    if cache_size % read_size or cache_size % prog_size or block_size % cache_size:
+        return False
+    if config["lookahead_size"] % 8:
+        return False
+    if metadata_max and (metadata_max % read_size or metadata_max % prog_size or block_size % metadata_max):
+        return False
+    if inline_max not in (0, INLINE_DISABLED):
+        if inline_max > cache_size or inline_max > (metadata_max or block_size) // 8:
+            return False
+    return True
+
+
+def config_space(constraints: DeviceConstraints) -> List[Dict[str, int]]:
+    """Default set of configurations evaluated by :func:`autotune`
+
+    Sizes are powers of two (multiples of the device minimum), configurations
+    exceeding ``max_ram`` or violating littlefs constraints are left out.
+    """
+    block_size, block_count = constraints.block_size, constraints.block_count
+    reads = _powers_of_two(constraints.read_size, block_size)[::2]
+    progs = _powers_of_two(constraints.prog_size, block_size)[::2]
+    lookaheads = sorted({8, 32, max(8, -(-block_count // 64) * 8)})
+    configs = []
+    for read_size, prog_size in itertools.product(reads, progs):
+        for cache_size in _powers_of_two(max(read_size, prog_size), block_size)[::2]:
+            for lookahead_size, inline_max, metadata_max in itertools.product(
+                lookaheads, (0, INLINE_DISABLED), (0, block_size // 2)
+            ):
+                config = {
+                    "block_size": block_size,
+                    "block_count": block_count,
+                    "read_size": read_size,
+                    "prog_size": prog_size,
+                    "cache_size": cache_size,
+                    "lookahead_size": lookahead_size,
+                    "inline_max": inline_max,
+                    "metadata_max": metadata_max,
+                }
+                if not _valid_config(config):
+                    continue
+                if (
+                    constraints.max_ram is not None
+                    and estimate_ram(config, constraints.open_files) > constraints.max_ram
+                ):
+                    continue
+                configs.append(config)
+    return configs
+
+
+class TuneResult(NamedTuple):
+    """Evaluation of a single configuration by :func:`autotune`"""
+
+    config: Dict[str, int]
+    used_blocks: int
+    io_ops: int
+    io_bytes: int
+    runtime: float
+    """Wall time in seconds"""
+    ram: int
+    error: Optional[str] = None
+    """Error message if the workload failed with this configuration, e.g. out of space"""
+
+
+def _ingest(fs: LittleFS, source: str) -> None:
+    for dirpath, dirnames, filenames in os.walk(source):
+        rel_dir = os.path.relpath(dirpath, source).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else "/" + rel_dir
+        for dirname in dirnames:
+            fs.mkdir(f"{prefix}/{dirname}")
+        for filename in filenames:
+            with open(os.path.join(dirpath, filename), "rb") as src, fs.open(f"{prefix}/{filename}", "wb") as dst:
+                dst.write(src.read())
+
+
+def _evaluate(
+    config: Mapping[str, int], source: Optional[str], script: Optional[Script], open_files: int
+) -> TuneResult:
+    context = UserContextCounting(config["block_size"] * config["block_count"])
+    options: Dict[str, Any] = dict(config)
+    fs = LittleFS(context=context, mount=False, **options)
+    start = time.perf_counter()
+    error = None
+    try:
+        fs.format()
+        fs.mount()
+        if source is not None:
+            _ingest(fs, source)
+        if script is not None:
+            run_script(fs, script)
+        used_blocks = fs.used_block_count
+    except Exception as exc:
+        error = f"{exc.__class__.__name__}: {exc}"
+        used_blocks = config["block_count"]
+    runtime = time.perf_counter() - start
+    return TuneResult(
+        dict(config),
+        used_blocks,
+        context.io_ops,
+        context.read_bytes + context.prog_bytes + context.erases * config["block_size"],
+        runtime,
+        estimate_ram(config, open_files),
+        error,
+    )
+
+
+def autotune(
+    constraints: DeviceConstraints,
+    source: Optional[str] = None,
+    script: Optional[Script] = None,
+    configs: Optional[Iterable[Mapping[str, int]]] = None,
+    processes: Optional[int] = None,
+) -> List[TuneResult]:
+    """Evaluate configurations for a workload in parallel
+
+    For every configuration a fresh in-memory filesystem is formatted, the
+    files below the host directory ``source`` are copied in and ``script``
+    (see :func:`run_script`) is run. The used blocks, the I/O operations and
+    bytes (erases count as ``block_size`` bytes) and the runtime are
+    recorded.
+
+    Parameters
+    ----------
+    constraints : DeviceConstraints
+        Target device.
+    source : Optional[str]
+        Host directory to ingest.
+    script : Optional[Script]
+        Scripted read / write pattern, run after the ingest.
+    configs : Optional[Iterable[Mapping[str, int]]]
+        Configurations to evaluate (keyword arguments of
+        :class:`~littlefs.LittleFS`), defaults to :func:`config_space`.
+    processes : Optional[int]
+        Number of worker processes, defaults to the number of CPUs.
+
+    Returns the results in the order of the configurations, see
+    :func:`best_configs` to pick the best ones.
+    """
+    configs = [dict(c) for c in (config_space(constraints) if configs is None else configs)]
+    script = list(script) if script is not None else None
+    args = (
+        configs,
+        itertools.repeat(source),
+        itertools.repeat(script),
+        itertools.repeat(constraints.open_files),
+    )
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return list(map(_evaluate, *args))
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(_evaluate, *args, chunksize=max(1, len(configs) // (processes * 4))))
+
+
+_CRITERIA = {
+    "space": lambda r: (r.used_blocks, r.io_ops),
+    "io": lambda r: (r.io_ops, r.io_bytes),
+    "runtime": lambda r: (r.runtime,),
+}
+
+
+def best_configs(results: Iterable[TuneResult], top: int = 3) -> Dict[str, List[TuneResult]]:
+    """Pick the ``top`` successful results per criterion
+
+    The criteria are ``"space"`` (fewest used blocks), ``"io"`` (fewest I/O
+    operations) and ``"runtime"``.
+    """
+    ok = [r for r in results if r.error is None]
+    return {name: sorted(ok, key=key)[:top] for name, key in _CRITERIA.items()}
+
+
+def format_tune_report(best: Mapping[str, Sequence[TuneResult]]) -> str:
+    """Format the result of :func:`best_configs` as a table"""
+    lines = []
+    for name, results in best.items():
+        lines.append(f"Best for {name}:")
+        lines.append(f"  {'blocks':>7} {'io ops':>9} {'io bytes':>11} {'time s':>8} {'ram':>7}  config")
+        for r in results:
+            config = {k: v for k, v in r.config.items() if k not in ("block_size", "block_count")}
+            lines.append(
+                f"  {r.used_blocks:7d} {r.io_ops:9d} {r.io_bytes:11d} {r.runtime:8.3f} {r.ram:7d}  {_format_config(config)}"
+            )
+    return "\n".join(lines)
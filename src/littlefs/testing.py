@@ -0,0 +1,260 @@
+"""Tools for testing the robustness of littlefs images against power loss
+
+A :class:`UserContextRecording` records the ordered stream of prog and erase
+operations of a workload once. :class:`PowerLossReplay` then materializes
+the image as it would be on the device if power was lost after any number
+of these operations, without running the workload again.
+
+Example::
+
+    ctx = UserContextRecording(buffsize=128 * 64)
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    ctx.start()
+    with fs.open("data.txt", "w") as fh:
+        fh.write("data")
+
+    def check(fs, cut):
+        fs.listdir("/")
+
+    failures = PowerLossReplay.from_context(ctx).check(check, block_size=128, block_count=64)
+
+Large logs can be checked on all cores with :meth:`PowerLossReplay.check_parallel`.
+"""
+
+import os
+import pickle
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+from . import LittleFS
+from .context import UserContext, UserContextOverlay
+
+if typing.TYPE_CHECKING:
+    from .lfs import LFSConfig
+
+
+class Op(NamedTuple):
+    """Recorded block device operation"""
+
+    #: Absolute offset in the image
+    offset: int
+    #: Programmed data, ``None`` for an erase
+    data: Optional[bytes]
+    #: Number of bytes changed
+    size: int
+
+    @property
+    def is_erase(self) -> bool:
+        return self.data is None
+
+
+class UserContextRecording(UserContext):
+    """In-memory context recording all prog and erase operations
+
+    :meth:`start` captures the current image as the base of the replay and
+    clears the log, which allows to skip e.g. formatting.
+    """
+
+    def __init__(self, buffsize: Optional[int] = None, buffer: Optional[bytearray] = None) -> None:
+        super().__init__(buffsize, buffer)
+        self.start()
+
+    def start(self) -> None:
+        """Use the current image as base and start a new log"""
+        self.base = bytes(self.buffer)
+        self.ops: List[Op] = []
+
+    def prog(self, cfg: "LFSConfig", block: int, off: int, data: bytes) -> int:
+        start = block * cfg.block_size + off
+        self.ops.append(Op(start, bytes(data), len(data)))
+        self.buffer[start : start + len(data)] = data
+        return 0
+
+    def erase(self, cfg: "LFSConfig", block: int) -> int:
+        start = block * cfg.block_size
+        self.ops.append(Op(start, None, cfg.block_size))
+        self.buffer[start : start + cfg.block_size] = b"\xff" * cfg.block_size
+        return 0
+
+
+class PowerLossFailure(NamedTuple):
+    """Cut point at which a check failed"""
+
+    #: Number of operations applied before the power loss
+    cut: int
+    #: Last operation applied before the power loss
+    op: Optional[Op]
+    #: Error raised by the check
+    error: BaseException
+
+    def __str__(self) -> str:
+        return f"cut {self.cut} after {self.op}: {self.error!r}"
+
+
+class PowerLossReplay:
+    """Materialize the image at any power-loss cut point
+
+    Cut point ``n`` is the image after the first ``n`` operations were
+    applied, ``0`` is the base image and ``len(replay) - 1`` the final one.
+    Images are materialized incrementally, visiting cut points in
+    ascending order costs O(total operations).
+    """
+
+    def __init__(self, base: Union[bytes, memoryview], ops: Sequence[Op]) -> None:
+        self.base = base
+        self.ops = ops
+        self._image = bytearray(base)
+        self._pos = 0
+
+    @classmethod
+    def from_context(cls, context: UserContextRecording) -> "PowerLossReplay":
+        return cls(context.base, list(context.ops))
+
+    def __len__(self) -> int:
+        return len(self.ops) + 1
+
+    def image(self, cut: int) -> memoryview:
+        """Image at cut point ``cut``
+
+        The returned view is only valid until the next call, use
+        ``bytes(...)`` to keep a copy.
+        """
+        if not 0 <= cut < len(self):
+            raise IndexError(f"cut point {cut} out of range")
+        if cut < self._pos:
+            self._image[:] = self.base
+            self._pos = 0
+        image = self._image
+        for op in self.ops[self._pos : cut]:
+            if op.data is None:
+                image[op.offset : op.offset + op.size] = b"\xff" * op.size
+            else:
+                image[op.offset : op.offset + op.size] = op.data
+        self._pos = cut
+        return memoryview(image)
+
+    def check(
+        self,
+        check: Callable[[LittleFS, int], None],
+        cut_points: Optional[Iterable[int]] = None,
+        **kwargs,
+    ) -> List[PowerLossFailure]:
+        """Mount the image at each cut point and run ``check`` on it
+
+        Parameters
+        ----------
+        check : Callable[[LittleFS, int], None]
+            Called with the mounted filesystem and the cut point. Any
+            exception counts as a failure. Changes made by the check are
+            discarded.
+        cut_points : Optional[Iterable[int]]
+            Cut points to check, defaults to all.
+        **kwargs
+            Passed on to :class:`~littlefs.LittleFS`, e.g. ``block_size``
+            and ``block_count``.
+
+        Returns the failures, ordered by cut point.
+        """
+        failures = []
+        cuts = range(len(self)) if cut_points is None else sorted(cut_points)
+        for cut in cuts:
+            error = self._check_cut(check, cut, kwargs)
+            if error is not None:
+                failures.append(PowerLossFailure(cut, self.ops[cut - 1] if cut else None, error))
+        return failures
+
+    def check_parallel(
+        self,
+        check: Callable[[LittleFS, int], None],
+        cut_points: Optional[Iterable[int]] = None,
+        processes: Optional[int] = None,
+        shards_per_process: int = 4,
+        **kwargs,
+    ) -> List[PowerLossFailure]:
+        """Like :meth:`check`, but shard the cut points across a process pool
+
+        The base image is placed in shared memory and the operation log is
+        sent to every worker once. Each worker materializes the images of
+        its (contiguous) shards incrementally from the base plus the
+        operations up to the cut point. ``check`` must be picklable, e.g. a
+        module level function.
+
+        The first returned failure is the minimal reproducer: the shortest
+        prefix of the operation log which leads to a failing image. Use
+        :meth:`reproducer` to get the image for a failure.
+
+        Running more than one process requires Python 3.8 or later, for
+        :mod:`multiprocessing.shared_memory`.
+        """
+        cuts = list(range(len(self))) if cut_points is None else sorted(cut_points)
+        processes = processes or os.cpu_count() or 1
+        if processes == 1 or len(cuts) < 2:
+            return self.check(check, cuts, **kwargs)
+        try:
+            from multiprocessing import shared_memory
+        except ImportError as e:
+            raise RuntimeError("check_parallel() with several processes requires Python 3.8 or later") from e
+
+        shard_count = min(len(cuts), processes * shards_per_process)
+        shard_size = -(-len(cuts) // shard_count)
+        shards = [cuts[start : start + shard_size] for start in range(0, len(cuts), shard_size)]
+
+        shm = shared_memory.SharedMemory(create=True, size=max(len(self.base), 1))
+        try:
+            buf = shm.buf
+            assert buf is not None
+            buf[: len(self.base)] = self.base
+            initargs = (shm.name, len(self.base), list(self.ops), check, kwargs)
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=initargs) as pool:
+                results = pool.map(_check_shard, shards)
+                return [failure for shard_failures in results for failure in shard_failures]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def reproducer(self, cut: int) -> bytes:
+        """Copy of the image at cut point ``cut``, e.g. to store a failing case"""
+        return bytes(self.image(cut))
+
+    def _check_cut(self, check: Callable[[LittleFS, int], None], cut: int, kwargs) -> Optional[BaseException]:
+        # The overlay keeps writes of the check away from the replay image
+        context = UserContextOverlay(self.image(cut))
+        try:
+            fs = LittleFS(context=context, mount=False, **kwargs)
+            fs.mount()
+            check(fs, cut)
+        except Exception as exc:
+            return exc
+        return None
+
+
+# State of a check_parallel() worker process
+_worker = None
+
+
+def _init_worker(shm_name: str, size: int, ops: List[Op], check: Callable[[LittleFS, int], None], kwargs) -> None:
+    global _worker
+    from multiprocessing import shared_memory
+
+    # Workers share the resource tracker of the parent, which unlinks the
+    # segment once the pool is done.
+    shm = shared_memory.SharedMemory(shm_name)
+    buf = shm.buf
+    assert buf is not None
+    _worker = (shm, PowerLossReplay(buf[:size], ops), check, kwargs)
+
+
+def _check_shard(cuts: List[int]) -> List[PowerLossFailure]:
+    assert _worker is not None, "worker process not initialized"
+    _, replay, check, kwargs = _worker
+    failures = []
+    for cut in cuts:
+        error = replay._check_cut(check, cut, kwargs)
+        if error is not None:
+            try:
+                pickle.dumps(error)
+            except Exception:
+                error = RuntimeError(repr(error))
+            failures.append(PowerLossFailure(cut, replay.ops[cut - 1] if cut else None, error))
+    return failures
@@ -0,0 +1,50 @@
+import json
+
+from littlefs import simulation
+from littlefs.__main__ import main
+
+
+def test_autotune(tmp_path, capsys):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "file1.txt").write_text("hello world")
+    script = tmp_path / "script.json"
+    script.write_text(json.dumps([["write", "/log.txt", "entry"], ["append", "/log.txt", 100], ["read", "/log.txt"]]))
+
+    argv = ["littlefs", "autotune", str(source_dir), "--script", str(script)]
+    argv += ["--block-size", "512", "--fs-size", "16KB"]
+    argv += ["--read-size", "128", "--prog-size", "128", "--max-ram", "2KB", "--processes", "1"]
+    assert main(argv) == 0
+    out = capsys.readouterr().out
+    assert "Best for space" in out
+    assert "cache_size=" in out
+
+
+def test_autotune_script_rename(tmp_path, capsys, monkeypatch):
+    script = tmp_path / "script.json"
+    ops = [["mkdir", "/logs"], ["write", "/logs/a.txt", "entry"], ["rename", "/logs/a.txt", "/logs/b.txt"]]
+    ops += [["read", "/logs/b.txt"], ["remove", "/logs/b.txt"]]
+    script.write_text(json.dumps(ops))
+
+    scripts = []
+    autotune = simulation.autotune
+
+    def record_autotune(constraints, **kwargs):
+        scripts.append(kwargs["script"])
+        return autotune(constraints, **kwargs)
+
+    monkeypatch.setattr(simulation, "autotune", record_autotune)
+    argv = ["littlefs", "autotune", "--script", str(script), "--block-size", "512", "--fs-size", "16KB"]
+    argv += ["--read-size", "128", "--prog-size", "128", "--max-ram", "2KB", "--processes", "1"]
+    assert main(argv) == 0
+    assert "Best for space" in capsys.readouterr().out
+    # Only the data of writes is converted to bytes
+    assert scripts == [
+        [
+            ("mkdir", "/logs"),
+            ("write", "/logs/a.txt", b"entry"),
+            ("rename", "/logs/a.txt", "/logs/b.txt"),
+            ("read", "/logs/b.txt"),
+            ("remove", "/logs/b.txt"),
+        ]
+    ]
@@ -191,3 +191,51 @@ def test_create_extract_roundtrip_with_config_option(tmp_path, option_name, crea
     assert not comparison.right_only
     assert (extract_dir / "a.txt").read_text() == "hello"
     assert (extract_dir / "b.txt").read_text() == "world"
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_create_trim_roundtrip(tmp_path, compact):
+    """Test that --trim produces a valid image (optionally combined with --compact)."""
+    source_dir = _make_small_source(tmp_path)
+    image_file = tmp_path / "image.bin"
+    extract_dir = tmp_path / "extracted"
+
+    create_argv = [
+        "littlefs", "create", str(source_dir), str(image_file),
+        "--block-size", "512", "--fs-size", "64KB", "--trim",
+    ] + (["--compact"] if compact else [])
+    assert main(create_argv) == 0
+    assert image_file.stat().st_size == 64 * 1024
+
+    extract_argv = [
+        "littlefs", "extract", str(image_file), str(extract_dir),
+        "--block-size", "512",
+    ]
+    assert main(extract_argv) == 0
+    assert (extract_dir / "a.txt").read_text() == "hello"
+    assert (extract_dir / "b.txt").read_text() == "world"
+
+
+def test_create_compressed_and_extract(tmp_path, capsys):
+    """Test that compressed images can be listed and extracted directly."""
+    source_dir = _make_small_source(tmp_path)
+    image_file = tmp_path / "image.lfsz"
+    extract_dir = tmp_path / "extracted"
+
+    create_argv = [
+        "littlefs", "create", str(source_dir), str(image_file),
+        "--block-size", "512", "--fs-size", "64KB", "--compress", "zlib",
+    ]
+    assert main(create_argv) == 0
+    assert image_file.stat().st_size < 64 * 1024
+
+    assert main(["littlefs", "list", str(image_file), "--block-size", "512"]) == 0
+    assert capsys.readouterr().out.split() == ["/a.txt", "/b.txt"]
+
+    extract_argv = [
+        "littlefs", "extract", str(image_file), str(extract_dir),
+        "--block-size", "512",
+    ]
+    assert main(extract_argv) == 0
+    assert (extract_dir / "a.txt").read_text() == "hello"
+    assert (extract_dir / "b.txt").read_text() == "world"
@@ -0,0 +1,47 @@
+from littlefs import LittleFS
+from littlefs.__main__ import main
+
+
+def _make_image(tmp_path):
+    fs = LittleFS(block_size=512, block_count=128)
+    fs.makedirs("/a/b")
+    fs.mkdir("/c")
+    fs.write_bytes("/a/b/big.bin", bytes(5000))
+    fs.write_bytes("/a/small.txt", b"tiny")
+    fs.write_bytes("/c/medium.bin", bytes(1000))
+    image = tmp_path / "image.bin"
+    image.write_bytes(fs.context.buffer)
+    return image
+
+
+def test_du(tmp_path, capsys):
+    image = _make_image(tmp_path)
+    assert main(["littlefs", "du", str(image), "--block-size", "512"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["blocks", "bytes", "files", "path"]
+    assert [line.split()[-1] for line in lines[1:]] == ["/a/b", "/a", "/c", "/"]
+    assert lines[-1].split()[1:] == ["6004", "3", "/"]
+
+
+def test_du_top(tmp_path, capsys):
+    image = _make_image(tmp_path)
+    assert (
+        main(["littlefs", "du", str(image), "--block-size", "512", "--path", "/a", "--top", "1", "--sort", "size"]) == 0
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert lines[1].split()[1:] == ["5004", "2", "/a"]
+
+
+def test_du_missing_path(tmp_path, capsys):
+    image = _make_image(tmp_path)
+    assert main(["littlefs", "du", str(image), "--block-size", "512", "--path", "/missing"]) == 1
+    assert "does not exist" in capsys.readouterr().out
+
+
+def test_du_file_path(tmp_path, capsys):
+    image = _make_image(tmp_path)
+    assert main(["littlefs", "du", str(image), "--block-size", "512", "--path", "/a/b/big.bin"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert lines[1].split()[1:] == ["5000", "1", "/a/b/big.bin"]
@@ -0,0 +1,26 @@
+from littlefs import LittleFS
+from littlefs.__main__ import main
+
+
+def _make_image(tmp_path):
+    fs = LittleFS(block_size=512, block_count=128)
+    fs.makedirs("/a/b")
+    fs.write_bytes("/a/b/big.bin", bytes(5000))
+    fs.write_bytes("/a/small.txt", b"tiny")
+    image = tmp_path / "image.bin"
+    image.write_bytes(fs.context.buffer)
+    return image
+
+
+def test_find(tmp_path, capsys):
+    image = _make_image(tmp_path)
+    assert main(["littlefs", "find", str(image), "--block-size", "512"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["/a", "/a/b", "/a/b/big.bin", "/a/small.txt"]
+
+
+def test_find_pattern_and_predicates(tmp_path, capsys):
+    image = _make_image(tmp_path)
+    assert (
+        main(["littlefs", "find", str(image), "**/*.*", "--block-size", "512", "--type", "f", "--min-size", "1kb"]) == 0
+    )
+    assert capsys.readouterr().out.splitlines() == ["/a/b/big.bin"]
@@ -0,0 +1,40 @@
+import tarfile
+import zipfile
+
+import pytest
+
+from littlefs.__main__ import main
+
+
+@pytest.mark.parametrize("archive_name", ["source.tar.gz", "source.zip"])
+def test_from_archive_and_to_archive(tmp_path, archive_name):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "file1.txt").write_text("hello world")
+    (source_dir / "subdir").mkdir()
+    (source_dir / "subdir" / "file2.txt").write_text("test content")
+
+    archive = tmp_path / archive_name
+    if archive_name.endswith(".zip"):
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.write(source_dir / "file1.txt", "file1.txt")
+            zf.write(source_dir / "subdir" / "file2.txt", "subdir/file2.txt")
+    else:
+        with tarfile.open(archive, "w:gz") as tar:
+            tar.add(source_dir, arcname=".")
+
+    image_file = tmp_path / "image.bin"
+    assert (
+        main(["littlefs", "from-archive", str(archive), str(image_file), "--block-size", "512", "--fs-size", "64KB"])
+        == 0
+    )
+    assert image_file.stat().st_size == 64 * 1024
+
+    exported = tmp_path / "exported.tar"
+    assert main(["littlefs", "to-archive", str(image_file), str(exported), "--block-size", "512"]) == 0
+
+    with tarfile.open(exported) as tar:
+        assert sorted(tar.getnames()) == ["file1.txt", "subdir", "subdir/file2.txt"]
+        member = tar.extractfile("subdir/file2.txt")
+        assert member is not None
+        assert member.read() == b"test content"
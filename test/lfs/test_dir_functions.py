@@ -60,3 +60,38 @@ def test_dir_rewind(testfs):
     for name in dirs:
         info = lfs.dir_read(testfs, dh)
         assert info.name == name
+
+
+def test_dir_iter(testfs):
+    fh = lfs.file_open(testfs, "file.txt", "w")
+    lfs.file_write(testfs, fh, b"data")
+    lfs.file_close(testfs, fh)
+
+    dh = lfs.dir_open(testfs, "/")
+    assert iter(dh) is dh
+    entries = list(dh)
+    assert [entry.name for entry in entries] == ["file.txt", "testdir"]
+    assert list(dh) == []
+
+    entry = entries[0]
+    assert entry.is_file() and not entry.is_dir()
+    assert entry.type == lfs.LFSDirEntry.TYPE_REG
+    assert entry.size == 4
+    assert entries[1].is_dir()
+
+    # Entries behave like LFSStat
+    assert entry == lfs.LFSStat(lfs.LFSStat.TYPE_REG, 4, "file.txt")
+    typ, size, name = entry
+    assert (typ, size, name) == (1, 4, "file.txt")
+    assert entry[2] == "file.txt"
+    assert "file.txt" in repr(entry)
+
+    lfs.dir_close(testfs, dh)
+    with pytest.raises(ValueError):
+        next(dh)
+
+
+def test_dir_iter_bytes(testfs):
+    dh = lfs.dir_open(testfs, b"/")
+    assert [entry.name for entry in dh] == [b"testdir"]
+    lfs.dir_close(testfs, dh)
@@ -120,3 +120,13 @@ def test_file_rewind(mounted_fs):
 def test_file_size(mounted_fs):
     fh = lfs.file_open(mounted_fs, "test.txt", "w")
     assert lfs.file_size(mounted_fs, fh) == 0
+
+
+def test_file_copy(mounted_fs):
+    lfs.file_write_all(mounted_fs, "src.txt", b"0123456789")
+    lfs.setattr(mounted_fs, "src.txt", 1, b"attr")
+    assert lfs.file_copy(mounted_fs, "src.txt", "dst.txt", bytearray(4), [1, 2]) == 10
+    assert lfs.file_read_all(mounted_fs, "dst.txt") == b"0123456789"
+    assert lfs.getattrs(mounted_fs, "dst.txt", [1, 2]) == {1: b"attr"}
+    with pytest.raises(ValueError):
+        lfs.file_copy(mounted_fs, "src.txt", "dst.txt", bytearray())
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from littlefs import LittleFS, appendlog
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=256, block_count=64)
+    yield fs
+
+
+def test_commit_every_n_records(fs):
+    with fs.append_log("/log.bin", max_records=3) as log:
+        for i in range(7):
+            log.append(b"%d," % i)
+        assert log.pending == 1
+        assert fs.read_bytes("/log.bin") == b"0,1,2,3,4,5,"
+    assert fs.read_bytes("/log.bin") == b"0,1,2,3,4,5,6,"
+    stats = log.stats()
+    assert (stats.records, stats.bytes, stats.commits, stats.commits_avoided) == (7, 14, 3, 4)
+    assert stats.max_commit_ns > 0
+    assert stats.max_latency_ns >= stats.max_commit_ns
+
+
+def test_commit_every_n_bytes(fs):
+    fs.write_bytes("/log.bin", b"old;")
+    with fs.append_log("/log.bin", max_bytes=10) as log:
+        log.append(b"12345")
+        assert log.pending == 1
+        log.append(bytearray(b"67890"))
+        assert log.pending == 0
+        assert fs.read_bytes("/log.bin") == b"old;1234567890"
+
+
+def test_explicit_commit_only(fs):
+    log = fs.append_log("/log.bin")
+    log.append(b"a")
+    log.append(b"b")
+    assert fs.read_bytes("/log.bin") == b""
+    log.commit()
+    assert fs.read_bytes("/log.bin") == b"ab"
+    log.close()
+    assert log.closed
+    assert log.stats()[:4] == (2, 2, 1, 1)
+    with pytest.raises(ValueError):
+        log.append(b"c")
+    log.close()
+
+
+def test_commit_after_delay(fs):
+    with fs.append_log("/log.bin", max_delay=0.01) as log:
+        log.append(b"record")
+        deadline = time.monotonic() + 5
+        while log.pending and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert log.pending == 0
+        with log.lock:
+            assert fs.read_bytes("/log.bin") == b"record"
+    assert log.stats().commits == 1
+
+
+def test_invalid_policy(fs):
+    with pytest.raises(ValueError):
+        fs.append_log("/log.bin", max_records=0)
+    with pytest.raises(FileNotFoundError):
+        fs.append_log("/missing/log.bin")
+
+
+def test_failed_sync_keeps_records(fs, monkeypatch):
+    file_sync = appendlog.lfs.file_sync
+    calls = []
+
+    def failing_sync(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise OSError("sync failed")
+        return file_sync(*args)
+
+    log = fs.append_log("/log.bin")
+    monkeypatch.setattr(appendlog.lfs, "file_sync", failing_sync)
+    log.append(b"ab")
+    with pytest.raises(OSError):
+        log.commit()
+    # The records are kept for the next commit, without writing them twice
+    assert log.pending == 1
+    assert log.stats()[:3] == (0, 0, 0)
+    log.commit()
+    log.close()
+    assert fs.read_bytes("/log.bin") == b"ab"
+    assert log.stats()[:3] == (1, 2, 1)
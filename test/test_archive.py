@@ -0,0 +1,80 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+from littlefs import LittleFS
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=128, block_count=64)
+    fs.makedirs("/dir/sub")
+    with fs.open("/file.txt", "w") as fh:
+        fh.write("Sample Text")
+    with fs.open("/dir/sub/data.bin", "wb") as fh:
+        fh.write(bytes(range(256)) * 3)
+    yield fs
+
+
+def _contents(fs):
+    out = {}
+    for root, dirs, files in fs.walk("/"):
+        for name in files:
+            path = "/".join((root, name)).replace("//", "/")
+            with fs.open(path, "rb") as fh:
+                out[path] = fh.read()
+        for name in dirs:
+            out["/".join((root, name)).replace("//", "/")] = None
+    return out
+
+
+@pytest.mark.parametrize("compression", ["", "gz"])
+def test_tar_roundtrip(fs, compression):
+    stream = io.BytesIO()
+    fs.to_tar(stream, compression=compression)
+
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        assert sorted(tar.getnames()) == ["dir", "dir/sub", "dir/sub/data.bin", "file.txt"]
+
+    stream.seek(0)
+    copy = LittleFS.from_tar(stream, block_size=128, block_count=64)
+    assert _contents(copy) == _contents(fs)
+
+
+def test_zip_roundtrip(fs):
+    stream = io.BytesIO()
+    fs.to_zip(stream)
+
+    stream.seek(0)
+    copy = LittleFS.from_zip(stream, block_size=128, block_count=64)
+    assert _contents(copy) == _contents(fs)
+
+
+def test_from_tar_creates_parents_and_skips_links():
+    stream = io.BytesIO()
+    with tarfile.open(fileobj=stream, mode="w") as tar:
+        info = tarfile.TarInfo("./a/b/c.txt")
+        info.size = 5
+        tar.addfile(info, io.BytesIO(b"hello"))
+        link = tarfile.TarInfo("a/link")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "b/c.txt"
+        tar.addfile(link)
+
+    stream.seek(0)
+    fs = LittleFS.from_tar(stream, block_size=128, block_count=64)
+    assert fs.listdir("/a") == ["b"]
+    with fs.open("/a/b/c.txt", "rb") as fh:
+        assert fh.read() == b"hello"
+
+
+def test_from_zip_rejects_parent_references():
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, "w") as zf:
+        zf.writestr("../evil.txt", b"evil")
+
+    stream.seek(0)
+    with pytest.raises(ValueError):
+        LittleFS.from_zip(stream, block_size=128, block_count=64)
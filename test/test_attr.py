@@ -1,5 +1,5 @@
 import pytest
-from littlefs import LittleFS, LittleFSError
+from littlefs import LittleFS, LittleFSError, UserContext
 
 
 @pytest.fixture(scope="function")
@@ -24,3 +24,94 @@ def test_attr(fs):
 
     # Make sure "b" wasn't impacted
     assert b"bar" == fs.getattr("/file.txt", "b")
+
+
+def test_attrs_bulk(fs):
+    fs.setattrs("/file.txt", {"h": b"\x01" * 32, "v": b"1.2.3", 7: b"rw"})
+
+    assert fs.getattrs("/file.txt", ["h", "v", 7]) == {"h": b"\x01" * 32, "v": b"1.2.3", 7: b"rw"}
+    assert fs.getattr("/file.txt", "v") == b"1.2.3"
+
+    # Missing attributes are left out instead of raising.
+    assert fs.getattrs("/file.txt", ["v", "x"]) == {"v": b"1.2.3"}
+
+    with pytest.raises(LittleFSError):
+        fs.getattrs("/missing.txt", ["v"])
+
+
+class _NestedReadContext(UserContext):
+    """Reads an attribute of another filesystem from every read callback"""
+
+    def __init__(self, buffsize, other):
+        super().__init__(buffsize)
+        self.other = other
+        self.active = False
+
+    def read(self, cfg, block, off, size):
+        if self.active:
+            self.other.getattr("/file.bin", "v")
+        return super().read(cfg, block, off, size)
+
+
+def test_getattrs_from_read_callback():
+    # Small caches make littlefs copy the values in several chunks, with
+    # read callbacks in between
+    other = LittleFS(block_size=512, block_count=32, read_size=16, prog_size=16, cache_size=16)
+    other.write_bytes("/file.bin", b"")
+    other.setattr("/file.bin", "v", b"o" * 200)
+    context = _NestedReadContext(512 * 32, other)
+    fs = LittleFS(context=context, block_size=512, block_count=32, read_size=16, prog_size=16, cache_size=16)
+    fs.write_bytes("/file.bin", b"")
+    fs.setattr("/file.bin", "v", b"x" * 200)
+
+    context.active = True
+    assert fs.getattr("/file.bin", "v") == b"x" * 200
+    assert fs.getattrs("/file.bin", ["v"]) == {"v": b"x" * 200}
+
+
+def test_walkattrs(fs):
+    fs.mkdir("/dir")
+    fs.setattr("/dir", "v", b"dir")
+    with fs.open("/dir/other.txt", "w") as fh:
+        fh.write("data")
+    fs.setattr("/file.txt", "v", b"file")
+
+    assert list(fs.walkattrs("/", ["v"])) == [
+        ("/", ["dir"], ["file.txt"], {"dir": {"v": b"dir"}, "file.txt": {"v": b"file"}}),
+        ("/dir", [], ["other.txt"], {"other.txt": {}}),
+    ]
+
+
+def test_open_with_attrs(fs):
+    with fs.open("/new.txt", "w", attrs={"h": b"\xaa" * 8, "v": b"1"}) as fh:
+        fh.write("content")
+
+    assert fs.getattrs("/new.txt", ["h", "v"]) == {"h": b"\xaa" * 8, "v": b"1"}
+
+    hash_buf = bytearray(8)
+    missing_buf = bytearray(b"unset")
+    with fs.open("/new.txt", "r", attrs={"h": hash_buf, "x": missing_buf}) as fh:
+        assert fh.read() == "content"
+    assert hash_buf == b"\xaa" * 8
+    assert missing_buf == b"unset"
+
+
+def test_open_with_attrs_updated_while_open(fs):
+    version = bytearray(b"0")
+    with fs.open("/new.bin", "wb", attrs={"v": version}) as fh:
+        fh.write(b"data")
+        version[:] = b"1"
+
+    assert fs.getattr("/new.bin", "v") == b"1"
+
+
+def test_open_with_buffer(fs):
+    buffer = bytearray(fs.cfg.cache_size)
+    for i in range(3):
+        with fs.open(f"/buffered{i}.txt", "w", buffer=buffer) as fh:
+            fh.write("x" * 300)
+        with fs.open(f"/buffered{i}.txt", "r", buffer=buffer) as fh:
+            assert fh.read() == "x" * 300
+
+    with pytest.raises(ValueError):
+        fs.open("/buffered0.txt", "r", buffer=bytearray(1))
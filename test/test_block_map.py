@@ -0,0 +1,38 @@
+from littlefs import LittleFS
+
+
+def _used_blocks(block_map):
+    return [n for n in range(len(block_map) * 8) if block_map[n // 8] & (1 << (n % 8))]
+
+
+def test_block_map_fresh():
+    fs = LittleFS(block_size=128, block_count=64)
+    block_map = fs.block_map()
+
+    assert len(block_map) == 8
+    # Only the superblock pair is in use.
+    assert _used_blocks(block_map) == [0, 1]
+
+
+def test_block_map_matches_used_block_count():
+    fs = LittleFS(block_size=128, block_count=61)
+    fs.mkdir("dir")
+    for i in range(4):
+        with fs.open(f"dir/file{i}.bin", "wb") as fh:
+            fh.write(bytes([i]) * 500)
+
+    block_map = fs.block_map()
+    assert len(block_map) == 8
+    used = _used_blocks(block_map)
+    assert len(used) == fs.used_block_count
+    assert max(used) < 61
+
+
+def test_block_map_releases_removed_files():
+    fs = LittleFS(block_size=128, block_count=64)
+    with fs.open("file.bin", "wb") as fh:
+        fh.write(b"x" * 1000)
+    used_before = len(_used_blocks(fs.block_map()))
+
+    fs.remove("file.bin")
+    assert len(_used_blocks(fs.block_map())) < used_before
@@ -0,0 +1,84 @@
+import pytest
+
+from littlefs import LFSPath, LittleFS
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=128, block_count=64)
+    fs.makedirs("dir/sub")
+    with fs.open("dir/café.txt", "wb") as f:
+        f.write(b"data")
+    yield fs
+
+
+def test_stat_bytes_path(fs):
+    st = fs.stat("dir/café.txt".encode())
+    assert st.name == "café.txt".encode()
+    assert st.size == 4
+    assert fs.stat("dir/café.txt").name == "café.txt"
+
+
+def test_scandir_bytes_path(fs):
+    assert sorted(fs.listdir(b"dir")) == sorted([b"sub", "café.txt".encode()])
+    assert sorted(fs.listdir("dir")) == ["café.txt", "sub"]
+
+
+def test_walk_bytes_path(fs):
+    result = list(fs.walk(b"/"))
+    assert result[0] == (b"/", [b"dir"], [])
+    assert result[1] == (b"/dir", [b"sub"], ["café.txt".encode()])
+    assert result[2] == (b"/dir/sub", [], [])
+
+
+def test_bytes_path_operations(fs):
+    with fs.open(b"dir/file.bin", "wb") as f:
+        f.write(b"x")
+    fs.rename(b"dir/file.bin", b"dir/sub/file.bin")
+    fs.setattr(b"dir/sub/file.bin", "t", b"value")
+    assert fs.getattr(b"dir/sub/file.bin", "t") == b"value"
+    fs.makedirs(b"a/b/c")
+    assert fs.listdir("a/b") == ["c"]
+    fs.remove(b"dir", recursive=True)
+    assert "dir" not in fs.listdir("/")
+    fs.removedirs(b"a/b/c")
+    assert fs.listdir("/") == []
+
+
+def test_bytes_path_is_not_decoded():
+    fs = LittleFS(block_size=128, block_count=64)
+    name = b"\xff\xfe.bin"  # not valid UTF-8
+    with fs.open(name, "wb") as f:
+        f.write(b"x")
+    assert fs.listdir(b"/") == [name]
+    assert fs.stat(name).name == name
+
+
+def test_missing_bytes_path_error(fs):
+    with pytest.raises(FileNotFoundError, match="'missing'"):
+        fs.remove(b"missing")
+
+
+def test_encoded_path(fs):
+    path = fs.encode_path("dir/café.txt")
+    assert path.encoded == "dir/café.txt".encode()
+    assert path.path == "dir/café.txt"
+    assert str(path) == "dir/café.txt"
+    assert fs.stat(path).name == "café.txt"
+    with fs.open(path, "rb") as f:
+        assert f.read() == b"data"
+    fs.setattr(path, "t", b"value")
+    assert fs.getattrs(path, ["t"]) == {"t": b"value"}
+
+    directory = LFSPath(b"dir")
+    assert sorted(fs.listdir(directory)) == sorted([b"sub", "café.txt".encode()])
+    fs.remove(directory, recursive=True)
+    assert fs.listdir("/") == []
+
+
+def test_encoded_path_encoding():
+    fs = LittleFS(block_size=128, block_count=64, filename_encoding="latin-1")
+    path = fs.encode_path("é")
+    assert path.encoded == b"\xe9"
+    assert LFSPath(path) == path
+    assert hash(LFSPath(b"\xe9")) == hash(path)
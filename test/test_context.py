@@ -1,7 +1,13 @@
 import pytest
 
-from littlefs import LittleFS
-from littlefs.context import UserContextFile
+from littlefs import LittleFS, LittleFSError
+from littlefs.context import (
+    UserContextCompressed,
+    UserContextFile,
+    UserContextOverlay,
+    is_compressed_image,
+    write_compressed_image,
+)
 
 
 def test_user_context_file_requires_existing(tmp_path):
@@ -39,3 +45,204 @@ def test_user_context_file_persists_between_mounts(tmp_path):
 
     fs2.unmount()
     ctx2.close()
+
+
+def _compressed_image(tmp_path, group_size=1024):
+    fs = LittleFS(block_size=128, block_count=64)
+    fs.mkdir("dir")
+    with fs.open("dir/data.bin", "wb") as fh:
+        fh.write(bytes(range(256)) * 8)
+    with fs.open("hello.txt", "w") as fh:
+        fh.write("hello world")
+
+    path = tmp_path / "image.lfsz"
+    with open(path, "wb") as fh:
+        write_compressed_image(fh, fs.context.buffer, group_size=group_size)
+    return path, bytes(fs.context.buffer)
+
+
+def test_user_context_compressed_reads_lazily(tmp_path):
+    path, raw = _compressed_image(tmp_path)
+    assert path.stat().st_size < len(raw)
+
+    ctx = UserContextCompressed(str(path), cache_groups=2)
+    assert ctx.in_size == len(raw)
+    fs = LittleFS(context=ctx, block_size=128, block_count=0, mount=False)
+    fs.mount()
+
+    assert fs.listdir("/") == ["dir", "hello.txt"]
+    with fs.open("dir/data.bin", "rb") as fh:
+        assert fh.read() == bytes(range(256)) * 8
+    assert len(ctx._cache) <= 2
+    assert not ctx.modified
+    ctx.close()
+
+
+def test_user_context_compressed_save(tmp_path):
+    path, _ = _compressed_image(tmp_path, group_size=200)
+
+    ctx = UserContextCompressed(str(path))
+    fs = LittleFS(context=ctx, block_size=128, block_count=0, mount=False)
+    fs.mount()
+    with fs.open("hello.txt", "w") as fh:
+        fh.write("changed")
+    fs.unmount()
+    assert ctx.modified
+    ctx.save()
+    assert not ctx.modified
+    ctx.close()
+
+    ctx2 = UserContextCompressed(str(path))
+    fs2 = LittleFS(context=ctx2, block_size=128, block_count=0, mount=False)
+    fs2.mount()
+    with fs2.open("hello.txt", "r") as fh:
+        assert fh.read() == "changed"
+    with fs2.open("dir/data.bin", "rb") as fh:
+        assert fh.read() == bytes(range(256)) * 8
+    ctx2.close()
+
+
+@pytest.mark.parametrize("group_size", [1000, 1024])
+def test_user_context_compressed_grows_short_image(tmp_path, group_size):
+    # Like ``create --compact --no-pad``, the image stops after the used blocks
+    fs = LittleFS(block_size=128, block_count=64)
+    with fs.open("hello.txt", "w") as fh:
+        fh.write("hello world")
+    used = fs.used_block_count
+    path = tmp_path / "image.lfsz"
+    with open(path, "wb") as fh:
+        write_compressed_image(fh, fs.context.buffer[: used * 128], group_size=group_size)
+
+    ctx = UserContextCompressed(str(path))
+    assert ctx.in_size == used * 128
+    fs = LittleFS(context=ctx, block_size=128, block_count=0, mount=False)
+    fs.mount()
+    assert fs.block_count == 64
+    data = bytes(range(256)) * 12
+    with fs.open("data.bin", "wb") as fh:
+        fh.write(data)
+    fs.unmount()
+    assert ctx.in_size > used * 128
+
+    fs.mount()
+    with fs.open("data.bin", "rb") as fh:
+        assert fh.read() == data
+    fs.unmount()
+    ctx.save()
+    ctx.close()
+
+    ctx = UserContextCompressed(str(path))
+    fs = LittleFS(context=ctx, block_size=128, block_count=0, mount=False)
+    fs.mount()
+    with fs.open("data.bin", "rb") as fh:
+        assert fh.read() == data
+    with fs.open("hello.txt", "rb") as fh:
+        assert fh.read() == b"hello world"
+    ctx.close()
+
+
+def test_user_context_compressed_write_bounds(tmp_path):
+    path, data = _compressed_image(tmp_path)
+    with open(path, "wb") as fh:
+        write_compressed_image(fh, data[: 8 * 128], group_size=1000)
+    ctx = UserContextCompressed(str(path))
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    assert ctx.erase(fs.cfg, 64) == LittleFSError.Error.LFS_ERR_IO
+    assert ctx.prog(fs.cfg, 63, 0, b"end") == 0
+    ctx.save()
+    ctx.close()
+
+    ctx = UserContextCompressed(str(path))
+    assert ctx.in_size == 64 * 128
+    assert ctx.read(fs.cfg, 63, 0, 4) == b"end\xff"
+    ctx.close()
+
+
+def test_user_context_compressed_rejects_raw_image(tmp_path):
+    path = tmp_path / "raw.bin"
+    path.write_bytes(b"\xff" * 1024)
+
+    assert not is_compressed_image(str(path))
+    with pytest.raises(ValueError):
+        UserContextCompressed(str(path))
+
+
+def _base_image():
+    fs = LittleFS(block_size=128, block_count=64)
+    with fs.open("base.txt", "w") as fh:
+        fh.write("base")
+    return bytes(fs.context.buffer)
+
+
+def test_user_context_overlay_keeps_base_unchanged():
+    base = _base_image()
+    ctx = UserContextOverlay(base)
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+
+    with fs.open("new.txt", "w") as fh:
+        fh.write("new")
+
+    assert 0 < len(ctx.modified_blocks) < 64
+    assert sorted(fs.listdir("/")) == ["base.txt", "new.txt"]
+    assert bytes(ctx.buffer) != base
+
+    fs_base = LittleFS(context=UserContextOverlay(base), block_size=128, block_count=64)
+    assert fs_base.listdir("/") == ["base.txt"]
+
+
+def test_user_context_overlay_set_buffer():
+    ctx = UserContextOverlay(_base_image())
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    with fs.open("new.txt", "wb") as fh:
+        fh.write(b"new")
+    image = ctx.buffer
+
+    ctx.buffer = bytearray(_base_image())
+    assert ctx.modified_blocks == []
+    fs.unmount()
+    fs.mount()
+    assert fs.listdir("/") == ["base.txt"]
+
+    ctx.buffer = image
+    fs.unmount()
+    fs.mount()
+    assert fs.listdir("/") == ["base.txt", "new.txt"]
+
+
+def test_user_context_overlay_fork_and_snapshot():
+    ctx = UserContextOverlay(_base_image())
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    with fs.open("shared.txt", "w") as fh:
+        fh.write("shared")
+    snapshot = ctx.snapshot()
+
+    forks = [ctx.fork() for _ in range(3)]
+    for i, fork in enumerate(forks):
+        fork_fs = LittleFS(context=fork, block_size=128, block_count=64)
+        with fork_fs.open(f"fork{i}.txt", "w") as fh:
+            fh.write(str(i))
+
+    with fs.open("parent.txt", "w") as fh:
+        fh.write("parent")
+
+    for i, fork in enumerate(forks):
+        fork_fs = LittleFS(context=fork, block_size=128, block_count=64)
+        assert sorted(fork_fs.listdir("/")) == ["base.txt", f"fork{i}.txt", "shared.txt"]
+
+    ctx.restore(snapshot)
+    fs.unmount()
+    fs.mount()
+    assert sorted(fs.listdir("/")) == ["base.txt", "shared.txt"]
+
+
+def test_user_context_overlay_from_file(tmp_path):
+    path = tmp_path / "base.bin"
+    path.write_bytes(_base_image())
+
+    ctx = UserContextOverlay(str(path))
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    fs.remove("base.txt")
+    assert fs.listdir("/") == []
+    ctx.close()
+
+    assert path.read_bytes() == _base_image()
@@ -0,0 +1,89 @@
+import shutil
+
+import pytest
+
+from littlefs import LittleFS
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=256, block_count=256)
+    fs.makedirs("/src/sub")
+    fs.write_bytes("/src/big.bin", bytes(range(256)) * 10)
+    fs.write_bytes("/src/sub/small.txt", b"small")
+    fs.setattr("/src/big.bin", "a", b"file attr")
+    fs.setattr("/src/sub", 200, b"dir attr")
+    yield fs
+
+
+def test_copy_data_and_attrs(fs):
+    assert fs.copy("/src/big.bin", "/copy.bin") == 2560
+    assert fs.read_bytes("/copy.bin") == bytes(range(256)) * 10
+    assert fs.getattr("/copy.bin", "a") == b"file attr"
+
+
+def test_copy_keeps_all_attrs_by_default(fs):
+    fs.setattrs("/src/big.bin", {0: b"first", 255: b"last"})
+    fs.copy("/src/big.bin", "/copy.bin")
+    assert fs.getattrs("/copy.bin", range(256)) == {0: b"first", ord("a"): b"file attr", 255: b"last"}
+
+
+def test_copy_selected_attrs(fs):
+    fs.setattr("/src/big.bin", "b", b"other")
+    fs.copy("/src/big.bin", "/copy.bin", attr_types=["b"])
+    assert fs.getattrs("/copy.bin", range(256)) == {ord("b"): b"other"}
+    fs.copy("/src/big.bin", "/none.bin", attr_types=())
+    assert fs.getattrs("/none.bin", range(256)) == {}
+
+
+def test_copy_overwrites(fs):
+    fs.write_bytes("/copy.txt", b"previous content")
+    fs.copy("/src/sub/small.txt", "/copy.txt")
+    assert fs.read_bytes("/copy.txt") == b"small"
+
+
+def test_copy_errors(fs):
+    with pytest.raises(FileNotFoundError):
+        fs.copy("/missing", "/copy.bin")
+    with pytest.raises(IsADirectoryError):
+        fs.copy("/src/sub/small.txt", "/src/sub")
+    with pytest.raises(shutil.SameFileError):
+        fs.copy("/src/big.bin", "src/./big.bin")
+
+
+def test_copytree(fs):
+    assert fs.copytree("/src", "/dst") == 2
+    assert list(fs.walk("/dst")) == [("/dst", ["sub"], ["big.bin"]), ("/dst/sub", [], ["small.txt"])]
+    assert fs.read_bytes("/dst/sub/small.txt") == b"small"
+    assert fs.getattr("/dst/big.bin", "a") == b"file attr"
+    assert fs.getattr("/dst/sub", 200) == b"dir attr"
+
+
+def test_copytree_exists(fs):
+    fs.mkdir("/dst")
+    with pytest.raises(FileExistsError):
+        fs.copytree("/src", "/dst")
+    assert fs.copytree("/src", "/dst", dirs_exist_ok=True) == 2
+    assert fs.copytree("/src", "/dst", dirs_exist_ok=True) == 2
+
+
+def test_copytree_into_itself(fs):
+    with pytest.raises(ValueError):
+        fs.copytree("/src", "/src/sub/copy")
+    with pytest.raises(ValueError):
+        fs.copytree("/src", "/src")
+
+
+def test_copy_invalidates_cache():
+    fs = LittleFS(block_size=256, block_count=64, metadata_cache=64)
+    fs.makedirs("/src/sub")
+    fs.write_bytes("/src/file", b"data")
+    assert not fs.exists("/dst/file")
+    assert fs.listdir("/") == ["src"]
+    fs.copytree("/src", "/dst")
+    assert fs.exists("/dst/file")
+    assert fs.listdir("/") == ["dst", "src"]
+    fs.write_bytes("/other", b"longer data")
+    assert fs.stat("/dst/file").size == 4
+    fs.copy("/other", "/dst/file")
+    assert fs.stat("/dst/file").size == 11
@@ -65,3 +65,57 @@ def test_makedirs(fs):
     assert fs.listdir("/") == ["dir"]
     assert fs.listdir("/dir") == ["sub"]
     assert fs.listdir("/dir/sub") == ["abc", "subsub"]
+
+
+def test_makedirs_existing_file(fs):
+    with fs.open("/file", "w") as fh:
+        fh.write("x")
+    with pytest.raises(FileExistsError):
+        fs.makedirs("/file", exist_ok=True)
+    with pytest.raises(NotADirectoryError):
+        fs.makedirs("/file/sub")
+
+
+def test_exists_isfile_isdir(fs):
+    fs.makedirs("/dir/sub")
+    with fs.open("/dir/file.txt", "w") as fh:
+        fh.write("x")
+
+    assert fs.exists("/dir") and fs.isdir("/dir") and not fs.isfile("/dir")
+    assert fs.exists("/dir/file.txt") and fs.isfile("/dir/file.txt") and not fs.isdir("/dir/file.txt")
+    assert fs.isdir("/")
+    for missing in ("/missing", "/dir/missing", "/dir/file.txt/sub"):
+        assert not fs.exists(missing)
+        assert not fs.isfile(missing)
+        assert not fs.isdir(missing)
+        assert fs.try_stat(missing) is None
+    assert fs.try_stat("/dir/file.txt") == fs.stat("/dir/file.txt")
+
+
+def test_makedirs_many(fs):
+    paths = ["/a/b/c", "/a/b/d", "a/e", "/a/b", "/x"]
+    assert fs.makedirs_many(paths) == 6
+    assert fs.listdir("/") == ["a", "x"]
+    assert fs.listdir("/a") == ["b", "e"]
+    assert fs.listdir("/a/b") == ["c", "d"]
+    assert fs.makedirs_many(paths) == 0
+    assert fs.makedirs_many(["/a/b/new"]) == 1
+
+    with pytest.raises(FileExistsError) as excinfo:
+        fs.makedirs_many(["/a/f", "/a/b"], exist_ok=False)
+    assert "'/a/b'" in str(excinfo.value)
+    assert fs.isdir("/a/f")
+
+
+@pytest.mark.parametrize("metadata_cache", [0, 64])
+def test_stat_directory_size(metadata_cache):
+    fs = LittleFS(block_size=128, block_count=64, metadata_cache=metadata_cache)
+    fs.makedirs("/dir/sub")
+    fs.write_bytes("/dir/file.txt", b"x" * 100)
+
+    for path in ("/", "/dir", "/dir/sub"):
+        # Stat a file first, so a stale size would be left behind
+        assert fs.stat("/dir/file.txt").size == 100
+        assert fs.stat(path).size == 0
+        assert fs.try_stat(path) == fs.stat(path)
+    assert [entry.size for entry in fs.scandir("/dir") if entry.is_dir()] == [0]
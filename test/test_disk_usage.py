@@ -0,0 +1,52 @@
+import heapq
+from operator import attrgetter
+
+import pytest
+
+from littlefs import DiskUsage, LittleFS, LittleFSError
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=512, block_count=256)
+    fs.makedirs("/a/b")
+    fs.mkdir("/c")
+    fs.write_bytes("/root.bin", bytes(2000))
+    fs.write_bytes("/a/small.txt", b"tiny")
+    fs.write_bytes("/a/b/big.bin", bytes(5000))
+    yield fs
+
+
+def test_du_post_order_totals(fs):
+    usages = list(fs.du())
+    assert [u.path for u in usages] == ["/a/b", "/a", "/c", "/"]
+    by_path = {u.path: u for u in usages}
+    assert by_path["/a/b"] == DiskUsage("/a/b", 5000, 10 + 2, 1, 0)
+    # The small file is inlined and uses no blocks of its own
+    assert by_path["/a"] == DiskUsage("/a", 5004, 12 + 2, 2, 1)
+    assert by_path["/c"] == DiskUsage("/c", 0, 2, 0, 0)
+    assert by_path["/"] == DiskUsage("/", 7004, 14 + 2 + 4 + 2, 3, 3)
+
+
+def test_du_matches_used_blocks(fs):
+    assert list(fs.du())[-1].blocks == fs.used_block_count
+
+
+def test_du_subtree_and_bytes(fs):
+    assert [u.path for u in fs.du("/a")] == ["/a/b", "/a"]
+    assert list(fs.du(b"/a"))[-1].path == b"/a"
+
+
+def test_du_top_n(fs):
+    top = heapq.nlargest(2, fs.du(), key=attrgetter("size"))
+    assert [u.path for u in top] == ["/", "/a"]
+
+
+def test_du_missing(fs):
+    with pytest.raises(LittleFSError):
+        list(fs.du("/missing"))
+
+
+def test_du_file(fs):
+    usage = fs.du("/a/b/big.bin")
+    assert list(usage) == [DiskUsage("/a/b/big.bin", 5000, 10, 1, 0)]
@@ -227,3 +227,43 @@ def test_text_truncate(fs: LittleFS):
         f.truncate()
 
     assert fs.open("trunc.txt", "r").read() == ""
+
+
+def test_read_bytes(fs):
+    assert fs.read_bytes("test.bin") == bytes.fromhex("11 22 33 44 aa bb cc dd ee ff")
+    assert fs.read_bytes(b"test.txt") == b"1234567890"
+
+
+def test_read_bytes_errors(fs):
+    with pytest.raises(FileNotFoundError):
+        fs.read_bytes("missing.bin")
+    with pytest.raises(IsADirectoryError):
+        fs.read_bytes("mydir")
+
+
+@pytest.mark.parametrize("size", [0, 1, 127, 128, 1000])
+def test_write_bytes(fs, size):
+    data = bytes(range(256)) * 4
+    assert fs.write_bytes("new.bin", data[:size]) == size
+    assert fs.read_bytes("new.bin") == data[:size]
+    assert fs.write_bytes("new.bin", bytearray(b"ab")) == 2
+    assert fs.write_bytes("new.bin", memoryview(b"cd"), append=True) == 2
+    assert fs.read_bytes("new.bin") == b"abcd"
+
+
+def test_write_bytes_errors(fs):
+    with pytest.raises(IsADirectoryError):
+        fs.write_bytes("mydir", b"data")
+    with pytest.raises(FileNotFoundError):
+        fs.write_bytes("missing/new.bin", b"data")
+
+
+def test_read_write_text(fs):
+    assert fs.read_text("test.txt") == "1234567890"
+    fs.write_text("new.txt", "äöü\n", encoding="latin-1")
+    assert fs.read_bytes("new.txt") == b"\xe4\xf6\xfc\n"
+    assert fs.read_text("new.txt", encoding="latin-1") == "äöü\n"
+    fs.write_text("new.txt", "a\nb", newline="\r\n", append=True)
+    assert fs.read_text("new.txt", encoding="latin-1") == "äöü\na\nb"
+    with fs.open("new.txt", "r", encoding="latin-1") as f:
+        assert f.read() == fs.read_text("new.txt", encoding="latin-1")
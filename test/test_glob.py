@@ -0,0 +1,84 @@
+import pytest
+
+from littlefs import LittleFS
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=128, block_count=128)
+    fs.makedirs("/assets/img/icons")
+    fs.makedirs("/assets/snd")
+    fs.makedirs("/docs")
+    fs.write_bytes("/assets/img/logo.png", bytes(300))
+    fs.write_bytes("/assets/img/icons/a.png", b"a")
+    fs.write_bytes("/assets/img/icons/b.svg", b"b")
+    fs.write_bytes("/assets/snd/beep.wav", bytes(20))
+    fs.write_bytes("/docs/readme.txt", b"hello")
+    yield fs
+
+
+def test_glob_wildcards(fs):
+    assert fs.glob("/assets/*/*.png") == ["/assets/img/logo.png"]
+    assert fs.glob("/assets/img/icons/?.*") == ["/assets/img/icons/a.png", "/assets/img/icons/b.svg"]
+    assert fs.glob("/docs/[rs]*") == ["/docs/readme.txt"]
+    assert fs.glob("/docs/*.md") == []
+
+
+def test_glob_recursive(fs):
+    assert fs.glob("/**/*.png") == ["/assets/img/logo.png", "/assets/img/icons/a.png"]
+    assert fs.glob("/assets/**/icons") == ["/assets/img/icons"]
+    assert fs.glob("/assets/snd/**") == ["/assets/snd/beep.wav"]
+    assert fs.glob("/**/**/*.txt") == ["/docs/readme.txt"]
+
+
+def test_glob_several_recursive_parts():
+    fs = LittleFS(block_size=128, block_count=64)
+    fs.makedirs("a/a")
+    fs.write_bytes("a/a/g", b"g")
+    # a/a/g is reached through both ``a`` directories, but reported once
+    assert fs.glob("**/a/**") == ["a/a", "a/a/g"]
+    assert list(fs.find("**/a/**", type="f")) == ["a/a/g"]
+
+
+def test_glob_literal_and_relative(fs):
+    assert fs.glob("/docs/readme.txt") == ["/docs/readme.txt"]
+    assert fs.glob("/docs/missing.txt") == []
+    assert fs.glob("/docs/readme.txt/*") == []
+    assert fs.glob("docs/*") == ["docs/readme.txt"]
+    assert fs.glob(b"/docs/*") == [b"/docs/readme.txt"]
+
+
+def test_glob_prunes_directories(fs):
+    listed = []
+    scandir = fs.scandir
+
+    def tracking_scandir(path="."):
+        listed.append(path)
+        return scandir(path)
+
+    fs.scandir = tracking_scandir
+    assert list(fs.iglob("/assets/img/*.png")) == ["/assets/img/logo.png"]
+    assert listed == ["/assets/img"]
+    listed.clear()
+    assert fs.glob("/assets/*/icons/a.png") == ["/assets/img/icons/a.png"]
+    assert listed == ["/assets"]
+
+
+def test_find_predicates(fs):
+    assert list(fs.find("/**", type="d")) == ["/assets", "/assets/img", "/assets/img/icons", "/assets/snd", "/docs"]
+    assert list(fs.find("/assets/**", type="f", min_size=2)) == ["/assets/img/logo.png", "/assets/snd/beep.wav"]
+    assert list(fs.find("/**/*.*", max_size=5)) == [
+        "/assets/img/icons/a.png",
+        "/assets/img/icons/b.svg",
+        "/docs/readme.txt",
+    ]
+    with pytest.raises(ValueError):
+        list(fs.find(type="x"))
+
+
+def test_find_size_of_plain_names(fs):
+    # Patterns without wildcards are looked up directly instead of being
+    # matched against directory entries
+    assert list(fs.find("/assets/img", min_size=100)) == []
+    assert list(fs.find("/assets/img", max_size=0)) == ["/assets/img"]
+    assert list(fs.find("/assets/img/logo.png", min_size=100)) == ["/assets/img/logo.png"]
@@ -0,0 +1,164 @@
+import pytest
+
+from littlefs import LittleFS, LittleFSError
+from littlefs.cache import MISSING, MetadataCache
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=128, block_count=64, metadata_cache=64)
+    fs.makedirs("/dir/sub")
+    fs.write_bytes("/dir/file.txt", b"data")
+    yield fs
+
+
+def test_cached_stat_and_listing(fs):
+    cache = fs.metadata_cache
+    assert fs.stat("dir/file.txt").size == 4
+    assert fs.listdir("/dir") == ["file.txt", "sub"]
+    hits = cache.hits
+    # Equivalent spellings share the entries
+    assert fs.stat("/dir/./file.txt").size == 4
+    assert fs.listdir("dir/") == ["file.txt", "sub"]
+    assert fs.exists("/dir/file.txt")
+    assert cache.hits == hits + 3
+
+
+def test_cache_avoids_block_reads(fs):
+    list(fs.walk("/dir"))
+    fs.stat("/dir/file.txt")
+
+    read = fs.context.read
+    calls = []
+
+    def counting_read(*args):
+        calls.append(args)
+        return read(*args)
+
+    fs.context.read = counting_read
+    try:
+        list(fs.walk("/dir"))
+        fs.stat("/dir/file.txt")
+        fs.isfile("/dir/file.txt")
+    finally:
+        del fs.context.read
+    assert calls == []
+
+
+def test_missing_paths(fs):
+    assert fs.try_stat("/missing") is None
+    with pytest.raises(LittleFSError):
+        fs.stat("/missing")
+    fs.write_bytes("/missing", b"x")
+    assert fs.stat("/missing").size == 1
+    assert "missing" in fs.listdir("/")
+
+
+def test_invalidation_by_writes(fs):
+    assert fs.stat("/dir/file.txt").size == 4
+    fs.listdir("/dir")
+    with fs.open("/dir/file.txt", "ab") as fh:
+        fh.write(b"more")
+    assert fs.stat("/dir/file.txt").size == 8
+    assert [st.size for st in fs.scandir("/dir") if st.name == "file.txt"] == [8]
+
+    with fs.open("/dir/new.txt", "w") as fh:
+        fh.write("x")
+    assert fs.listdir("/dir") == ["file.txt", "new.txt", "sub"]
+
+    with fs.open("/dir/new.txt", "r+b", buffering=0) as fh:
+        fh.seek(0)
+        fh.truncate()
+    assert fs.stat("/dir/new.txt").size == 0
+
+
+def test_invalidation_by_namespace_changes(fs):
+    fs.write_bytes("/dir/sub/deep.txt", b"x")
+    assert fs.isfile("/dir/sub/deep.txt")
+    fs.listdir("/dir/sub")
+
+    fs.rename("/dir/sub", "/dir/moved")
+    assert not fs.exists("/dir/sub/deep.txt")
+    assert fs.isfile("/dir/moved/deep.txt")
+    assert fs.listdir("/dir") == ["file.txt", "moved"]
+
+    fs.mkdir("/dir/sub")
+    assert fs.listdir("/dir/sub") == []
+    assert fs.isdir("/dir/sub")
+
+    fs.remove("/dir", recursive=True)
+    assert not fs.exists("/dir/moved/deep.txt")
+    assert not fs.exists("/dir")
+    assert fs.listdir("/") == []
+
+
+def test_invalidation_of_attrs(fs):
+    fs.setattr("/dir/file.txt", "a", b"1")
+    assert fs.getattr("/dir/file.txt", "a") == b"1"
+    fs.setattr("/dir/file.txt", "a", b"2")
+    assert fs.getattr("/dir/file.txt", "a") == b"2"
+    fs.setattrs("/dir/file.txt", {"a": b"3"})
+    assert fs.getattr("/dir/file.txt", "a") == b"3"
+    fs.removeattr("/dir/file.txt", "a")
+    with pytest.raises(LittleFSError):
+        fs.getattr("/dir/file.txt", "a")
+
+
+def test_format_clears_cache(fs):
+    fs.listdir("/dir")
+    fs.format()
+    fs.mount()
+    assert len(fs.metadata_cache) == 0
+    assert fs.listdir("/") == []
+
+
+def test_lru_eviction():
+    cache = MetadataCache(2)
+    cache.put(("stat", b"/a", False), 1)
+    cache.put(("stat", b"/b", False), 2)
+    assert cache.get(("stat", b"/a", False)) == 1
+    cache.put(("stat", b"/c", False), 3)
+    assert cache.get(("stat", b"/b", False)) is MISSING
+    assert cache.get(("stat", b"/a", False)) == 1
+    assert len(cache) == 2
+    with pytest.raises(ValueError):
+        MetadataCache(0)
+
+
+def test_changed():
+    cache = MetadataCache(10)
+    for key in [
+        ("stat", b"/a", False),
+        ("dir", b"/", False),
+        ("dir", b"/a", True),
+        ("stat", b"/a/b", False),
+        ("stat", b"/ab", False),
+    ]:
+        cache.put(key, None)
+    cache.changed(b"/a")
+    assert len(cache) == 2
+    cache.changed(b"/a", subtree=True)
+    assert cache.get(("stat", b"/ab", False)) is None
+    assert len(cache) == 1
+
+
+def test_changed_subtree_index():
+    cache = MetadataCache(3)
+    cache.put(("stat", b"/a/b/c", False), 1)
+    cache.put(("stat", b"/a/bc", False), 2)
+    cache.put(("dir", b"/x", False), 3)
+    # The deep entry is found although /a and /a/b have no entries
+    cache.changed(b"/a/b", subtree=True)
+    assert cache.get(("stat", b"/a/b/c", False)) is MISSING
+    assert cache.get(("stat", b"/a/bc", False)) == 2
+    cache.changed(b"/a", subtree=True)
+    assert len(cache) == 1
+
+    # Evicted and dropped entries leave no index behind
+    cache.put(("stat", b"/y/z", False), 4)
+    cache.put(("stat", b"/y/w", False), 5)
+    cache.put(("stat", b"/q", False), 6)
+    cache.discard(("stat", b"/q", False))
+    cache.changed(b"/y", subtree=True)
+    assert len(cache) == 0
+    assert cache._keys == {} and cache._children == {}
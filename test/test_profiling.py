@@ -0,0 +1,125 @@
+import io
+import json
+
+import pytest
+
+from littlefs import LittleFS
+from littlefs.context import UserContext
+
+
+@pytest.fixture
+def fs():
+    return LittleFS(block_size=128, block_count=64)
+
+
+def _stats(profiler):
+    return {(st.category, st.name): st for st in profiler.stats()}
+
+
+def test_profile_records_all_levels(fs):
+    with fs.profile() as profiler:
+        fs.mkdir("dir")
+        with fs.open("dir/file.txt", "w") as fh:
+            fh.write("hello")
+        fs.stat("dir/file.txt")
+
+    stats = _stats(profiler)
+    assert stats["fs", "mkdir"].calls == 1
+    assert stats["fs", "open"].calls == 1
+    assert stats["fs", "stat"].calls == 1
+    assert stats["io", "write"].calls == 1
+    assert stats["io", "close"].calls == 1
+    assert ("file", "write") in stats
+    assert stats["file", "close"].calls == 1
+    assert stats["block", "prog"].calls == stats["context", "prog"].calls > 0
+    assert stats["block", "erase"].calls == stats["context", "erase"].calls > 0
+
+    for st in stats.values():
+        assert 0 <= st.self_ns <= st.total_ns
+        assert st.max_ns <= st.total_ns
+
+
+def test_self_time_excludes_children(fs):
+    fs.mkdir("dir")
+    with fs.profile() as profiler:
+        fs.rmdir("dir")
+
+    stats = _stats(profiler)
+    rmdir = stats["fs", "rmdir"]
+    assert stats["fs", "remove"].calls == 1
+    assert rmdir.self_ns <= rmdir.total_ns - stats["fs", "remove"].total_ns
+
+
+def test_generator_methods(fs):
+    fs.makedirs("a/b")
+    with fs.profile() as profiler:
+        for _ in fs.walk("/"):
+            pass
+
+    stats = _stats(profiler)
+    # 3 (recursive) calls, 3 + 2 + 1 produced items and a final step per generator
+    assert stats["fs", "walk"].calls == 3
+    assert stats["fs", "walk.next"].calls == 6 + 3
+    walk_ns = stats["fs", "walk"].total_ns + stats["fs", "walk.next"].total_ns
+    assert walk_ns >= stats["fs", "scandir"].total_ns
+    assert stats["block", "read"].calls > 0
+
+
+def test_profile_restores_methods(fs):
+    context = fs.context
+    with fs.profile() as profiler:
+        with fs.open("file.bin", "wb", buffering=0) as fh:
+            fh.write(b"data")
+
+    assert "open" not in vars(fs)
+    assert "mkdir" not in vars(fs)
+    assert "prog" not in vars(context)
+    assert type(fs.open("file.bin", "rb")) is io.BufferedReader
+
+    count = len(profiler.events)
+    fs.mkdir("dir")
+    assert len(profiler.events) == count
+
+
+def test_profile_disabled_records_nothing():
+    context = UserContext(128 * 64)
+    fs = LittleFS(context=context, block_size=128, block_count=64)
+    profiler = fs.profile()
+    fs.mkdir("dir")
+    assert profiler.events == []
+
+
+def test_profile_reentry(fs):
+    profiler = fs.profile()
+    with profiler:
+        with pytest.raises(RuntimeError):
+            profiler.__enter__()
+
+
+def test_profiled_text_iteration(fs):
+    with fs.open("lines.txt", "w") as fh:
+        fh.write("a\nb\nc\n")
+
+    with fs.profile() as profiler:
+        with fs.open("lines.txt", "r") as fh:
+            assert list(fh) == ["a\n", "b\n", "c\n"]
+
+    assert _stats(profiler)["io", "next"].calls == 4
+
+
+def test_summary_and_chrome_trace(fs, tmp_path):
+    with fs.profile() as profiler:
+        fs.mkdir("dir")
+
+    summary = profiler.summary()
+    assert summary.splitlines()[0].split()[:3] == ["category", "op", "calls"]
+    assert "mkdir" in summary
+
+    path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(str(path))
+    trace = json.loads(path.read_text())
+    events = trace["traceEvents"]
+    assert len(events) == len(profiler.events)
+    assert {"name", "cat", "ph", "ts", "dur", "pid", "tid"} <= set(events[0])
+    assert all(event["ph"] == "X" for event in events)
+    assert min(event["ts"] for event in events) == 0
@@ -83,3 +83,10 @@ def test_rename(fs: LittleFS):
 
     assert "sub" not in files_in_dir
     assert "sub_renamed" in files_in_dir
+
+
+def test_remove_recursive_file_and_missing(fs):
+    fs.remove("/dir/file.txt", recursive=True)
+    assert fs.listdir("/dir") == ["emptyA", "emptyB", "sub"]
+    with pytest.raises(FileNotFoundError):
+        fs.remove("/dir/missing", recursive=True)
@@ -0,0 +1,139 @@
+import pytest
+from littlefs import LittleFS, UserContext
+from littlefs.simulation import (
+    DeviceConstraints,
+    FlashTimingModel,
+    UserContextTimed,
+    UserContextWear,
+    autotune,
+    best_configs,
+    config_space,
+    estimate_ram,
+    format_latency_report,
+    format_tune_report,
+    format_wear_report,
+    measure_latency,
+    run_script,
+    simulate_wear,
+)
+
+
+SCRIPT = [
+    ("makedirs", "/log"),
+    ("write", "/log/a.bin", 300),
+    ("append", "/log/a.bin", b"more"),
+    ("read", "/log/a.bin"),
+    ("rename", "/log/a.bin", "/log/b.bin"),
+    ("remove", "/log/b.bin"),
+]
+
+
+def test_run_script():
+    fs = LittleFS(block_size=128, block_count=64)
+    run_script(fs, SCRIPT[:3])
+    with fs.open("/log/a.bin", "rb") as fh:
+        assert fh.read() == b"\xa5" * 300 + b"more"
+
+    with pytest.raises(ValueError):
+        run_script(fs, [("format",)])
+
+
+def test_user_context_wear_counts_erases():
+    ctx = UserContextWear(128 * 64)
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    assert len(ctx.erase_counts) == 64
+    assert sum(ctx.erase_counts) > 0
+
+    ctx.reset()
+    assert sum(ctx.erase_counts) == 0
+
+
+def test_simulate_wear():
+    configs = [
+        {"block_size": 128, "block_count": 64, "block_cycles": -1},
+        {"block_size": 128, "block_count": 64, "block_cycles": 4},
+    ]
+    reports = simulate_wear(SCRIPT, configs, iterations=20)
+
+    assert [r.config for r in reports] == configs
+    for report in reports:
+        assert len(report.erase_counts) == 64
+        assert report.total_erases == sum(report.erase_counts)
+        assert report.max_erases >= report.mean_erases > 0
+
+    table = format_wear_report(reports)
+    assert "block_cycles=4" in table
+
+
+def test_measure_latency():
+    model = FlashTimingModel(read_op_us=1, read_byte_us=0.1, prog_op_us=10, prog_byte_us=1, erase_us=1000)
+    ctx = UserContextTimed(UserContext(128 * 64), model)
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    assert ctx.elapsed_us > 0
+
+    def workload(fs):
+        for i in range(5):
+            with fs.open(f"file{i}.bin", "wb", buffering=0) as fh:
+                fh.write(b"x" * 200)
+                fh.flush()
+            with fs.open(f"file{i}.bin", "rb", buffering=0) as fh:
+                fh.read()
+
+    stats = measure_latency(fs, workload)
+
+    assert stats["open"].samples == 10
+    assert stats["write"].samples == 5
+    assert stats["sync"].samples == 5
+    assert stats["read"].samples == 5
+    assert stats["close"].samples == 10
+    assert stats["sync"].mean > 200
+    assert sum(stats["open"].histogram.values()) == 10
+    assert stats["open"].max >= stats["open"].p99 >= stats["open"].p50
+
+    # Instrumentation is removed afterwards
+    assert "open" not in vars(fs)
+    assert "sync" in format_latency_report(stats)
+
+
+def test_measure_latency_requires_timed_context():
+    with pytest.raises(TypeError):
+        measure_latency(LittleFS(block_size=128, block_count=64), [])
+
+
+def test_config_space_respects_constraints():
+    constraints = DeviceConstraints(block_size=512, block_count=32, read_size=16, prog_size=16, max_ram=1600)
+    configs = config_space(constraints)
+
+    assert configs
+    for config in configs:
+        assert estimate_ram(config) <= 1600
+        assert config["read_size"] >= 16 and config["prog_size"] >= 16
+        assert 512 % config["cache_size"] == 0
+        assert config["cache_size"] % config["read_size"] == 0
+        assert config["cache_size"] % config["prog_size"] == 0
+
+
+def test_autotune(tmp_path):
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "small.txt").write_text("small")
+    (tmp_path / "big.bin").write_bytes(b"\x00" * 3000)
+
+    constraints = DeviceConstraints(block_size=512, block_count=32, read_size=64, prog_size=64)
+    configs = config_space(constraints)[:6]
+    script = [("write", "/log", 10)] + [("append", "/log", 100)] * 3
+    results = autotune(constraints, str(tmp_path), script, configs=configs, processes=2)
+
+    assert [r.config for r in results] == configs
+    assert all(r.error is None and r.used_blocks > 2 and r.io_ops > 0 for r in results)
+
+    best = best_configs(results, top=2)
+    assert set(best) == {"space", "io", "runtime"}
+    assert best["space"][0].used_blocks == min(r.used_blocks for r in results)
+    assert "Best for io" in format_tune_report(best)
+
+
+def test_autotune_reports_failures():
+    constraints = DeviceConstraints(block_size=512, block_count=8, read_size=512, prog_size=512)
+    results = autotune(constraints, script=[("write", "/big", 512 * 16)], processes=1)
+    assert results and all(r.error for r in results)
+    assert best_configs(results)["space"] == []
@@ -0,0 +1,73 @@
+import pytest
+from littlefs import LittleFS, UserContextFile
+
+
+@pytest.fixture(scope="function")
+def fs():
+    fs = LittleFS(block_size=128, block_count=64)
+    fs.mkdir("dir")
+    with fs.open("dir/prepared.txt", "w") as fh:
+        fh.write("prepared")
+    yield fs
+
+
+def test_snapshot_restore(fs):
+    snapshot = fs.snapshot()
+
+    with fs.open("new.txt", "w") as fh:
+        fh.write("new")
+    fs.remove("dir/prepared.txt")
+
+    restored = fs.restore(snapshot)
+    assert 0 < restored < 64
+    assert fs.listdir("/") == ["dir"]
+    with fs.open("dir/prepared.txt", "r") as fh:
+        assert fh.read() == "prepared"
+
+    # Restoring without changes does not touch any block
+    assert fs.restore(snapshot) == 0
+
+
+def test_restore_older_snapshot(fs):
+    first = fs.snapshot()
+    with fs.open("a.txt", "w") as fh:
+        fh.write("a")
+    second = fs.snapshot()
+    with fs.open("b.txt", "w") as fh:
+        fh.write("b")
+
+    fs.restore(first)
+    assert fs.listdir("/") == ["dir"]
+    fs.restore(second)
+    assert sorted(fs.listdir("/")) == ["a.txt", "dir"]
+
+
+def test_snapshot_file_context(tmp_path):
+    ctx = UserContextFile(str(tmp_path / "image.bin"), create=True)
+    fs = LittleFS(context=ctx, block_size=128, block_count=32)
+    snapshot = fs.snapshot()
+    with fs.open("file.txt", "w") as fh:
+        fh.write("data")
+
+    fs.restore(snapshot)
+    assert fs.listdir("/") == []
+    ctx.close()
+
+
+def test_restore_other_geometry(fs):
+    other = LittleFS(block_size=128, block_count=32)
+    with pytest.raises(ValueError):
+        fs.restore(other.snapshot())
+
+
+def test_restore_after_trim(fs):
+    # Leave stale data in the free blocks, which trim erases
+    with fs.open("stale.bin", "wb") as fh:
+        fh.write(bytes(range(256)) * 8)
+    fs.remove("stale.bin")
+    snapshot = fs.snapshot()
+
+    assert fs.trim() > 0
+    assert bytes(fs.context.buffer) != snapshot.data
+    assert fs.restore(snapshot) > 0
+    assert bytes(fs.context.buffer) == snapshot.data
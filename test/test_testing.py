@@ -0,0 +1,93 @@
+import multiprocessing
+import sys
+
+import pytest
+from littlefs import LittleFS, UserContext
+from littlefs.testing import PowerLossReplay, UserContextRecording
+
+
+def _record_workload():
+    ctx = UserContextRecording(buffsize=128 * 64)
+    fs = LittleFS(context=ctx, block_size=128, block_count=64)
+    with fs.open("config.txt", "w") as fh:
+        fh.write("v1")
+    ctx.start()
+
+    for version in range(2, 5):
+        with fs.open("config.txt", "w") as fh:
+            fh.write(f"v{version}" * 40)
+    return ctx
+
+
+def _check_config(fs, cut):
+    with fs.open("config.txt", "r") as fh:
+        content = fh.read()
+    assert content == "v1" or content in (f"v{v}" * 40 for v in range(2, 5))
+
+
+def test_replay_matches_recorded_image():
+    ctx = _record_workload()
+    replay = PowerLossReplay.from_context(ctx)
+
+    assert len(replay) == len(ctx.ops) + 1
+    assert bytes(replay.image(0)) == ctx.base
+    assert bytes(replay.image(len(replay) - 1)) == bytes(ctx.buffer)
+    # Going backwards restarts from the base image
+    assert bytes(replay.image(0)) == ctx.base
+
+
+def test_replay_check_all_cut_points():
+    replay = PowerLossReplay.from_context(_record_workload())
+    assert replay.check(_check_config, block_size=128, block_count=64) == []
+
+
+def test_replay_reports_failures():
+    replay = PowerLossReplay.from_context(_record_workload())
+
+    def check(fs, cut):
+        with fs.open("config.txt", "r") as fh:
+            assert fh.read() == "v1"
+
+    failures = replay.check(check, block_size=128, block_count=64)
+    assert failures
+    assert failures[0].cut > 0
+    assert failures[0].op is replay.ops[failures[0].cut - 1]
+    assert isinstance(failures[0].error, AssertionError)
+
+
+def test_replay_out_of_range():
+    replay = PowerLossReplay.from_context(_record_workload())
+    with pytest.raises(IndexError):
+        replay.image(len(replay))
+
+
+def _check_not_v4(fs, cut):
+    with fs.open("config.txt", "r") as fh:
+        assert fh.read() != "v4" * 40
+
+
+def test_replay_check_parallel():
+    replay = PowerLossReplay.from_context(_record_workload())
+
+    assert replay.check_parallel(_check_config, processes=2, block_size=128, block_count=64) == []
+
+    failures = replay.check_parallel(_check_not_v4, processes=2, block_size=128, block_count=64)
+    expected = replay.check(_check_not_v4, block_size=128, block_count=64)
+    assert [f.cut for f in failures] == [f.cut for f in expected]
+    assert failures[-1].cut == len(replay) - 1
+
+    image = replay.reproducer(failures[0].cut)
+    fs = LittleFS(context=UserContext(buffer=bytearray(image)), block_size=128, block_count=64)
+    with pytest.raises(AssertionError):
+        _check_not_v4(fs, failures[0].cut)
+
+
+def test_replay_check_parallel_without_shared_memory(monkeypatch):
+    replay = PowerLossReplay.from_context(_record_workload())
+    # Python 3.7 has no multiprocessing.shared_memory
+    monkeypatch.setitem(sys.modules, "multiprocessing.shared_memory", None)
+    monkeypatch.delattr(multiprocessing, "shared_memory", raising=False)
+
+    with pytest.raises(RuntimeError, match="Python 3.8"):
+        replay.check_parallel(_check_config, processes=2, block_size=128, block_count=64)
+    assert replay.check_parallel(_check_config, processes=1, block_size=128, block_count=64) == []
@@ -0,0 +1,30 @@
+from littlefs import LittleFS
+
+
+def test_trim_erases_stale_data():
+    fs = LittleFS(block_size=128, block_count=64)
+    with fs.open("secret.bin", "wb") as fh:
+        fh.write(b"SECRET" * 100)
+    fs.remove("secret.bin")
+    with fs.open("keep.txt", "w") as fh:
+        fh.write("keep")
+
+    assert b"SECRET" in fs.context.buffer
+
+    erased = fs.trim()
+
+    block_map = fs.block_map()
+    used = sum(bin(b).count("1") for b in block_map)
+    assert erased == 64 - used
+    assert b"SECRET" not in fs.context.buffer
+
+    with fs.open("keep.txt", "r") as fh:
+        assert fh.read() == "keep"
+
+    # The filesystem stays usable after trimming
+    with fs.open("new.bin", "wb") as fh:
+        fh.write(b"\x00" * 1000)
+    fs.unmount()
+    fs.mount()
+    with fs.open("new.bin", "rb") as fh:
+        assert fh.read() == b"\x00" * 1000